@@ -0,0 +1 @@
+"""Benchmarks for the Upsilon Workshop API."""
@@ -0,0 +1,115 @@
+"""Report the storage saved by storing the script files as blobs.
+
+The dataset mimics the workshop: original scripts of one to four files
+(mostly small, some large), forks that change a single file, exact
+re-uploads, and helper modules shared by many scripts. The sizes are the
+UTF-8 bytes of the stored columns (the files before, the manifests, the
+blobs and the links between scripts and blobs after), without the overhead
+of the database pages.
+
+Usage: python benchmarks/bench_blob_storage.py [scripts]
+"""
+import json
+import random
+import sys
+
+from common import create_scripts, setup_database
+
+from django.db.models import Sum
+
+from workshop.api.models import Blob, Script, User
+
+# Shared helper modules, and the share of scripts using one of them
+HELPERS = 20
+HELPER_RATE = 0.25
+
+# Share of forks (one file changed) and re-uploads (identical files)
+FORK_RATE = 0.30
+REUPLOAD_RATE = 0.05
+
+
+def make_content(rng: random.Random) -> str:
+    """Return the content of a file (median size around 2 KB)."""
+    size = min(int(rng.lognormvariate(7.6, 1.0)), 60 * 1024)
+    words = ("def", "return", "for", "in", "range", "if", "print", "x", "y",
+             "kandinsky", "fill_rect", "draw_string", "ion", "keydown")
+    lines, length = [], 0
+    while length < size:
+        line = "    " * rng.randint(0, 2) + " ".join(
+            rng.choice(words) for _ in range(rng.randint(2, 10))
+        )
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)[:size]
+
+
+def make_dataset(scripts: int, seed: int = 0) -> list:
+    """Return the files of the scripts of the dataset."""
+    rng = random.Random(seed)
+    helpers = [{"name": f"helper{index}.py", "content": make_content(rng)}
+               for index in range(HELPERS)]
+
+    dataset = []
+    for index in range(scripts):
+        roll = rng.random()
+        if dataset and roll < FORK_RATE:
+            files = [dict(file) for file in rng.choice(dataset)]
+            changed = rng.randrange(len(files))
+            files[changed]['content'] += f"\n# Fork {index}"
+        elif dataset and roll < FORK_RATE + REUPLOAD_RATE:
+            files = [dict(file) for file in rng.choice(dataset)]
+        else:
+            files = [{"name": f"file{number}.py",
+                      "content": make_content(rng)}
+                     for number in range(rng.randint(1, 4))]
+            if rng.random() < HELPER_RATE:
+                files.append(rng.choice(helpers))
+        dataset.append(files)
+    return dataset
+
+
+def main():
+    scripts = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+    teardown = setup_database()
+    try:
+        dataset = make_dataset(scripts)
+        author = User.objects.create(username="author",
+                                     email="author@example.com")
+
+        batch = []
+        for index, files in enumerate(dataset):
+            script = Script(name=f"script{index}", author=author,
+                            language="python")
+            script.set_files(files)
+            batch.append(script)
+            if len(batch) == 500:
+                create_scripts(batch)
+                batch = []
+        create_scripts(batch)
+
+        inline = sum(len(json.dumps(files).encode('utf-8'))
+                     for files in dataset)
+        manifests = sum(
+            len(json.dumps(files).encode('utf-8'))
+            for files in Script.objects.values_list('files', flat=True)
+        )
+        blobs = Blob.objects.aggregate(size=Sum('size'))['size']
+        # A script id (32 characters) and a hash (64 characters) per link
+        links = Script.blobs.through.objects.count() * (32 + 64)
+        after = manifests + blobs + links
+
+        print(f"{scripts} scripts, {sum(map(len, dataset))} files, "
+              f"{Blob.objects.count()} distinct contents")
+        print(f"{'inline files (before)':<24} {inline / 1024 ** 2:9.2f} MiB")
+        print(f"{'manifests':<24} {manifests / 1024 ** 2:9.2f} MiB")
+        print(f"{'blobs':<24} {blobs / 1024 ** 2:9.2f} MiB")
+        print(f"{'links':<24} {links / 1024 ** 2:9.2f} MiB")
+        print(f"{'total (after)':<24} {after / 1024 ** 2:9.2f} MiB  "
+              f"({100 * (1 - after / inline):.1f} % saved)")
+    finally:
+        teardown()
+
+
+if __name__ == "__main__":
+    main()
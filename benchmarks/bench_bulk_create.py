@@ -0,0 +1,79 @@
+"""Compare creating scripts one by one and with the bulk endpoint.
+
+Each script has two files, two tags, an OS and a collaborator, as a library
+being migrated would.
+
+Usage: python benchmarks/bench_bulk_create.py [scripts]
+"""
+import json
+import sys
+import time
+
+from common import setup_database
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from workshop.api.models import OS, Script, Tag, User
+from workshop.api.views import ScriptViewSet
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    factory = APIRequestFactory()
+
+    def make_script(index: int) -> dict:
+        return {
+            "name": f"script{index}",
+            "language": "python",
+            "files": [{"name": "main.py",
+                       "content": f"# {index}\n" + "print('Hello!')\n" * 50},
+                      {"name": "lib.py", "content": "shared = True\n"}],
+            "tags": ["http://testserver/tags/tag0/",
+                     "http://testserver/tags/tag1/"],
+            "compatibility": ["http://testserver/os/os/"],
+            "collaborators": ["http://testserver/users/other/"],
+        }
+
+    def one_by_one(user, scripts):
+        view = ScriptViewSet.as_view({'post': 'create'})
+        for script in scripts:
+            request = factory.post("/scripts/", json.dumps(script),
+                                   content_type="application/json")
+            force_authenticate(request, user)
+            response = view(request)
+            assert response.status_code == 201, response.data
+
+    def bulk(user, scripts, batch_size=1000):
+        view = ScriptViewSet.as_view({'post': 'bulk'})
+        for start in range(0, len(scripts), batch_size):
+            batch = scripts[start:start + batch_size]
+            request = factory.post("/scripts/bulk/", json.dumps(batch),
+                                   content_type="application/json")
+            force_authenticate(request, user)
+            response = view(request)
+            assert response.status_code == 201, response.data
+
+    print(f"Creating {count} scripts")
+    for label, create in (("one POST per script (before)", one_by_one),
+                          ("bulk, 1000 per request (after)", bulk)):
+        teardown = setup_database()
+        try:
+            user = User.objects.create(username="author",
+                                       email="author@example.com")
+            User.objects.create(username="other", email="other@example.com")
+            Tag.objects.bulk_create([Tag(name="tag0"), Tag(name="tag1")])
+            OS.objects.create(name="os")
+            scripts = [make_script(index) for index in range(count)]
+
+            start = time.perf_counter()
+            create(user, scripts)
+            elapsed = time.perf_counter() - start
+            assert Script.objects.count() == count
+            print(f"{label:<32} {elapsed:8.2f} s  "
+                  f"{count / elapsed:8.0f} scripts/s")
+        finally:
+            teardown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Measure a burst of downloads of the archive of a popular script.
+
+The archive is built once per version of the files, so the downloads after
+the first one only serve the cached file. The burst is also sent by
+concurrent threads on a cold cache, to count the builds.
+
+Usage: python benchmarks/bench_bundles.py [downloads] [size of the script]
+"""
+import shutil
+import sys
+import tempfile
+import threading
+from unittest import mock
+
+from common import measure, print_row, setup_database
+
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory
+
+from workshop.api import bundles
+from workshop.api.models import Script, User
+from workshop.api.views import ScriptViewSet
+
+
+def main():
+    downloads = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 500 * 1024
+
+    teardown = setup_database()
+    directory = tempfile.mkdtemp()
+    try:
+        with override_settings(SCRIPT_BUNDLES_DIR=directory):
+            user = User.objects.create(username="author",
+                                       email="author@example.com")
+            line = "print('Hello world!')  # Some comment to pad the line\n"
+            script = Script.objects.create(
+                name="script", author=user, language="python",
+                files=[{"name": f"file{index}.py",
+                        "content": f"# {index}\n" + line * (size // 10
+                                                            // len(line))}
+                       for index in range(10)],
+            )
+
+            factory = APIRequestFactory()
+            view = ScriptViewSet.as_view({'get': 'bundle'},
+                                         **ScriptViewSet.bundle.kwargs)
+
+            def download():
+                request = factory.get(f"/scripts/{script.id}/bundle.zip")
+                response = view(request, pk=str(script.id), format='zip')
+                assert response.status_code == 200, response.status_code
+                return b"".join(response)
+
+            def uncached():
+                shutil.rmtree(directory, ignore_errors=True)
+                return download()
+
+            print(f"{downloads} downloads of the archive of a script of "
+                  f"{script.total_size} bytes")
+            print_row("build per download (before)",
+                      measure(lambda: [uncached() for _ in range(downloads)],
+                              3))
+            print_row("cached archive (after)",
+                      measure(lambda: [download() for _ in range(downloads)],
+                              3))
+
+            # Concurrent burst on a cold cache
+            shutil.rmtree(directory, ignore_errors=True)
+            build = mock.Mock(wraps=bundles.build_zip)
+            with mock.patch.dict(bundles.FORMATS, zip=build):
+                threads = [threading.Thread(target=download)
+                           for _ in range(min(downloads, 32))]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+            print(f"{len(threads)} concurrent downloads on a cold cache: "
+                  f"{build.call_count} build(s)")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+        teardown()
+
+
+if __name__ == "__main__":
+    main()
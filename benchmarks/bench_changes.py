@@ -0,0 +1,73 @@
+"""Compare syncing a mirror by crawling the catalog and with the change feed.
+
+A mirror is up to date with the catalog, then a few scripts change. Without
+the feed, it crawls every page of /scripts/ to find them (and can't see the
+deleted ones). With the feed, it reads the changes since its token, and
+fetches the changed scripts by id.
+
+Usage: python benchmarks/bench_changes.py [scripts] [changes]
+"""
+import sys
+
+from common import measure, print_row, seed_catalog, setup_database
+
+from django.core.cache import cache
+from django.test import Client
+
+from workshop.api.models import Script, ScriptChange
+
+
+def main():
+    scripts = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    changes = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    teardown = setup_database()
+    try:
+        seed_catalog(scripts, files_per_script=1, file_size=512)
+        # The log of the seeded catalog (as the migration records it)
+        ScriptChange.objects.bulk_create([
+            ScriptChange(script=script_id, action=ScriptChange.CREATED)
+            for script_id in Script.objects.filter(
+                is_public=True, is_unlisted=False
+            ).order_by('created').values_list('id', flat=True)
+        ])
+        client = Client()
+        token = client.get("/scripts/changes/",
+                           {'since': ScriptChange.objects.count() - 1}
+                           ).json()['next']
+
+        listed = Script.objects.filter(is_public=True, is_unlisted=False)
+        for script in listed.order_by('?')[:changes]:
+            script.name += " (edited)"
+            script.save()
+
+        def crawl():
+            cache.clear()
+            url, requests = "/scripts/", 0
+            while url:
+                data = client.get(url).json()
+                url, requests = data['next'], requests + 1
+            return requests
+
+        def sync():
+            data = client.get("/scripts/changes/",
+                              {'since': token}).json()
+            ids = [change['script'] for change in data['changes']]
+            for start in range(0, len(ids), 50):
+                client.get("/scripts/", {'ids': ",".join(
+                    ids[start:start + 50]
+                )})
+            return len(ids)
+
+        print(f"{changes} changed scripts in a catalog of "
+              f"{listed.count()} listed scripts")
+        print_row("crawl of /scripts/ (before)", measure(crawl, 3),
+                  f"{crawl()} requests")
+        print_row("change feed (after)", measure(sync, 10),
+                  f"{sync()} changes")
+    finally:
+        teardown()
+
+
+if __name__ == "__main__":
+    main()
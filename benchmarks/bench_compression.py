@@ -0,0 +1,119 @@
+"""Compare the storage and read latency of compressed file contents.
+
+The contents are pieces of the Python standard library, cut to the sizes of
+the scripts of the workshop (median around 2 KB). The stored size is the
+size of the blob columns, and the read latency is measured on the script
+detail (which decompresses all the files of the script) and on the raw file
+endpoint (which decompresses one file).
+
+Usage: python benchmarks/bench_compression.py [scripts]
+"""
+import random
+import sys
+import sysconfig
+import zlib
+from pathlib import Path
+
+from common import create_scripts, measure, print_row, setup_database
+
+from django.db.models import Sum
+from django.db.models.functions import Length
+from django.test.utils import override_settings
+from rest_framework.test import APIRequestFactory
+
+from workshop.api.compression import compress
+from workshop.api.models import Blob, Script, User
+from workshop.api.views import ScriptViewSet
+
+
+def make_corpus(count: int, seed: int = 0) -> list:
+    """Return pieces of Python source of realistic sizes."""
+    rng = random.Random(seed)
+    sources = [
+        path.read_text(encoding='utf-8', errors='ignore')
+        for path in sorted(Path(sysconfig.get_paths()['stdlib']).glob('*.py'))
+    ]
+    sources = [source for source in sources if len(source) > 4096]
+
+    corpus = []
+    for _ in range(count):
+        source = rng.choice(sources)
+        size = min(int(rng.lognormvariate(7.6, 1.0)), 60 * 1024, len(source))
+        start = rng.randrange(len(source) - size + 1)
+        corpus.append(source[start:start + size])
+    return corpus
+
+
+def print_sizes(corpus: list) -> None:
+    """Print the compressed size of the contents, by size of content."""
+    buckets = (("< 1 KB", 0, 1024), ("1-8 KB", 1024, 8192),
+               ("> 8 KB", 8192, float('inf')))
+    print(f"{'':<10} {'files':>6} {'plain':>10} {'zlib':>10} "
+          f"{'zlib-v1':>10}")
+    for label, low, high in buckets:
+        contents = [content.encode('utf-8') for content in corpus
+                    if low <= len(content) < high]
+        plain = sum(map(len, contents))
+        deflated = sum(len(zlib.compress(content, 9)) for content in contents)
+        preset = sum(len(compress(content.decode('utf-8')))
+                     for content in contents)
+        print(f"{label:<10} {len(contents):>6} {plain:>10} {deflated:>10} "
+              f"{preset:>10}  ({100 * (1 - preset / plain):.1f} % saved)")
+
+
+def main():
+    scripts = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    corpus = make_corpus(scripts * 4)
+    print(f"{scripts} scripts, 4 files each")
+    print_sizes(corpus)
+    print()
+
+    factory = APIRequestFactory()
+    detail = ScriptViewSet.as_view({'get': 'retrieve'})
+    file = ScriptViewSet.as_view({'get': 'file'})
+
+    for label, compression in (("plain (before)", False),
+                               ("zlib-v1 (after)", True)):
+        teardown = setup_database()
+        try:
+            with override_settings(SCRIPT_FILES_COMPRESSION=compression):
+                author = User.objects.create(username="author",
+                                             email="author@example.com")
+                batch = []
+                for index in range(scripts):
+                    script = Script(name=f"script{index}", author=author,
+                                    language="python")
+                    script.set_files([
+                        {"name": f"file{number}.py",
+                         "content": corpus[index * 4 + number]}
+                        for number in range(4)
+                    ])
+                    batch.append(script)
+                create_scripts(batch)
+
+            stored = Blob.objects.aggregate(
+                size=Sum(Length('content')) + Sum(Length('data'))
+            )['size']
+            print(f"{label}: {stored / Blob.objects.count():.0f} bytes "
+                  f"per blob row (contents)")
+
+            ids = list(Script.objects.values_list('id', flat=True)[:200])
+
+            def read_details():
+                for pk in ids:
+                    request = factory.get(f"/scripts/{pk}/?skip_view=1")
+                    detail(request, pk=str(pk)).render()
+
+            def read_files():
+                for pk in ids:
+                    request = factory.get(f"/scripts/{pk}/files/file0.py/")
+                    file(request, pk=str(pk), file_name="file0.py").render()
+
+            print_row("  200 script details", measure(read_details, 5))
+            print_row("  200 raw files", measure(read_files, 5))
+        finally:
+            teardown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Compare dumping the catalog through the paginated API and the export.
+
+The paginated dump follows every page of /scripts/ and then retrieves each
+script for its files. The export streams all the scripts with their files
+in one response. The peak memory of the export is measured for two sizes of
+catalog, to check that it doesn't grow with the catalog.
+
+Usage: python benchmarks/bench_export.py [scripts]
+"""
+import sys
+import time
+import tracemalloc
+
+from common import seed_catalog, setup_database
+
+from django.core.cache import cache
+from django.test import Client
+
+
+def main():
+    scripts = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    client = Client()
+
+    def paginated():
+        cache.clear()
+        url, count = "/scripts/", 0
+        while url:
+            data = client.get(url).json()
+            for script in data['results']:
+                client.get(script['url'] + "?skip_view=1")
+                count += 1
+            url = data['next']
+        return count
+
+    def export():
+        response = client.get("/scripts/export/")
+        return sum(1 for line in b"".join(
+            response.streaming_content).splitlines())
+
+    def export_peak() -> tuple:
+        tracemalloc.start()
+        response = client.get("/scripts/export/")
+        count = 0
+        for chunk in response.streaming_content:
+            count += chunk.count(b"\n")
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        return count, peak
+
+    for size in (scripts // 4, scripts):
+        teardown = setup_database()
+        try:
+            seed_catalog(size, files_per_script=2, file_size=2 * 1024)
+            print(f"Catalog of {size} scripts")
+            for label, dump in (("paginated API (before)", paginated),
+                                ("streaming export (after)", export)):
+                start = time.perf_counter()
+                count = dump()
+                elapsed = time.perf_counter() - start
+                print(f"  {label:<30} {elapsed:8.2f} s  {count} scripts")
+            count, peak = export_peak()
+            print(f"  {'export peak memory':<30} {peak / 1024 / 1024:8.1f} MB"
+                  f"  {count} scripts")
+        finally:
+            teardown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Compare saving a one-line edit with the whole files and with operations.
+
+The script has a large file (close to the 1 MiB limit) and a small one, and
+the small one is edited, as an editor autosaving would.
+
+Usage: python benchmarks/bench_file_patch.py [size of the large file]
+"""
+import json
+import sys
+
+from common import measure, print_row, setup_database
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from workshop.api.models import Script, User
+from workshop.api.views import ScriptViewSet
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 900 * 1024
+
+    teardown = setup_database()
+    try:
+        user = User.objects.create(username="author",
+                                   email="author@example.com")
+        line = "print('Hello world!')  # Some comment to pad the line\n"
+        files = [{"name": "main.py", "content": "import lib\nlib.run()\n"},
+                 {"name": "lib.py", "content": (line * (size // len(line)))}]
+        script = Script.objects.create(name="script", author=user,
+                                       language="python", files=files)
+
+        factory = APIRequestFactory()
+        view = ScriptViewSet.as_view({'patch': 'partial_update'})
+
+        def send(body: dict, **headers):
+            request = factory.patch(f"/scripts/{script.id}/",
+                                    json.dumps(body),
+                                    content_type="application/json",
+                                    **headers)
+            force_authenticate(request, user)
+            response = view(request, pk=str(script.id))
+            response.render()
+            assert response.status_code in (200, 204), response.data
+            return response
+
+        counter = iter(range(10 ** 6))
+
+        def full() -> tuple:
+            files[0]['content'] = f"# Edit {next(counter)}\nimport lib\n"
+            return {"files": files}, {}
+
+        def operations() -> tuple:
+            return {"file_operations": [
+                {"op": "replace_range", "name": "main.py", "start": 0,
+                 "end": 0, "text": f"# Edit {next(counter)}\n"},
+            ]}, {"HTTP_PREFER": "return=minimal"}
+
+        print(f"One-line edit of a script of {size} bytes")
+        for label, edit in (("whole files (before)", full),
+                            ("operations (after)", operations)):
+            def save():
+                body, headers = edit()
+                return len(json.dumps(body)), send(body, **headers)
+
+            request_size, response = save()
+            print_row(label, measure(save, 20),
+                      f"request {request_size} bytes, "
+                      f"response {len(response.content)} bytes")
+    finally:
+        teardown()
+
+
+if __name__ == "__main__":
+    main()
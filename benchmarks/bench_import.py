@@ -0,0 +1,81 @@
+"""Compare loading a catalog dump script by script and with import_catalog.
+
+The dump is NDJSON, as written by export_catalog: each script has two files,
+two tags, an OS and a collaborator. The import is measured with the
+validation done inline and in worker processes.
+
+Usage: python benchmarks/bench_import.py [scripts]
+"""
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+from common import setup_database
+
+from django.core.management import call_command
+
+from workshop.api.models import OS, Script, Tag, User
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    lines = [json.dumps({
+        "name": f"script{index}", "author": "author", "language": "python",
+        "files": [{"name": "main.py",
+                   "content": f"# {index}\n" + "print('Hello!')\n" * 50},
+                  {"name": "lib.py", "content": "shared = True\n"}],
+        "tags": ["tag0", "tag1"], "compatibility": ["os"],
+        "collaborators": ["other"],
+    }) for index in range(count)]
+    descriptor, path = tempfile.mkstemp(suffix=".ndjson")
+    with os.fdopen(descriptor, 'w') as file:
+        file.write("\n".join(lines) + "\n")
+
+    def one_by_one():
+        author = User.objects.create_user("author")
+        other = User.objects.create_user("other")
+        tags = [Tag.objects.create(name=name) for name in ("tag0", "tag1")]
+        os_ = OS.objects.create(name="os")
+        for line in lines:
+            data = json.loads(line)
+            script = Script.objects.create(
+                name=data['name'], author=author, language=data['language'],
+                files=data['files']
+            )
+            script.tags.set(tags)
+            script.compatibility.set([os_])
+            script.collaborators.set([other])
+
+    def import_catalog(workers):
+        def run():
+            call_command('import_catalog', path, workers=workers,
+                         stdout=io.StringIO(), stderr=io.StringIO())
+        return run
+
+    print(f"Loading {count} scripts")
+    try:
+        for label, load in (
+            ("one save per script (before)", one_by_one),
+            ("import_catalog, inline", import_catalog(0)),
+            (f"import_catalog, {os.cpu_count()} workers",
+             import_catalog(os.cpu_count())),
+        ):
+            teardown = setup_database()
+            try:
+                start = time.perf_counter()
+                load()
+                elapsed = time.perf_counter() - start
+                assert Script.objects.count() == count
+                print(f"  {label:<34} {elapsed:8.2f} s  "
+                      f"{count / elapsed:8.0f} scripts/s")
+            finally:
+                teardown()
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
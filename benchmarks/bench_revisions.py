@@ -0,0 +1,71 @@
+"""Measure the storage of the revision history of a frequently saved script.
+
+A script with a large file and a small one is saved many times with a
+one-line edit of the small file, as an editor autosaving would. The history
+is compared with storing every version of the files, and the time to
+rebuild the latest and the slowest revisions is measured.
+
+Usage: python benchmarks/bench_revisions.py [saves] [size of the large file]
+"""
+import io
+import json
+import sys
+
+from common import measure, print_row, setup_database
+
+from django.core.management import call_command
+from django.db.models import Sum
+
+from workshop.api.models import Blob, Script, ScriptRevision, User
+
+
+def main():
+    saves = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    size = int(sys.argv[2]) if len(sys.argv) > 2 else 200 * 1024
+
+    teardown = setup_database()
+    try:
+        user = User.objects.create(username="author",
+                                   email="author@example.com")
+        line = "print('Hello world!')  # Some comment to pad the line\n"
+        script = Script.objects.create(
+            name="script", author=user, language="python",
+            files=[{"name": "main.py", "content": "import lib\nlib.run()\n"},
+                   {"name": "lib.py", "content": line * (size // len(line))}],
+        )
+
+        for number in range(saves):
+            script.edit_files([
+                {"op": "replace_range", "name": "main.py", "start": 0,
+                 "end": 0, "text": f"# Edit {number}\n"},
+            ])
+            script.save()
+        call_command('collect_blobs', stdout=io.StringIO())
+
+        revisions = ScriptRevision.objects.filter(script=script)
+        checkpoints = [revision for revision in revisions
+                       if revision.is_checkpoint]
+        blobs = Blob.objects.filter(revisions__isnull=False).distinct()
+        history = blobs.aggregate(size=Sum('size'))['size'] + sum(
+            len(json.dumps(revision.deltas))
+            + len(json.dumps(revision.files)) for revision in revisions
+        )
+        print(f"{saves} one-line saves of a script of {script.total_size} "
+              f"bytes ({len(checkpoints)} checkpoint(s))")
+        print(f"  every version stored: {saves * script.total_size} bytes")
+        print(f"  revision history:     {history} bytes")
+
+        latest = revisions.latest('number')
+        longest = max(revisions, key=lambda revision:
+                      revision.number - revision.checkpoint)
+        print_row("rebuild the latest revision",
+                  measure(latest.get_files, 20))
+        print_row(f"rebuild revision {longest.number} "
+                  f"({longest.number - longest.checkpoint} deltas)",
+                  measure(longest.get_files, 20))
+    finally:
+        teardown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Compare the /scripts/ list with and without the summary representation.
+
+Usage: python benchmarks/bench_script_list.py [scripts] [file size in bytes]
+"""
+import sys
+
+from common import measure, print_row, seed_catalog, setup_database
+
+from rest_framework.test import APIRequestFactory
+
+from workshop.api.serializers import ScriptSerializer
+from workshop.api.views import ScriptViewSet
+
+
+class FullScriptViewSet(ScriptViewSet):
+    """The /scripts/ list as it was before the summary representation."""
+
+    def get_serializer_class(self):
+        return ScriptSerializer
+
+    def get_queryset(self):
+        # The contents of the files were stored in the scripts
+        return self.get_visible_queryset().prefetch_related('blobs')
+
+
+def main():
+    scripts = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    file_size = int(sys.argv[2]) if len(sys.argv) > 2 else 20 * 1024
+
+    teardown = setup_database()
+    try:
+        seed_catalog(scripts, file_size=file_size)
+        factory = APIRequestFactory()
+
+        print(f"{scripts} scripts, 3 files of {file_size} bytes each")
+        for label, viewset in (("full (before)", FullScriptViewSet),
+                               ("summary (after)", ScriptViewSet)):
+            view = viewset.as_view({'get': 'list'})
+
+            def list_scripts():
+                response = view(factory.get("/scripts/"))
+                response.render()
+                return response
+
+            size = len(list_scripts().content)
+            print_row(label, measure(list_scripts), f"{size} bytes")
+    finally:
+        teardown()
+
+
+if __name__ == "__main__":
+    main()
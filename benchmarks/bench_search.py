@@ -0,0 +1,120 @@
+"""Compare the search of the scripts with LIKE scans and with the index.
+
+The catalog has scripts whose names, descriptions and files are made of
+words of a vocabulary, used with a Zipf distribution (a few words are in
+most scripts, most words in a few). The search before (DRF's SearchFilter
+on the previous search_fields, with LIKE '%term%' on the contents of the
+files joined through the blobs) is compared with the search index, for a
+common word, a rare word, two words and a missing word. Each search counts
+the results and reads the first page, as the list does.
+
+Usage: python benchmarks/bench_search.py [scripts]
+"""
+import itertools
+import random
+import sys
+import time
+from types import SimpleNamespace
+
+from common import measure, print_row, setup_database
+
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory
+from rest_framework.filters import SearchFilter
+from rest_framework.request import Request
+
+from workshop.api.filters import ScriptSearchFilter
+from workshop.api.models import BlobToken, Script, ScriptToken, User
+
+# The search fields of the scripts before the index
+LIKE_SEARCH_FIELDS = (
+    'name', 'short_description', 'long_description', 'blobs__content',
+    '^licence', 'version', 'language', 'author__username',
+    'compatibility__name', 'tags__name', 'id'
+)
+
+
+def make_vocabulary(size: int, rng: random.Random) -> list:
+    """Return distinct words made of syllables."""
+    syllables = [consonant + vowel for consonant in "bcdfghklmnprstvz"
+                 for vowel in "aeiou"]
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choices(syllables, k=rng.randint(2, 4))))
+    return sorted(words)
+
+
+def seed(scripts: int, batch_size: int = 1000) -> list:
+    """Create the scripts, and return the vocabulary by frequency."""
+    rng = random.Random(0)
+    vocabulary = make_vocabulary(20000, rng)
+    cum_weights = list(itertools.accumulate(
+        1 / rank for rank in range(1, len(vocabulary) + 1)
+    ))
+    authors = User.objects.bulk_create([
+        User(username=f"user{index}") for index in range(100)
+    ])
+
+    def words(count: int) -> list:
+        return rng.choices(vocabulary, cum_weights=cum_weights, k=count)
+
+    for start in range(0, scripts, batch_size):
+        batch = []
+        for index in range(start, min(start + batch_size, scripts)):
+            script = Script(
+                name=" ".join(words(3)), author=authors[index % 100],
+                language="python", short_description=" ".join(words(8)),
+                long_description=" ".join(words(40)),
+            )
+            lines = [f"{a}_{b} = {c}({d})" for a, b, c, d in
+                     zip(*[iter(words(160))] * 4)]
+            script.set_files([{"name": "main.py",
+                               "content": "\n".join(lines)}])
+            batch.append(script)
+        Script.objects.create_in_bulk(batch, [{} for _ in batch])
+    return vocabulary
+
+
+def main():
+    scripts = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    factory = RequestFactory()
+    teardown = setup_database()
+    try:
+        start = time.perf_counter()
+        vocabulary = seed(scripts)
+        print(f"{scripts} scripts created and indexed in "
+              f"{time.perf_counter() - start:.0f} s "
+              f"({ScriptToken.objects.count()} script tokens, "
+              f"{BlobToken.objects.count()} file tokens)")
+
+        searches = {
+            "common word": vocabulary[0],
+            "rare word": vocabulary[5000],
+            "two words": f"{vocabulary[3]} {vocabulary[40]}",
+            "missing word": "zzzz",
+        }
+        for label, terms in searches.items():
+            request = Request(factory.get("/scripts/", {'search': terms}))
+            request.user = AnonymousUser()
+            queryset = Script.objects.visible_to(request.user)
+            print(f"Search for the {label} ({terms!r})")
+            for name, backend, view in (
+                ("LIKE scans (before)", SearchFilter(),
+                 SimpleNamespace(search_fields=LIKE_SEARCH_FIELDS)),
+                ("search index (after)", ScriptSearchFilter(),
+                 SimpleNamespace()),
+            ):
+                results = backend.filter_queryset(request, queryset, view)
+
+                def search():
+                    results.count()
+                    list(results.order_by('-created')[:50])
+
+                print_row(f"  {name}", measure(search, repeat=3),
+                          f"{results.count()} scripts")
+    finally:
+        teardown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""Compare the insert throughput of random (v4) and time-ordered (v7) keys.
+
+Each kind of key is benchmarked on a fresh database, with a table already
+containing some scripts, to measure the cost of inserting into a large
+primary key index.
+
+Usage: python benchmarks/bench_uuid_inserts.py [existing scripts] [inserts]
+"""
+import sys
+import time
+import uuid
+
+from common import setup_database
+
+from django.db import transaction
+
+from workshop.api.models import Blob, Script, User, uuid7
+
+BLOB = Blob.from_content("print('Hello world!')")
+FILES = [{"name": "main.py", "hash": BLOB.hash, "size": BLOB.size}]
+
+
+def insert_scripts(author, count: int, generate_id, batch_size: int = 100):
+    """Insert scripts in transactions of batch_size scripts."""
+    for start in range(0, count, batch_size):
+        with transaction.atomic():
+            Script.objects.bulk_create([
+                Script(id=generate_id(), name=f"script{index}", author=author,
+                       language="python", files=FILES, file_count=1,
+                       total_size=50)
+                for index in range(start, min(start + batch_size, count))
+            ])
+
+
+def main():
+    existing = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    inserts = int(sys.argv[2]) if len(sys.argv) > 2 else 50000
+
+    print(f"{inserts} inserts into a table of {existing} scripts")
+    for label, generate_id in (("uuid4 (before)", uuid.uuid4),
+                               ("uuid7 (after)", uuid7)):
+        teardown = setup_database()
+        try:
+            author = User.objects.create(username="author",
+                                         email="author@example.com")
+            Blob.objects.store([BLOB])
+            insert_scripts(author, existing, generate_id, batch_size=1000)
+
+            start = time.perf_counter()
+            insert_scripts(author, inserts, generate_id)
+            duration = time.perf_counter() - start
+            print(f"{label:<16} {duration:8.2f} s  "
+                  f"{inserts / duration:10.0f} inserts/s")
+        finally:
+            teardown()
+
+
+if __name__ == "__main__":
+    main()
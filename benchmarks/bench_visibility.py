@@ -0,0 +1,65 @@
+"""Compare the old and new script visibility queries.
+
+The old query ORs three querysets and removes the duplicates with DISTINCT,
+the new one is a single predicate using EXISTS for the collaborators.
+
+Usage: python benchmarks/bench_visibility.py [scripts]
+
+The default catalog has 100,000 scripts; pass 1000000 to benchmark at 1M
+scripts (seeding takes a few minutes).
+"""
+import sys
+
+from common import measure, print_row, seed_catalog, setup_database
+
+from django.contrib.auth.models import AnonymousUser
+
+from workshop.api.models import Script, User
+
+
+def legacy_visible_scripts(user):
+    """Return the visible scripts, the way ScriptViewSet used to do it."""
+    queryset = Script.objects.filter(is_public=True, is_unlisted=False)
+    if user.is_authenticated:
+        queryset = queryset | Script.objects.filter(author=user)
+        queryset = queryset | Script.objects.filter(collaborators=user)
+    return queryset.distinct()
+
+
+def first_page(queryset):
+    """Run the queries of the first page of /scripts/."""
+    queryset = queryset.order_by('-created')
+    queryset.count()
+    list(queryset[:50])
+
+
+def main():
+    scripts = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+
+    teardown = setup_database()
+    try:
+        seed_catalog(scripts, files_per_script=1, file_size=256, users=100)
+
+        # Add collaborators to a tenth of the scripts
+        through = Script.collaborators.through
+        users = list(User.objects.all())
+        ids = Script.objects.values_list('id', flat=True)[::10]
+        through.objects.bulk_create([
+            through(script_id=script_id, user=users[index % len(users)])
+            for index, script_id in enumerate(ids)
+        ], batch_size=1000)
+
+        print(f"{scripts} scripts")
+        for label, user in (("anonymous", AnonymousUser()),
+                             ("authenticated", users[1])):
+            print_row(f"{label} (before)", measure(
+                lambda: first_page(legacy_visible_scripts(user)), repeat=5))
+            print_row(f"{label} (after)", measure(
+                lambda: first_page(Script.objects.visible_to(user)),
+                repeat=5))
+    finally:
+        teardown()
+
+
+if __name__ == "__main__":
+    main()
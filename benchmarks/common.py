@@ -0,0 +1,108 @@
+"""Helpers shared by the benchmarks.
+
+The benchmarks run against a throwaway test database (an in-memory SQLite
+database by default, or `test_<name>` on MySQL when DEPLOY=1), so they never
+touch the real data.
+"""
+import os
+import sys
+import time
+import statistics
+from pathlib import Path
+
+# Make the project importable when running `python benchmarks/<name>.py`
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "workshop.settings")
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment, \
+    teardown_test_environment  # noqa: E402
+
+
+def setup_database():
+    """Create the test database and return a function to destroy it."""
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+
+    def teardown():
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+    return teardown
+
+
+def measure(function, repeat: int = 10) -> dict:
+    """Call a function several times and return timing statistics (ms)."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "max": max(timings),
+    }
+
+
+def print_row(label: str, timings: dict, extra: str = "") -> None:
+    """Print a line of benchmark results."""
+    print(f"{label:<32} min {timings['min']:9.2f} ms  "
+          f"median {timings['median']:9.2f} ms  "
+          f"max {timings['max']:9.2f} ms  {extra}")
+
+
+def create_scripts(scripts: list) -> None:
+    """Save scripts (with their files set) and their blobs in bulk."""
+    from workshop.api.models import Blob, Script
+
+    blobs = [blob for script in scripts for blob in script._new_blobs]
+    Blob.objects.store(blobs)
+    Script.objects.bulk_create(scripts)
+    Script.blobs.through.objects.bulk_create([
+        Script.blobs.through(script_id=script.id, blob_id=digest)
+        for script in scripts
+        for digest in {file['hash'] for file in script.files}
+    ], ignore_conflicts=True)
+
+
+def seed_catalog(scripts: int, files_per_script: int = 3,
+                 file_size: int = 20 * 1024, users: int = 10,
+                 batch_size: int = 500) -> None:
+    """Fill the database with users and public scripts."""
+    from workshop.api.models import Script, User
+
+    authors = User.objects.bulk_create([
+        User(username=f"user{index}", email=f"user{index}@example.com")
+        for index in range(users)
+    ])
+
+    line = "print('Hello world!')  # Some comment to pad the line\n"
+    content = (line * (file_size // len(line) + 1))[:file_size]
+
+    batch = []
+    for index in range(scripts):
+        script = Script(
+            name=f"script{index}",
+            author=authors[index % users],
+            language="python",
+            short_description="A benchmark script",
+            long_description="A long description. " * 50,
+            is_public=index % 10 != 0,
+            is_unlisted=index % 20 == 1,
+        )
+        # Each script has its own content, as they would in practice
+        script.set_files([
+            {"name": f"file{number}.py", "content": f"# {index}\n{content}"}
+            for number in range(files_per_script)
+        ])
+        batch.append(script)
+        if len(batch) == batch_size:
+            create_scripts(batch)
+            batch = []
+    create_scripts(batch)
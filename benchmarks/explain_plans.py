@@ -0,0 +1,99 @@
+"""Print the query plans of the hot queries, before and after the indexes.
+
+The plans are printed as Markdown for the database in use (SQLite by
+default, MySQL when DEPLOY=1), and are checked in as explain_plans.md.
+
+Usage: python benchmarks/explain_plans.py [scripts]
+"""
+import importlib
+import sys
+
+from common import seed_catalog, setup_database
+
+from django.apps import apps
+from django.contrib.auth.models import AnonymousUser
+from django.db import connection
+
+from workshop.api.models import Script, Rating, User
+
+# The migration adding the indexes
+INDEXES = importlib.import_module('workshop.migrations.0013_listing_indexes')
+
+
+def get_queries() -> dict:
+    """Return the querysets of the hot paths."""
+    user = User.objects.get(username="user1")
+    script = Script.objects.first()
+    return {
+        "Script list (anonymous)":
+            Script.objects.visible_to(AnonymousUser()).order_by('-created')
+            .defer('files', 'long_description')[:50],
+        "Script list (authenticated)":
+            Script.objects.visible_to(user).order_by('-created')
+            .defer('files', 'long_description')[:50],
+        "Script list (cursor page, anonymous)":
+            Script.objects.visible_to(AnonymousUser())
+            .filter(created__lt=script.created).order_by('-created', 'id')
+            .defer('files', 'long_description')[:51],
+        "Script list (admin)":
+            Script.objects.order_by('-created')
+            .defer('files', 'long_description')[:50],
+        "Rating list":
+            Rating.objects.order_by('-created')[:50],
+        "Rating list (filtered on the script name)":
+            Rating.objects.filter(script__name="script1")
+            .order_by('-created')[:50],
+        "Ratings of a script":
+            Rating.objects.filter(script=script).order_by('-created'),
+        "User list":
+            User.objects.order_by('-date_joined', 'username')[:50],
+    }
+
+
+def print_plans(title: str) -> None:
+    """Print the plans of the hot queries."""
+    with connection.cursor() as cursor:
+        cursor.execute("ANALYZE")
+    print(f"### {title}\n")
+    for name, queryset in get_queries().items():
+        print(f"#### {name}\n")
+        print("```")
+        print(queryset.explain())
+        print("```\n")
+
+
+def set_indexes(add: bool) -> None:
+    """Add or remove the indexes of the migration."""
+    with connection.schema_editor() as editor:
+        for operation in INDEXES.Migration.operations:
+            model = apps.get_model('workshop', operation.model_name)
+            if add:
+                editor.add_index(model, operation.index)
+            else:
+                editor.remove_index(model, operation.index)
+
+
+def main():
+    scripts = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+
+    teardown = setup_database()
+    try:
+        seed_catalog(scripts, files_per_script=1, file_size=256, users=100)
+        users = list(User.objects.all())
+        Rating.objects.bulk_create([
+            Rating(rating=index % 6, user=users[index % len(users)],
+                   script=script)
+            for index, script in enumerate(Script.objects.all()[:5000])
+        ])
+
+        print(f"## {connection.vendor} ({scripts} scripts)\n")
+        set_indexes(add=False)
+        print_plans("Before")
+        set_indexes(add=True)
+        print_plans("After")
+    finally:
+        teardown()
+
+
+if __name__ == "__main__":
+    main()
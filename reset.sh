@@ -4,11 +4,10 @@
 rm -rf db.sqlite3
 python manage.py migrate
 
-# Create a superuser (username: admin, password: password, email: admin@example.org)
-echo "from workshop.api.models import User; User.objects.create_superuser(username='admin', password='password', email='admin@example.org')" | python manage.py shell
-
-# Create a user (username: user, password: password, email: user@example.org)
-echo "from workshop.api.models import User; User.objects.create_user(username='user', password='password', email='user@example.org')" | python manage.py shell
-
-# Create a user (username: user2, password: password, email: user2@example.org)
-echo "from workshop.api.models import User; User.objects.create_user(username='user2', password='password', email='user2@example.org')" | python manage.py shell
+# Create a superuser (username: admin) and two users (username: user and
+# user2), with the password "password" and the email <username>@example.org
+python manage.py import_catalog - --workers 0 <<'USERS'
+{"username": "admin", "password": "password", "email": "admin@example.org", "is_staff": true, "is_superuser": true}
+{"username": "user", "password": "password", "email": "user@example.org"}
+{"username": "user2", "password": "password", "email": "user2@example.org"}
+USERS
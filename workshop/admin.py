@@ -2,6 +2,10 @@ from django.contrib import admin
 
 from workshop.api.models import Script, Rating, OS, Tag, User
 
+# The contents of the files are searched with the search index
+from workshop.api.filters import ScriptSearchFilter
+from workshop.api.search import tokenize
+
 # We need to import UserAdmin after importing User, otherwise we get an error
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 
@@ -15,9 +19,24 @@ class ScriptAdmin(admin.ModelAdmin):
 
     list_display = ('name', 'author', 'created', 'modified', 'is_public', 'is_unlisted', 'views')
     list_filter = ('created', 'modified', 'is_public', 'is_unlisted', 'language', 'compatibility', 'author')
-    search_fields = ('name', 'long_description', 'short_description', 'files', 'licence', 'version', 'language', 'author__username', 'compatibility__name', 'tags__name', 'id')
+    search_fields = ('name', 'long_description', 'short_description', 'licence', 'version', 'language', 'author__username', 'compatibility__name', 'tags__name', 'id')
     ordering = ('-created',)
 
+    def get_search_results(self, request, queryset, search_term):
+        """Search the fields, or the words of the scripts and their files.
+
+        The contents of the files are stored as blobs, which can be
+        compressed, so they are searched with the search index (see
+        search.py) instead of their column.
+        """
+        results, may_have_duplicates = super().get_search_results(
+            request, queryset, search_term
+        )
+        tokens = tokenize(search_term)
+        if tokens:
+            results |= ScriptSearchFilter().filter_tokens(queryset, tokens)
+        return results, may_have_duplicates
+
 
 @admin.register(Rating)
 class RatingAdmin(admin.ModelAdmin):
@@ -0,0 +1,120 @@
+"""Archives (zip or tar) of the files of the scripts, cached on disk.
+
+An archive only depends on the names and contents of the files, so it is
+cached under a hash of the manifest of the script (see Script.files): each
+version of a script is built once, and then served from the disk by the
+server (with sendfile when it supports it). Archives are built
+deterministically (fixed dates, permissions and order), so the hash also
+identifies the bytes of the archive.
+
+When several requests need the same archive at once, the first one builds it
+and the others wait for it, so a burst of downloads costs one build.
+"""
+import hashlib
+import io
+import json
+import os
+import tarfile
+import tempfile
+import time
+import zipfile
+from pathlib import Path
+
+from django.conf import settings
+
+# Number of seconds to wait for an archive built by another request, after
+# which the build is considered failed
+BUILD_TIMEOUT = 30
+
+# The date of the files in the archives (the earliest date of zip files)
+FILE_DATE = (1980, 1, 1, 0, 0, 0)
+
+
+def build_zip(output, files: list, contents: dict) -> None:
+    """Write the zip archive of files to a binary file."""
+    with zipfile.ZipFile(output, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for file in files:
+            info = zipfile.ZipInfo(file['name'], date_time=FILE_DATE)
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info.external_attr = 0o644 << 16
+            archive.writestr(info, contents[file['hash']].encode('utf-8'))
+
+
+def build_tar(output, files: list, contents: dict) -> None:
+    """Write the tar archive of files to a binary file."""
+    with tarfile.open(fileobj=output, mode='w') as archive:
+        for file in files:
+            data = contents[file['hash']].encode('utf-8')
+            info = tarfile.TarInfo(file['name'])
+            info.size = len(data)
+            info.mode = 0o644
+            info.mtime = 0
+            archive.addfile(info, io.BytesIO(data))
+
+
+# The builders of each format
+FORMATS = {
+    'zip': build_zip,
+    'tar': build_tar,
+}
+
+
+def get_bundle_key(files: list, archive_format: str) -> str:
+    """Return the key of the archive of files (a manifest) in a format."""
+    return hashlib.sha256(json.dumps([
+        archive_format, [[file['name'], file['hash']] for file in files]
+    ]).encode()).hexdigest()
+
+
+def get_bundle(files: list, archive_format: str, load_contents) -> Path:
+    """Return the path of the archive of files, building it if needed.
+
+    files is the manifest of the files, and load_contents(hashes) returns
+    the contents of their blobs by hash.
+    """
+    directory = Path(settings.SCRIPT_BUNDLES_DIR)
+    path = directory / f"{get_bundle_key(files, archive_format)}" \
+                       f".{archive_format}"
+    if path.exists():
+        return path
+
+    # The archive is written to a temporary file of its own, and moved once
+    # complete, so concurrent builds never write to the same file. The lock
+    # file only tells the other requests that the archive is being built,
+    # and is only removed by the request that created it
+    directory.mkdir(parents=True, exist_ok=True)
+    lock = path.with_name(path.name + '.building')
+    try:
+        os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+        locked = True
+    except FileExistsError:
+        locked = False
+        # Wait for the other build (unless it was interrupted long ago)
+        try:
+            deadline = lock.stat().st_mtime + BUILD_TIMEOUT
+        except FileNotFoundError:
+            deadline = 0
+        while lock.exists() and time.time() < deadline:
+            time.sleep(0.05)
+        if path.exists():
+            return path
+        # The other build failed or is too slow: build the archive separately
+
+    try:
+        descriptor, building = tempfile.mkstemp(dir=directory,
+                                                prefix=path.name + '.',
+                                                suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as output:
+                FORMATS[archive_format](
+                    output, files,
+                    load_contents(file['hash'] for file in files)
+                )
+            os.replace(building, path)
+        except BaseException:
+            Path(building).unlink(missing_ok=True)
+            raise
+    finally:
+        if locked:
+            lock.unlink(missing_ok=True)
+    return path
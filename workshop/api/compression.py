@@ -0,0 +1,59 @@
+"""Compression of the contents of the script files.
+
+The contents are compressed with zlib and a preset dictionary of the
+strings that are common in the scripts of the workshop (Python and Xcas
+source, and the modules of the calculator). Small files, which zlib alone
+barely compresses, benefit the most from it.
+
+A dictionary can't be changed once contents were compressed with it: a new
+dictionary needs a new codec, and the old codecs must stay readable.
+"""
+import zlib
+
+# The dictionary of the zlib-v1 codec. zlib looks for matches from the end
+# of the dictionary first, so the most common strings are at the end
+DICTIONARY_V1 = (
+    # Xcas
+    "local ;\nreturn ;\nfsolve(\nsolve(\nsimplify(\nfactor(\nexpand(\n"
+    "seq(\nsum(\nplot(\nplotfunc(\nsi alors sinon fsi;\npour de jusque faire "
+    "fpour;\ntantque faire ftantque;\nfonction ffonction\n:=\n"
+    # Calculator modules
+    "from kandinsky import *\nfrom ion import *\nfrom time import *\n"
+    "from math import *\nfrom random import *\nimport kandinsky\nimport ion\n"
+    "fill_rect(\ndraw_string(\nset_pixel(\nget_pixel(\ncolor(\n"
+    "keydown(KEY_OK)\nkeydown(KEY_EXE)\nkeydown(KEY_BACK)\n"
+    "keydown(KEY_LEFT)\nkeydown(KEY_RIGHT)\nkeydown(KEY_UP)\n"
+    "keydown(KEY_DOWN)\nsleep(\nmonotonic()\nrandint(\nrandom()\nchoice(\n"
+    "(255, 255, 255)\n(0, 0, 0)\n320, 222\n"
+    # Python
+    "import \nfrom \nclass \n    def __init__(self, \nself.\n"
+    "    except \n    try:\n    else:\n    elif \n    while True:\n"
+    "        break\n        continue\n    pass\n"
+    "isinstance(\nappend(\nstr(\nint(\nfloat(\nlen(\nabs(\nmin(\nmax(\n"
+    "round(\ninput(\nformat(\n.join(\n.split(\nlambda \nNone\nFalse\nTrue\n"
+    " not \n and \n or \n is \n == \n != \n <= \n >= \n += 1\n -= 1\n"
+    "    return \n        return \n    for i in range(\n"
+    "        for j in range(\n    if \n        if \nprint(\"\nprint(\n"
+    "def \n\n\ndef \n"
+).encode('utf-8')
+
+# The codecs, by name (an empty name for uncompressed contents)
+CODECS = {
+    'zlib-v1': DICTIONARY_V1,
+}
+
+# The codec of the contents compressed from now on
+DEFAULT_CODEC = 'zlib-v1'
+
+
+def compress(content: str, codec: str = DEFAULT_CODEC) -> bytes:
+    """Compress a content with a codec."""
+    compressor = zlib.compressobj(level=9, zdict=CODECS[codec])
+    return compressor.compress(content.encode('utf-8')) + compressor.flush()
+
+
+def decompress(data: bytes, codec: str) -> str:
+    """Decompress a content compressed with a codec."""
+    decompressor = zlib.decompressobj(zdict=CODECS[codec])
+    return (decompressor.decompress(bytes(data))
+            + decompressor.flush()).decode('utf-8')
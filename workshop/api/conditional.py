@@ -0,0 +1,145 @@
+"""Conditional requests (ETag and Last-Modified) for Upsilon Workshop."""
+import hashlib
+import re
+from datetime import datetime
+
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+# A single byte range ("bytes=0-99", "bytes=100-" or "bytes=-100")
+BYTE_RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeNotSatisfiable(Exception):
+    """The requested byte range is outside of the content."""
+
+
+def make_etag(*parts) -> str:
+    """Return a strong ETag identifying the given parts."""
+    digest = hashlib.sha256(
+        "\0".join(str(part) for part in parts).encode()
+    ).hexdigest()
+    return quote_etag(digest[:40])
+
+
+def is_conditional(request) -> bool:
+    """Return whether a request has conditional headers."""
+    return any(header in request.META for header in (
+        'HTTP_IF_MATCH', 'HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE',
+        'HTTP_IF_UNMODIFIED_SINCE'
+    ))
+
+
+def set_validators(response, etag: str = None,
+                   last_modified: datetime = None) -> None:
+    """Set the ETag and Last-Modified headers of a response."""
+    if etag is not None:
+        response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+
+
+def get_not_modified_response(request, etag: str = None,
+                              last_modified: datetime = None):
+    """Answer the conditional headers of a request.
+
+    Return a 304 Not Modified (or 412 Precondition Failed) response when the
+    request headers allow it, and None when the full response has to be
+    built.
+    """
+    validators = HttpResponse()
+    set_validators(validators, etag, last_modified)
+    response = get_conditional_response(
+        request,
+        etag=etag,
+        last_modified=last_modified and int(last_modified.timestamp()),
+        response=validators
+    )
+    if response is validators:
+        return None
+    return response
+
+
+def get_byte_range(request, length: int, etag: str = None):
+    """Return the byte range requested by a request, as a slice.
+
+    Return None when the whole content has to be sent: without a Range
+    header, with several or invalid ranges (which can be ignored), or when
+    the If-Range header doesn't match the ETag. Raise RangeNotSatisfiable
+    when the range is outside of the content.
+    """
+    header = request.META.get('HTTP_RANGE')
+    if header is None:
+        return None
+
+    # Only resume with the same version of the content
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if if_range is not None and if_range != etag:
+        return None
+
+    match = BYTE_RANGE_RE.match(header.replace(' ', ''))
+    if match is None or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+
+    if first == '':
+        # The last bytes of the content
+        start, stop = max(length - int(last), 0), length
+        if int(last) == 0:
+            raise RangeNotSatisfiable
+    else:
+        start = int(first)
+        stop = length if last == '' else min(int(last) + 1, length)
+        if last != '' and int(last) < start:
+            return None
+
+    if start >= length:
+        raise RangeNotSatisfiable
+    return slice(start, stop)
+
+
+class ConditionalListMixin:
+    """Add an ETag to the list responses of a viewset.
+
+    The ETag is a fingerprint of the listed collection (its version, see
+    get_list_version), the query parameters, the user and how the list is
+    represented. No Last-Modified header is sent, as it wouldn't change when
+    an object is deleted. Lists whose get_list_etag() is None have no ETag.
+    """
+
+    def list(self, request, *args, **kwargs):
+        etag = self.get_list_etag(self.filter_queryset(self.get_queryset()))
+        if etag is None:
+            return super().list(request, *args, **kwargs)
+
+        response = get_not_modified_response(request, etag)
+        if response is not None:
+            return response
+
+        response = super().list(request, *args, **kwargs)
+        set_validators(response, etag)
+        return response
+
+    def get_list_etag(self, queryset):
+        """Return the ETag of a list of objects (None for no ETag)."""
+        return make_etag(
+            *self.get_list_version(queryset),
+            sorted(self.request.query_params.lists()),
+            self.request.user.pk,
+            self.request.accepted_renderer.format,
+            self.request.build_absolute_uri('/')
+        )
+
+    def get_list_version(self, queryset) -> tuple:
+        """Return values that change when a list of objects changes.
+
+        By default, the number of objects and their last modification date,
+        read with a single aggregate query (for small collections).
+        """
+        collection = queryset.aggregate(count=Count('pk'),
+                                        modified=Max('modified'))
+        modified = collection['modified']
+        return (collection['count'],
+                modified.isoformat() if modified is not None else '')
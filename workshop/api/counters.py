@@ -0,0 +1,145 @@
+"""Buffered counters for Upsilon Workshop."""
+import atexit
+import hashlib
+import logging
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import F
+
+# Import the models from the models.py file
+from workshop.api.models import Script
+
+# Import the sketch used to count the unique viewers
+from workshop.api.sketches import HyperLogLog
+
+logger = logging.getLogger(__name__)
+
+
+def get_viewer(request) -> bytes:
+    """Return an anonymous identifier of the user making a request.
+
+    Users are identified by their username, and anonymous users by their IP
+    address and user agent. The identifier is hashed with the secret key, so
+    it can't be traced back to the user.
+    """
+    if request.user.is_authenticated:
+        viewer = f"user:{request.user.pk}"
+    else:
+        viewer = "anonymous:{}:{}".format(
+            request.META.get('REMOTE_ADDR', ''),
+            request.META.get('HTTP_USER_AGENT', '')
+        )
+    return hashlib.blake2b(
+        viewer.encode(),
+        key=hashlib.blake2b(settings.SECRET_KEY.encode()).digest()[:32]
+    ).digest()
+
+
+class ViewCounter:
+    """Count the views of the scripts in memory, and save them in batches.
+
+    The views are added to the database with F() expressions every
+    SCRIPT_VIEWS_FLUSH_INTERVAL seconds (and when the process exits), so
+    reading a script doesn't lock its row, and concurrent views are never
+    lost.
+
+    The viewers are added to a sketch per script, merged into the sketch of
+    the script when saving, so the unique views cost a fixed amount of memory
+    and one write per script and flush, however many views there are.
+    """
+
+    def __init__(self):
+        """Create an empty counter."""
+        self.lock = threading.Lock()
+        self.pending = Counter()
+        self.pending_viewers = {}
+        self.last_flush = time.monotonic()
+
+    def add(self, script_id, viewer: bytes = None) -> int:
+        """Count a view of a script, by a viewer (see get_viewer).
+
+        Return the number of views of the script that were counted since the
+        last flush (including this one), which a script loaded before the
+        call doesn't include.
+        """
+        with self.lock:
+            self.pending[script_id] += 1
+            count = self.pending[script_id]
+            if viewer is not None:
+                if script_id not in self.pending_viewers:
+                    self.pending_viewers[script_id] = HyperLogLog()
+                self.pending_viewers[script_id].add(viewer)
+            flush_due = time.monotonic() - self.last_flush >=\
+                settings.SCRIPT_VIEWS_FLUSH_INTERVAL
+
+        if flush_due:
+            self.flush()
+        return count
+
+    def get_pending(self, script_id) -> int:
+        """Return the number of views of a script that aren't saved yet."""
+        with self.lock:
+            return self.pending.get(script_id, 0)
+
+    def flush(self) -> None:
+        """Save the pending views in the database."""
+        with self.lock:
+            pending, self.pending = self.pending, Counter()
+            pending_viewers, self.pending_viewers = self.pending_viewers, {}
+            self.last_flush = time.monotonic()
+
+        # Group the scripts by number of views, to update them with as few
+        # queries as possible
+        scripts_by_views = defaultdict(list)
+        for script_id, views in pending.items():
+            scripts_by_views[views].append(script_id)
+
+        for views, script_ids in scripts_by_views.items():
+            try:
+                Script.objects.filter(pk__in=script_ids).update(
+                    views=F('views') + views
+                )
+            except DatabaseError:
+                # Keep the views for the next flush instead of failing the
+                # request that triggered this one
+                logger.exception("Unable to save the views of the scripts")
+                with self.lock:
+                    for script_id in script_ids:
+                        self.pending[script_id] += views
+
+        if pending_viewers:
+            self.flush_viewers(pending_viewers)
+
+    def flush_viewers(self, pending_viewers: dict) -> None:
+        """Merge the pending viewers into the sketches of the scripts."""
+        try:
+            with transaction.atomic():
+                # Lock the scripts, so that concurrent merges are not lost
+                scripts = list(
+                    Script.objects.filter(pk__in=pending_viewers)
+                    .select_for_update().only('id', 'viewers_sketch')
+                )
+                for script in scripts:
+                    sketch = HyperLogLog(script.viewers_sketch)
+                    sketch.merge(pending_viewers[script.id])
+                    script.viewers_sketch = sketch.to_bytes()
+                    script.unique_views = sketch.count()
+                Script.objects.bulk_update(
+                    scripts, ['viewers_sketch', 'unique_views']
+                )
+        except DatabaseError:
+            logger.exception("Unable to save the viewers of the scripts")
+            with self.lock:
+                for script_id, sketch in pending_viewers.items():
+                    if script_id in self.pending_viewers:
+                        sketch.merge(self.pending_viewers[script_id])
+                    self.pending_viewers[script_id] = sketch
+
+
+# The views of the scripts, shared by all the requests of the process
+script_views = ViewCounter()
+atexit.register(script_views.flush)
@@ -0,0 +1,120 @@
+"""Streaming exports of the scripts, as NDJSON (one JSON object per line).
+
+The scripts are read in chunks of EXPORT_CHUNK_SIZE, ordered by id and
+resuming after the last id of the previous chunk, with the names of their
+related objects and the contents of their files read for each chunk (as
+plain values: prefetched objects form reference cycles, which would stay
+in memory until the garbage collector runs). Each chunk is a range of the
+primary key index, and the memory used doesn't depend on the number of
+scripts (unlike iterating over a single query, which the MySQL driver reads
+in memory at once).
+
+Each line is a script with its files, and its author, collaborators, tags
+and OS by name, so that it can be imported in another database (see imports.py).
+"""
+import json
+from collections import defaultdict
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Max
+
+# Import the models from the models.py file
+from workshop.api.models import Blob, Script, ScriptChange
+
+# Number of scripts read at once (with the contents of their files)
+EXPORT_CHUNK_SIZE = 200
+
+# The related objects of the scripts, exported by name
+RELATED_FIELDS = ('collaborators', 'compatibility', 'tags')
+
+
+def get_catalog():
+    """Return the scripts of the catalog (the public, listed scripts)."""
+    return Script.objects.filter(is_public=True, is_unlisted=False)
+
+
+def iter_chunks(queryset, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """Iterate over the scripts of a queryset, by chunks (lists)."""
+    queryset = queryset.defer('viewers_sketch').order_by('id')
+    last_id = None
+    while True:
+        chunk = queryset if last_id is None \
+            else queryset.filter(id__gt=last_id)
+        scripts = list(chunk[:chunk_size])
+        if scripts:
+            yield scripts
+        if len(scripts) < chunk_size:
+            return
+        last_id = scripts[-1].id
+
+
+def get_related_names(scripts: list, name: str) -> dict:
+    """Return the primary keys of the related objects of scripts, by script.
+
+    The related objects of a many-to-many field are read from its table of
+    links, without loading them (their primary keys are their names).
+    """
+    field = Script._meta.get_field(name)
+    through = field.remote_field.through
+    related = defaultdict(list)
+    for script_id, related_id in through.objects.filter(**{
+        f"{field.m2m_field_name()}__in": [script.id for script in scripts]
+    }).order_by('id').values_list(f"{field.m2m_field_name()}_id",
+                                  f"{field.m2m_reverse_field_name()}_id"):
+        related[script_id].append(related_id)
+    return related
+
+
+def export_script(script: Script, related: dict, contents: dict) -> dict:
+    """Return the exported data of a script.
+
+    related are the names of the related objects of the scripts, by field
+    and by script, and contents the contents of their files, by hash.
+    """
+    return {
+        'id': script.id,
+        'name': script.name,
+        'author': script.author_id,
+        'created': script.created,
+        'modified': script.modified,
+        'language': script.language,
+        'version': script.version,
+        'short_description': script.short_description,
+        'long_description': script.long_description,
+        'licence': script.licence,
+        'runner': script.runner,
+        'is_public': script.is_public,
+        'is_unlisted': script.is_unlisted,
+        'views': script.views,
+        **{name: related[name].get(script.id, [])
+           for name in RELATED_FIELDS},
+        'files': [{'name': file['name'], 'content': contents[file['hash']]}
+                  for file in script.files],
+    }
+
+
+def export_lines(queryset, chunk_size: int = EXPORT_CHUNK_SIZE):
+    """Iterate over the NDJSON lines (bytes) of the scripts of a queryset."""
+    for scripts in iter_chunks(queryset, chunk_size):
+        related = {name: get_related_names(scripts, name)
+                   for name in RELATED_FIELDS}
+        contents = Blob.objects.contents(
+            file['hash'] for script in scripts for file in script.files
+        )
+        for script in scripts:
+            yield json.dumps(export_script(script, related, contents),
+                             cls=DjangoJSONEncoder,
+                             ensure_ascii=False).encode('utf-8') + b'\n'
+
+
+def get_changes_token() -> str:
+    """Return the token of the change feed to follow an export from.
+
+    The changes committed after the token is taken are numbered after it
+    (see ScriptChangeManager.number), and replayed after the export.
+    """
+    ScriptChange.objects.number()
+    last_position = ScriptChange.objects.aggregate(
+        last_position=Max('position')
+    )['last_position']
+    return str(last_position or 0)
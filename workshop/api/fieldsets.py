@@ -0,0 +1,129 @@
+"""Sparse fieldsets: only show (and load) the fields a client asks for.
+
+Clients select the fields of the responses with `?fields=name,author` (only
+these fields) or `?omit=files,long_description` (all the fields but these).
+They can also inline related objects instead of their hyperlinks, with
+`?expand=author,tags`. Only the responses of the read requests are changed,
+so that writes are validated with all their fields. The views don't load
+what isn't shown: the columns of the hidden fields are deferred, and their
+prefetches are skipped.
+"""
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+FIELDS_PARAM = 'fields'
+OMIT_PARAM = 'omit'
+EXPAND_PARAM = 'expand'
+
+
+def get_param_names(request, param: str):
+    """Return the field names of a query parameter, or None if absent."""
+    if param not in request.query_params:
+        return None
+    return {name.strip() for name in request.query_params[param].split(',')
+            if name.strip()}
+
+
+def is_read_response(serializer) -> bool:
+    """Return whether a serializer shows the objects of a read response.
+
+    Nested serializers (and the serializers of writes) are not.
+    """
+    request = serializer.context.get('request')
+    root = serializer.parent \
+        if isinstance(serializer.parent, serializers.ListSerializer) \
+        else serializer
+    return request is not None and root.parent is None \
+        and request.method in SAFE_METHODS
+
+
+def get_expanded_fields(request, serializer_class) -> set:
+    """Return the names of the fields to expand for a serializer."""
+    if request is None or request.method not in SAFE_METHODS:
+        return set()
+    expandable = getattr(serializer_class.Meta, 'expandable_fields', {})
+    return (get_param_names(request, EXPAND_PARAM) or set()) & set(expandable)
+
+
+class SparseFieldsMixin:
+    """Serializer mixin removing the fields that the client didn't ask for.
+
+    Only applies to the objects of the response, not to nested serializers.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not is_read_response(self):
+            return fields
+
+        request = self.context['request']
+        kept = get_param_names(request, FIELDS_PARAM)
+        omitted = get_param_names(request, OMIT_PARAM) or set()
+        return {
+            name: field for name, field in fields.items()
+            if (kept is None or name in kept) and name not in omitted
+        }
+
+
+class ExpandableFieldsMixin:
+    """Serializer mixin inlining the related objects listed in ?expand=.
+
+    Meta.expandable_fields maps the names of the related fields to the
+    serializers of the compact representations of their objects. Only
+    applies to the objects of the response, not to nested serializers.
+    """
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if not is_read_response(self):
+            return fields
+
+        expandable = self.Meta.expandable_fields
+        for name in get_expanded_fields(self.context['request'], type(self)):
+            if name in fields:
+                many = isinstance(fields[name], serializers.ManyRelatedField)
+                fields[name] = expandable[name](many=many, read_only=True)
+        return fields
+
+
+class SparseFieldsetViewMixin:
+    """Viewset mixin loading only what the fields of the response need.
+
+    prune_queryset() defers the columns of the fields that aren't shown
+    (except sparse_required_fields, which the view itself needs), and skips
+    the prefetches (from get_prefetches()) of the fields that aren't shown.
+    Prefetches are matched to fields by name, or with sparse_prefetch_fields
+    (prefetch lookup: field name).
+    """
+
+    sparse_required_fields = ()
+    sparse_prefetch_fields = {}
+
+    def get_prefetches(self) -> list:
+        """Return the related objects to prefetch with the objects."""
+        return []
+
+    def get_expanded_fields(self) -> set:
+        """Return the names of the fields to expand in the response."""
+        return get_expanded_fields(self.request, self.get_serializer_class())
+
+    def get_response_fields(self) -> set:
+        """Return the names of the fields of the response."""
+        return set(self.get_serializer().fields)
+
+    def prune_queryset(self, queryset):
+        """Return the queryset, loading only what the response shows."""
+        if self.request.method not in SAFE_METHODS:
+            return queryset.prefetch_related(*self.get_prefetches())
+
+        fields = self.get_response_fields()
+        loaded = {*fields, *self.sparse_required_fields}
+        deferred = [field.name for field in queryset.model._meta.concrete_fields
+                    if not field.primary_key and field.name not in loaded]
+        prefetches = [
+            prefetch for prefetch in self.get_prefetches()
+            if self.sparse_prefetch_fields.get(
+                prefetch.prefetch_to, prefetch.prefetch_to
+            ) in fields
+        ]
+        return queryset.defer(*deferred).prefetch_related(*prefetches)
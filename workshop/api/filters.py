@@ -0,0 +1,139 @@
+"""Filter backends for Upsilon Workshop."""
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import Exists, OuterRef, Q
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend, SearchFilter
+
+# Import the search index from the models.py and search.py files
+from workshop.api.models import BlobToken, Script, ScriptToken
+from workshop.api.search import tokenize
+
+
+class BulkRetrieveFilter(BaseFilterBackend):
+    """Retrieve several objects of a list at once, by id.
+
+    Clients resolving many hyperlinks (`?ids=<id>,<id>,...`) get them with
+    one request, and a fixed number of queries, instead of one request per
+    link. The lookups are defined by the `bulk_lookups` of the views (query
+    parameter: field), and at most BULK_RETRIEVE_MAX_IDS values can be
+    requested at once (so that they fit in a page). Unknown (or hidden) ids
+    are left out of the results.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        """Filter the objects with the requested ids."""
+        if not self.is_requested(request, view):
+            return queryset
+        lookups = self.get_lookups(request, queryset.model, view)
+        for field, values in lookups.items():
+            queryset = queryset.filter(**{f"{field}__in": values})
+        return queryset
+
+    def get_lookups(self, request, model, view) -> dict:
+        """Return the requested values of each field of the lookups.
+
+        Raise ValidationError if there are no values or too many, or if they
+        are invalid.
+        """
+        lookups = {}
+        for param, field in getattr(view, 'bulk_lookups', {}).items():
+            if param not in request.query_params:
+                continue
+            values = {value.strip() for value in
+                      request.query_params[param].split(',')} - {''}
+            if not values:
+                raise serializers.ValidationError(
+                    {param: "At least one value is required."}
+                )
+            if len(values) > settings.BULK_RETRIEVE_MAX_IDS:
+                raise serializers.ValidationError({param: (
+                    f"At most {settings.BULK_RETRIEVE_MAX_IDS} values can "
+                    f"be requested at once."
+                )})
+            model_field = model._meta.get_field(field) if field != 'pk' \
+                else model._meta.pk
+            try:
+                lookups[field] = [model_field.to_python(value)
+                                  for value in values]
+            except ValidationError as error:
+                raise serializers.ValidationError({param: error.messages})
+        return lookups
+
+    @staticmethod
+    def is_requested(request, view) -> bool:
+        """Return whether the objects of a list are requested by id."""
+        return getattr(view, 'action', None) == 'list' and any(
+            param in request.query_params
+            for param in getattr(view, 'bulk_lookups', {})
+        )
+
+    def get_schema_operation_parameters(self, view) -> list:
+        """Return the query parameters of the lookups."""
+        return [
+            {
+                'name': param,
+                'required': False,
+                'in': 'query',
+                'description': f'Comma-separated values of {field} to '
+                               f'retrieve (at most '
+                               f'{settings.BULK_RETRIEVE_MAX_IDS}).',
+                'schema': {'type': 'string'},
+            }
+            for param, field in getattr(view, 'bulk_lookups', {}).items()
+        ]
+
+
+class ScriptSearchFilter(SearchFilter):
+    """Search the scripts with the search index (see search.py).
+
+    Each term of the search is split in tokens, and the scripts must have a
+    token beginning with each of them (in any of the indexed fields, or in
+    one of their files). Each token is looked up in the indexes of the
+    tokens, instead of scanning the scripts. Terms without tokens
+    (punctuation) are ignored.
+
+    The scripts having a rare token are listed from the index. For common
+    tokens (beginning SEARCH_COMMON_TERM_TOKENS tokens of the index or more),
+    listing the scripts would read most of the index for every page, so the
+    scripts are checked one by one instead, which stops with the page.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        """Filter the scripts having all the tokens of the search."""
+        return self.filter_tokens(
+            queryset, tokenize(*self.get_search_terms(request))
+        )
+
+    def filter_tokens(self, queryset, tokens):
+        """Filter the scripts having all the tokens."""
+        for token in sorted(tokens):
+            queryset = queryset.filter(self.get_token_filter(token))
+        return queryset
+
+    def get_token_filter(self, token: str) -> Q:
+        """Return the filter of the scripts having a token."""
+        script_tokens = ScriptToken.objects.filter(token__istartswith=token)
+        blob_tokens = BlobToken.objects.filter(token__istartswith=token)
+        if self.is_common(script_tokens, blob_tokens):
+            # Each script is checked with the indexes of its tokens
+            return Q(Exists(script_tokens.filter(script=OuterRef('pk')))) | Q(
+                Exists(blob_tokens.filter(blob__scripts=OuterRef('pk')))
+            )
+
+        # The scripts with the token, or with a file (blob) with it
+        files = Script.blobs.through.objects.filter(
+            blob__in=blob_tokens.values('blob')
+        ).values('script')
+        return Q(pk__in=script_tokens.values('script').union(files))
+
+    def is_common(self, script_tokens, blob_tokens) -> bool:
+        """Return whether a token begins many tokens of the index.
+
+        At most SEARCH_COMMON_TERM_TOKENS tokens are read.
+        """
+        limit = settings.SEARCH_COMMON_TERM_TOKENS
+        found = script_tokens[:limit].count()
+        if found < limit:
+            found += blob_tokens[:limit - found].count()
+        return found >= limit
@@ -0,0 +1,192 @@
+"""Imports of scripts and users from NDJSON (one JSON object per line).
+
+The lines are the scripts of an export (see exports.py), or users (objects
+with a username). Importing is done in two steps: prepare_rows() parses and
+validates lines (without the database, so it can run in worker processes),
+and import_rows() saves a batch of prepared rows with bulk inserts.
+
+The authors and collaborators that aren't imported as users are created
+without email and password, and the tags and OS are created by name. These
+placeholder users are filled in by the user lines coming after their
+scripts (later in the batch, or in a later batch), while the other users
+that already exist are skipped. The scripts that already exist (with the
+same id) are skipped too, so a dump can be imported again.
+"""
+import json
+import uuid
+
+from django.contrib.auth.hashers import UNUSABLE_PASSWORD_PREFIX, make_password
+from django.core.exceptions import ValidationError
+from django.db import transaction
+
+# Import the models from the models.py file
+from workshop.api.models import OS, Script, Tag, User
+
+# Import the validators from the validators.py file
+from workshop.api.validators import validate_script_files
+
+# The fields of the scripts and users that are imported as they are
+SCRIPT_FIELDS = ('name', 'created', 'modified', 'language', 'version',
+                 'short_description', 'long_description', 'licence', 'runner',
+                 'is_public', 'is_unlisted', 'views')
+USER_FIELDS = ('username', 'email', 'first_name', 'last_name', 'is_staff',
+               'is_superuser', 'date_joined')
+
+# The related objects of the scripts (imported by name), and their models
+RELATED_MODELS = {'collaborators': User, 'compatibility': OS, 'tags': Tag}
+
+
+def clean_fields(model, data: dict, names) -> dict:
+    """Return the values of the fields of a model in data, validated."""
+    values = {}
+    for name in names:
+        if name in data:
+            values[name] = model._meta.get_field(name).clean(data[name], None)
+    return values
+
+
+def clean_names(model, names) -> list:
+    """Return a list of primary keys (names) of a model, validated."""
+    if not isinstance(names, list):
+        raise ValidationError("A list of names is required.")
+    field = model._meta.pk
+    return [field.clean(name, None) for name in names]
+
+
+def prepare_user(data: dict) -> dict:
+    """Return the fields of a user to import (with a hashed password)."""
+    values = clean_fields(User, data, USER_FIELDS)
+    values['password'] = make_password(data.get('password'))
+    return values
+
+
+def prepare_script(data: dict) -> dict:
+    """Return the fields and related names of a script to import."""
+    values = clean_fields(Script, data, SCRIPT_FIELDS)
+    values['id'] = uuid.UUID(str(data['id'])) if data.get('id') else None
+    values['author'] = clean_names(User, [data.get('author')])[0]
+
+    files = data.get('files')
+    if not isinstance(files, list) \
+            or not all(isinstance(file, dict) for file in files):
+        raise ValidationError("A list of files is required.")
+    validate_script_files(files)
+    values['files'] = [{'name': file['name'], 'content': file['content']}
+                       for file in files]
+
+    for name, model in RELATED_MODELS.items():
+        values[name] = clean_names(model, data.get(name, []))
+    return values
+
+
+def prepare_rows(lines: list) -> list:
+    """Parse and validate NDJSON lines.
+
+    Return a (kind, values, errors) tuple for each line: kind is 'user' or
+    'script' (or None for an invalid line), and errors the messages of the
+    invalid lines.
+    """
+    rows = []
+    for line in lines:
+        try:
+            data = json.loads(line)
+            if not isinstance(data, dict):
+                raise ValidationError("A JSON object is required.")
+            if 'username' in data:
+                rows.append(('user', prepare_user(data), None))
+            else:
+                rows.append(('script', prepare_script(data), None))
+        except ValidationError as error:
+            rows.append((None, None, error.messages))
+        except (ValueError, TypeError, KeyError) as error:
+            rows.append((None, None, [f"Invalid line: {error!r}"]))
+    return rows
+
+
+def import_rows(rows: list) -> dict:
+    """Save prepared users and scripts, in one transaction.
+
+    Return the number of users (created or filled in) and scripts created.
+    """
+    users = [values for kind, values, _ in rows if kind == 'user']
+    scripts = [values for kind, values, _ in rows if kind == 'script']
+
+    with transaction.atomic():
+        # The scripts imported earlier (or earlier in the batch) are skipped
+        seen = set(Script.objects.filter(pk__in=[
+            values['id'] for values in scripts if values['id'] is not None
+        ]).values_list('pk', flat=True))
+        unique = []
+        for values in scripts:
+            if values['id'] is not None:
+                if values['id'] in seen:
+                    continue
+                seen.add(values['id'])
+            unique.append(values)
+        scripts = unique
+
+        # The users, and the missing authors and collaborators
+        usernames = {values['username']: values for values in users}
+        for values in scripts:
+            for username in (values['author'], *values['collaborators']):
+                usernames.setdefault(username, {
+                    'username': username, 'password': make_password(None)
+                })
+        existing = set(User.objects.filter(
+            pk__in=usernames
+        ).values_list('pk', flat=True))
+        created_users = User.objects.bulk_create([
+            User(**values) for username, values in usernames.items()
+            if username not in existing
+        ])
+
+        # The users created for the scripts of earlier batches are filled in
+        placeholders = list(User.objects.filter(
+            pk__in=[values['username'] for values in users
+                    if values['username'] in existing],
+            email='', last_login=None,
+            password__startswith=UNUSABLE_PASSWORD_PREFIX,
+        ))
+        fields = set()
+        for user in placeholders:
+            values = usernames[user.pk]
+            fields.update(name for name in values if name != 'username')
+            for name, value in values.items():
+                setattr(user, name, value)
+        if placeholders:
+            User.objects.bulk_update(placeholders, sorted(fields))
+
+        # The tags and OS
+        for name in ('compatibility', 'tags'):
+            model = RELATED_MODELS[name]
+            model.objects.bulk_create([
+                model(name=related) for related in
+                {related for values in scripts for related in values[name]}
+            ], ignore_conflicts=True)
+
+        created_scripts, relations = [], []
+        for values in scripts:
+            values = dict(values)
+            relations.append({name: values.pop(name)
+                              for name in RELATED_MODELS})
+            if values['id'] is None:
+                del values['id']
+            script = Script(author_id=values.pop('author'), **values)
+            script.set_files(script.files)
+            created_scripts.append(script)
+        Script.objects.create_in_bulk(created_scripts, relations)
+
+        # Keep the dates of the scripts (the creation sets them to now)
+        dated = [
+            (script, values) for script, values in zip(created_scripts,
+                                                       scripts)
+            if 'created' in values or 'modified' in values
+        ]
+        for script, values in dated:
+            script.created = values.get('created', script.created)
+            script.modified = values.get('modified', script.modified)
+        Script.objects.bulk_update([script for script, _ in dated],
+                                   ['created', 'modified'])
+
+    return {'users': len(created_users) + len(placeholders),
+            'scripts': len(created_scripts)}
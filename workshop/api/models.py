@@ -1,16 +1,39 @@
 """Database models for the Upsilon Workshop app."""
-from django.db import models
+from django.conf import settings
+from django.db import IntegrityError, models, transaction
+from django.db.models.signals import m2m_changed, post_delete, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+from django.core.exceptions import ValidationError
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.utils.translation import gettext_lazy as _
 
 # Import the User and Group models from the Django auth module
 from django.contrib.auth.models import AbstractUser
 
+# Import hashlib to address the file contents
+import hashlib
+import json
+
 # Import uuid to generate unique IDs
 import uuid
+import secrets
+import time
+
+# Import the compression of the file contents from the compression.py file
+from workshop.api.compression import DEFAULT_CODEC, compress, decompress
+
+# Import the file operations from the patches.py file
+from workshop.api.patches import apply_file_operations
+
+# Import the deltas of the revisions from the revisions.py file
+from workshop.api.revisions import apply_delta, make_delta
+
+# Import the tokens of the search index from the search.py file
+from workshop.api.search import MAX_TOKEN_LENGTH, TEXT_FIELDS, tokenize
 
 # Import the validators from the validators.py file
-from workshop.api.validators import validate_language, validate_email, validate_runner, validate_script_files, URLUsernameValidator
+from workshop.api.validators import validate_language, validate_email, validate_runner, validate_script_manifest, script_files_size, URLUsernameValidator
 
 # Max file size is 100 KB
 MAX_FILE_SIZE = 100 * 1024
@@ -51,6 +74,16 @@ class User(AbstractUser):
         },
     )
 
+    class Meta(AbstractUser.Meta):
+        """Meta class for the User model."""
+
+        indexes = [
+            # User list (ordered by join date, and by username when the dates
+            # are equal)
+            models.Index(fields=['-date_joined', 'username'],
+                         name='user_joined_idx'),
+        ]
+
     def __str__(self) -> str:
         """Return a string representation of the model."""
         return f"{self.username}"
@@ -73,12 +106,45 @@ class RealUUIDField(models.UUIDField):
         return "uuid"
 
 
+class TokenField(models.CharField):
+    """A CharField compared without case on SQLite too (as with the default
+    collations of MySQL), so that its index is used by LIKE lookups."""
+
+    def db_type(self, connection):
+        db_type = super().db_type(connection)
+        if connection.vendor == 'sqlite':
+            db_type += ' COLLATE NOCASE'
+        return db_type
+
+
+def uuid7() -> uuid.UUID:
+    """Return a time-ordered UUID (version 7, see RFC 9562).
+
+    The UUID starts with the current time, so new rows are appended at the end
+    of the primary key index instead of being inserted at random places in it
+    (as with uuid4), which keeps the index compact and its recent pages in
+    memory.
+    """
+    nanoseconds = time.time_ns()
+    milliseconds, remainder = divmod(nanoseconds, 1_000_000)
+
+    # 48 bits of milliseconds, the version, 12 bits of sub-millisecond
+    # precision (to keep UUIDs of the same millisecond ordered), the variant,
+    # and 62 random bits
+    value = (milliseconds & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76
+    value |= (remainder * 4096 // 1_000_000) << 64
+    value |= 0b10 << 62
+    value |= secrets.randbits(62)
+    return uuid.UUID(int=value)
+
+
 class UUIDModel(models.Model):
     """Abstract model that uses UUIDs as primary keys."""
 
     # id = RealUUIDField(default=uuid.uuid4, editable=False, unique=True,
     #                       primary_key=True, verbose_name='UUID')
-    id = models.UUIDField(default=uuid.uuid4, editable=False, unique=True,
+    id = models.UUIDField(default=uuid7, editable=False, unique=True,
                           primary_key=True, verbose_name='UUID')
 
     class Meta:
@@ -117,6 +183,18 @@ class Rating(UUIDModel):
         related_name='ratings'
     )
 
+    class Meta:
+        """Meta class for the Rating model."""
+
+        indexes = [
+            # Rating list (ordered by creation date, and by id when the dates
+            # are equal)
+            models.Index(fields=['-created', 'id'], name='rating_created_idx'),
+            # Ratings of a script
+            models.Index(fields=['script', 'created'],
+                         name='rating_script_created_idx'),
+        ]
+
     def __str__(self) -> str:
         """Return a string representation of the model."""
         return str(self.rating)
@@ -134,6 +212,10 @@ class OS(models.Model):
     # The URL of the operating system
     homepage = models.URLField(blank=True)
 
+    # The date the operating system (or its list of scripts) was last
+    # modified
+    modified = models.DateTimeField(auto_now=True)
+
     # TODO: Add a version field
     # TODO: Add a icon field
 
@@ -151,11 +233,268 @@ class Tag(models.Model):
     # The description of the tag
     description = models.TextField(blank=True)
 
+    # The date the tag (or its list of scripts) was last modified
+    modified = models.DateTimeField(auto_now=True)
+
     def __str__(self) -> str:
         """Return a string representation of the model."""
         return f"{self.name}"
 
 
+class BlobManager(models.Manager):
+    """Manager for the Blob model."""
+
+    def store(self, blobs) -> None:
+        """Save blobs, skipping the ones that are already stored.
+
+        The tokens of the new blobs are added to the search index (the
+        blobs never change, so their tokens are only written once).
+        """
+        unique = {blob.hash: blob for blob in blobs}
+        if not unique:
+            return
+        stored = set(
+            self.filter(hash__in=unique).values_list('hash', flat=True)
+        )
+        new = [blob for digest, blob in unique.items() if digest not in stored]
+        # The blobs saved by concurrent requests are skipped too
+        self.bulk_create(new, ignore_conflicts=True)
+        BlobToken.objects.bulk_create([
+            BlobToken(blob_id=blob.hash, token=token)
+            for blob in new for token in tokenize(blob.get_content())
+        ], ignore_conflicts=True)
+
+    def contents(self, hashes) -> dict:
+        """Return the (decompressed) contents of blobs, by hash."""
+        return {
+            digest: decompress(data, codec) if codec else content
+            for digest, codec, content, data in self.filter(
+                hash__in=set(hashes)
+            ).values_list('hash', 'codec', 'content', 'data')
+        }
+
+
+class Blob(models.Model):
+    """The content of a file, addressed by its SHA-256 hash.
+
+    Identical files (forks, re-uploads, common modules) are stored once.
+    Blobs are never modified, and the ones that aren't used by any script
+    anymore are deleted by the collect_blobs command.
+
+    When SCRIPT_FILES_COMPRESSION is enabled, new contents are stored
+    compressed (see compression.py), and only decompressed by get_content().
+    """
+
+    # The SHA-256 hash of the content (hexadecimal)
+    hash = models.CharField(max_length=64, primary_key=True)
+
+    # The content of the file (empty when it is compressed)
+    content = models.TextField(blank=True)
+
+    # The codec of the compressed content (empty when it isn't compressed),
+    # and the compressed content
+    codec = models.CharField(max_length=16, blank=True, default='')
+    data = models.BinaryField(blank=True, default=b'')
+
+    # The size of the content, in bytes (encoded in UTF-8)
+    size = models.PositiveIntegerField()
+
+    objects = BlobManager()
+
+    @classmethod
+    def from_content(cls, content: str) -> 'Blob':
+        """Return the (unsaved) blob of a content."""
+        data = content.encode('utf-8')
+        blob = cls(hash=hashlib.sha256(data).hexdigest(), content=content,
+                   size=len(data))
+        if settings.SCRIPT_FILES_COMPRESSION:
+            blob.compress()
+        return blob
+
+    def compress(self) -> None:
+        """Compress the content, unless it doesn't make it smaller."""
+        if self.codec:
+            return
+        data = compress(self.content)
+        if len(data) < self.size:
+            self.codec, self.content, self.data = DEFAULT_CODEC, '', data
+
+    def get_content(self) -> str:
+        """Return the content of the file."""
+        if self.codec:
+            return decompress(self.data, self.codec)
+        return self.content
+
+    def __str__(self) -> str:
+        """Return a string representation of the model."""
+        return f"{self.hash}"
+
+
+class BlobToken(models.Model):
+    """A token (word) of the content of a blob, in the search index.
+
+    The scripts are found by the tokens of their files through their blobs
+    (see search.py), so the tokens of a content shared by several scripts
+    are stored once, and editing a script doesn't read its other files.
+    """
+
+    # The blob of the token (indexed with the token, see Meta)
+    blob = models.ForeignKey(Blob, on_delete=models.CASCADE,
+                             related_name='tokens', db_index=False)
+
+    # The token (lowercase)
+    token = TokenField(max_length=MAX_TOKEN_LENGTH)
+
+    class Meta:
+        """Meta class for the BlobToken model."""
+
+        constraints = [
+            # Blobs with a token (read from the index only)
+            models.UniqueConstraint(fields=['token', 'blob'],
+                                    name='blob_token_unique'),
+        ]
+        indexes = [
+            # Tokens of a blob (to check the blobs of a script for a common
+            # token)
+            models.Index(fields=['blob', 'token'],
+                         name='blob_token_blob_idx'),
+        ]
+
+    def __str__(self) -> str:
+        """Return a string representation of the model."""
+        return f"{self.token} ({self.blob_id})"
+
+
+class ScriptQuerySet(models.QuerySet):
+    """QuerySet for the Script model."""
+
+    def visible_to(self, user, listing: bool = True) -> models.QuerySet:
+        """Return the scripts that a user is allowed to see.
+
+        Public scripts are visible to everyone, private scripts only to their
+        author and collaborators, and admins can see everything. Unlisted
+        scripts are hidden when listing scripts, unless the user is the
+        author or a collaborator.
+
+        The rule is a single predicate (the collaborators are checked with
+        EXISTS instead of a join), so the result has no duplicates and never
+        needs DISTINCT.
+        """
+        if user.is_superuser:
+            return self
+
+        visible = models.Q(is_public=True)
+        if listing:
+            visible &= models.Q(is_unlisted=False)
+
+        if user.is_authenticated:
+            visible |= models.Q(author=user.pk)
+            visible |= models.Exists(
+                self.model.collaborators.through.objects.filter(
+                    script=models.OuterRef('pk'),
+                    user=user.pk
+                )
+            )
+
+        return self.filter(visible)
+
+    def editable_by(self, user) -> models.QuerySet:
+        """Return the scripts that a user is allowed to edit.
+
+        Scripts can be edited by their author and collaborators, and admins
+        can edit everything.
+        """
+        if user.is_superuser:
+            return self
+        return self.filter(
+            models.Q(author=user.pk) | models.Exists(
+                self.model.collaborators.through.objects.filter(
+                    script=models.OuterRef('pk'),
+                    user=user.pk
+                )
+            )
+        )
+
+    def create_in_bulk(self, scripts: list, relations: list) -> list:
+        """Create scripts with bulk inserts, in a fixed number of queries.
+
+        The scripts must have their files set (with set_files). relations
+        are the related objects of each script, by many-to-many field (tags,
+        compatibility and collaborators). As Script.save() isn't called, the
+        blobs, the first revisions, the tokens of the search index, the
+        changes of the catalog and the modification dates of the tags and OS
+        are written here. Should be run in a transaction.
+        """
+        Blob.objects.store(
+            blob for script in scripts for blob in script._new_blobs or []
+        )
+        for script in scripts:
+            script._new_blobs = None
+        self.bulk_create(scripts)
+
+        # The blobs of the files are linked like the related objects
+        relations = [
+            {**related, 'blobs': {file['hash'] for file in script.files}}
+            for script, related in zip(scripts, relations)
+        ]
+        for name in {name for related in relations for name in related}:
+            field = self.model._meta.get_field(name)
+            through = field.remote_field.through
+            source = f"{field.m2m_field_name()}_id"
+            target = f"{field.m2m_reverse_field_name()}_id"
+            through.objects.bulk_create([
+                through(**{source: script.pk,
+                           target: getattr(related, 'pk', related)})
+                for script, objects in zip(scripts, relations)
+                for related in objects.get(name, ())
+            ], ignore_conflicts=True)
+
+        # The lists of the tags and OS changed
+        now = timezone.now()
+        for model, name in ((Tag, 'tags'), (OS, 'compatibility')):
+            pks = {getattr(related, 'pk', related) for objects in relations
+                   for related in objects.get(name, ())}
+            if pks:
+                model.objects.filter(pk__in=pks).update(modified=now)
+
+        # The files are the first revision of the scripts
+        ScriptRevision.objects.bulk_create([
+            ScriptRevision(script=script, number=1, checkpoint=1,
+                           author_id=script.author_id, files=script.files)
+            for script in scripts
+        ])
+        # The ids of the revisions aren't returned by every database
+        revisions = ScriptRevision.objects.filter(
+            script__in=scripts
+        ).values_list('id', 'files')
+        through = ScriptRevision.blobs.through
+        through.objects.bulk_create([
+            through(scriptrevision_id=revision, blob_id=digest)
+            for revision, files in revisions
+            for digest in {file['hash'] for file in files}
+        ], ignore_conflicts=True)
+
+        # The scripts are added to the search index (with the names of their
+        # files, tags and OS, the names of the tags and OS being their primary
+        # keys)
+        tokens = {source: ScriptToken.objects.get_tokens(scripts, source)
+                  for source in (ScriptToken.TEXT, ScriptToken.FILES)}
+        for source in (ScriptToken.TAGS, ScriptToken.COMPATIBILITY):
+            tokens[source] = {
+                script.pk: tokenize(*(getattr(related, 'pk', related)
+                                      for related in objects.get(source, ())))
+                for script, objects in zip(scripts, relations)
+            }
+        ScriptToken.objects.write(tokens, replace=False)
+
+        # The listed scripts are new in the catalog
+        ScriptChange.objects.bulk_create([
+            ScriptChange(script=script.pk, action=ScriptChange.CREATED)
+            for script in scripts if ScriptChange.is_listed(script)
+        ])
+        return scripts
+
+
 class Script(UUIDModel):
     """A script stored in the database.
 
@@ -178,10 +517,21 @@ class Script(UUIDModel):
     - and more...
     """
 
-    # The files that are used in the script
-    files = models.JSONField(
-        validators=[validate_script_files]
-    )
+    # The manifest of the files that are used in the script (their name, and
+    # the hash and size of their content, stored as blobs). The contents are
+    # read with get_files() and written with set_files()
+    files = models.JSONField(validators=[validate_script_manifest])
+
+    # The blobs of the files, kept in sync with the manifest on save (and
+    # used to find the unused blobs)
+    blobs = models.ManyToManyField(Blob, related_name='scripts', blank=True,
+                                   editable=False)
+
+    # The number of files in the script and their size (as counted against
+    # MAX_SCRIPT_SIZE), kept in sync with the files on save so that lists
+    # don't have to load the files to show them
+    file_count = models.PositiveIntegerField(default=0, editable=False)
+    total_size = models.PositiveIntegerField(default=0, editable=False)
 
     # The name of the script
     # TODO: Forbid multiple scripts with the same name for the same user, but
@@ -229,6 +579,11 @@ class Script(UUIDModel):
     # The number of times the script has been viewed
     views = models.IntegerField(default=0)
 
+    # The estimated number of distinct viewers of the script, and the sketch
+    # (see sketches.py) it is estimated from (empty until the first view)
+    unique_views = models.PositiveIntegerField(default=0, editable=False)
+    viewers_sketch = models.BinaryField(default=b'', editable=False)
+
     # The licence of the script
     licence = models.CharField(max_length=100, default='Unspecified')
 
@@ -254,4 +609,638 @@ class Script(UUIDModel):
     )
 
     # TODO: Add a field for compatibles machines
-    # TODO: Add a field for size of the script
+
+    objects = ScriptQuerySet.as_manager()
+
+    class Meta:
+        """Meta class for the Script model."""
+
+        indexes = [
+            # Script list for anonymous users (public and listed scripts,
+            # ordered by creation date)
+            models.Index(fields=['is_public', 'is_unlisted', '-created'],
+                         name='script_listing_idx'),
+            # Script list for admins, and cursor pagination (ordered by
+            # creation date, and by id when the dates are equal)
+            models.Index(fields=['-created', 'id'], name='script_created_idx'),
+            # Scripts of an author (visibility rules and user pages)
+            models.Index(fields=['author', 'created'],
+                         name='script_author_created_idx'),
+            # Filter on the name (scripts and ratings lists)
+            models.Index(fields=['name'], name='script_name_idx'),
+            # Validators of the script list (count and last modification of
+            # the visible scripts, read from the index only)
+            models.Index(fields=['is_public', 'is_unlisted', 'modified'],
+                         name='script_modified_idx'),
+        ]
+
+    # The contents of the files, once loaded or set (with the manifest they
+    # belong to), and the blobs that have to be saved with the script
+    _files_cache = None
+    _new_blobs = None
+
+    # The id of the user saving the script, recorded as the author of the
+    # revision (the author of the script when not set)
+    _revision_author = None
+
+    def set_files(self, files: list) -> list:
+        """Set the files of the script from their names and contents.
+
+        The blobs are saved with the script, and returned for bulk creations.
+        """
+        blobs = [Blob.from_content(file['content']) for file in files]
+        self.files = [
+            {'name': file['name'], 'hash': blob.hash, 'size': blob.size}
+            for file, blob in zip(files, blobs)
+        ]
+        self.file_count = len(files)
+        self.total_size = script_files_size(files)
+        self._files_cache = (self.files, [
+            {'name': file['name'], 'content': file['content']}
+            for file in files
+        ])
+        self._new_blobs = blobs
+        return blobs
+
+    def edit_files(self, operations: list) -> None:
+        """Edit the files of the script with operations (see patches.py).
+
+        Only the contents of the edited files are loaded, and only the
+        changed contents are stored as new blobs when the script is saved.
+        Raise ValidationError if an operation is invalid.
+        """
+        files, self.total_size = apply_file_operations(
+            self.files, self.total_size, operations, Blob.objects.contents
+        )
+        # Store the changed contents, and keep the other files as they are
+        blobs = []
+        for file in files:
+            content = file.pop('content', None)
+            if 'hash' not in file:
+                blob = Blob.from_content(content)
+                file.update(hash=blob.hash, size=blob.size)
+                blobs.append(blob)
+        self.files = files
+        self.file_count = len(self.files)
+        self._new_blobs = blobs
+
+    def get_files(self) -> list:
+        """Return the names and contents of the files of the script.
+
+        The blobs are read from the prefetched blobs when available (with
+        prefetch_related('blobs')), and with one query otherwise.
+        """
+        if self._files_cache is not None and \
+                self._files_cache[0] is self.files:
+            return self._files_cache[1]
+
+        if 'blobs' in getattr(self, '_prefetched_objects_cache', {}):
+            contents = {blob.hash: blob.get_content()
+                        for blob in self.blobs.all()}
+        else:
+            contents = Blob.objects.contents(
+                file['hash'] for file in self.files
+            )
+
+        files = [{'name': file['name'], 'content': contents[file['hash']]}
+                 for file in self.files]
+        self._files_cache = (self.files, files)
+        return files
+
+    def clean(self):
+        """Check that the contents of the manifest of the files are stored.
+
+        The format of the manifest is checked by its validator, and the
+        files given with their contents are stored when the script is saved.
+        """
+        super().clean()
+        if not isinstance(self.files, list) or not all(
+            isinstance(file, dict) and isinstance(file.get('hash'), str)
+            and 'content' not in file for file in self.files
+        ):
+            return
+        sizes = dict(Blob.objects.filter(
+            hash__in={file['hash'] for file in self.files}
+        ).values_list('hash', 'size'))
+        for file in self.files:
+            if sizes.get(file['hash']) != file.get('size'):
+                raise ValidationError({'files': ValidationError(
+                    _('The content of file %(name)s is not stored.'),
+                    params={'name': file.get('name')},
+                )})
+
+    def save(self, *args, **kwargs):
+        """Save the script, storing the contents of its files as blobs."""
+        # Files can still be given with their contents
+        if any('content' in file for file in self.files):
+            self.set_files(self.files)
+
+        # Keep the statistics in sync when only the files are saved
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'files' in update_fields:
+            kwargs['update_fields'] = {
+                *update_fields, 'file_count', 'total_size'
+            }
+
+        if self._new_blobs is not None:
+            Blob.objects.store(self._new_blobs)
+            self._new_blobs = None
+
+        # The script, its revision, its tokens and its change are saved
+        # together
+        created = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+            # Link the script to the blobs of its manifest (also when the
+            # script is copied, or its manifest set directly)
+            if update_fields is None or 'files' in update_fields:
+                self.blobs.set({file['hash'] for file in self.files})
+                ScriptRevision.objects.record(
+                    self, self._revision_author or self.author_id
+                )
+
+            # Index the texts of the script and the names of its files (the
+            # contents of its files are indexed with their blobs, and its tags
+            # and OS when they are set)
+            sources = []
+            if update_fields is None or \
+                    not set(TEXT_FIELDS).isdisjoint(update_fields):
+                sources.append(ScriptToken.TEXT)
+            if update_fields is None or 'files' in update_fields:
+                sources.append(ScriptToken.FILES)
+            if sources:
+                ScriptToken.objects.write({
+                    source: ScriptToken.objects.get_tokens([self], source)
+                    for source in sources
+                }, replace=not created)
+
+            ScriptChange.objects.record(self, created=created)
+
+
+class ScriptRevisionManager(models.Manager):
+    """Manager for the ScriptRevision model."""
+
+    def record(self, script: Script, author_id) -> 'ScriptRevision':
+        """Record the files of a script as a new revision.
+
+        Nothing is recorded (and None is returned) when the files didn't
+        change since the last revision.
+        """
+        with transaction.atomic():
+            previous = self.select_for_update().filter(
+                script=script
+            ).order_by('-number').only(
+                'number', 'files', 'checkpoint', 'chain_size'
+            ).first()
+            if previous is not None and previous.files == script.files:
+                return None
+
+            revision = self.model(script=script, author_id=author_id,
+                                  files=script.files)
+            revision.number = previous.number + 1 if previous else 1
+            if previous is None or not revision.set_deltas(previous):
+                revision.checkpoint = revision.number
+                revision.chain_size = 0
+            revision.save()
+            if revision.is_checkpoint:
+                revision.blobs.set({file['hash'] for file in script.files})
+            return revision
+
+
+class ScriptRevision(models.Model):
+    """A version of the files of a script, recorded when they are saved.
+
+    Most revisions only store the deltas (see revisions.py) of the contents
+    that changed since the previous revision. Every few revisions, a
+    checkpoint keeps the blobs of all its files instead, so that rebuilding
+    a revision only applies the deltas since the last checkpoint. A
+    checkpoint is made when the deltas since the last one are larger than
+    the script, or after SCRIPT_REVISIONS_MAX_CHAIN revisions, so that the
+    history grows with the size of the edits rather than with the number of
+    saves.
+    """
+
+    # The script the revision belongs to
+    script = models.ForeignKey(Script, on_delete=models.CASCADE,
+                               related_name='revisions')
+
+    # The number of the revision (from 1, for each script)
+    number = models.PositiveIntegerField()
+
+    # The user who saved the revision (kept when the user is deleted)
+    author = models.ForeignKey(User, on_delete=models.SET_NULL, null=True,
+                               related_name='revisions')
+
+    # The date the revision was saved
+    created = models.DateTimeField(auto_now_add=True)
+
+    # The manifest of the files (as in Script.files)
+    files = models.JSONField()
+
+    # The number of the checkpoint the revision is rebuilt from (its own
+    # number for checkpoints)
+    checkpoint = models.PositiveIntegerField()
+
+    # The deltas of the contents that are new in this revision (their hash,
+    # the hash of the content they apply to, and the delta), and the size of
+    # the deltas since the checkpoint
+    deltas = models.JSONField(default=list)
+    chain_size = models.PositiveIntegerField(default=0)
+
+    # The blobs of the files of the checkpoints
+    blobs = models.ManyToManyField(Blob, related_name='revisions', blank=True,
+                                   editable=False)
+
+    objects = ScriptRevisionManager()
+
+    class Meta:
+        """Meta class for the ScriptRevision model."""
+
+        constraints = [
+            models.UniqueConstraint(fields=['script', 'number'],
+                                    name='script_revision_number_unique'),
+        ]
+
+    @property
+    def is_checkpoint(self) -> bool:
+        """Return whether the revision stores all its files."""
+        return self.checkpoint == self.number
+
+    def set_deltas(self, previous: 'ScriptRevision') -> bool:
+        """Store the changes since the previous revision as deltas.
+
+        Return False if the revision has to be a checkpoint instead.
+        """
+        if self.number - previous.checkpoint \
+                >= settings.SCRIPT_REVISIONS_MAX_CHAIN:
+            return False
+
+        # Only the contents that the previous revision doesn't have are
+        # stored, as deltas from the previous content of the same file
+        known = {file['hash'] for file in previous.files}
+        bases = {file['name']: file['hash'] for file in previous.files}
+        changed = {file['hash']: bases.get(file['name'])
+                   for file in self.files if file['hash'] not in known}
+        hashes = {*changed, *filter(None, changed.values())}
+        contents = Blob.objects.contents(hashes)
+        if len(contents) < len(hashes):
+            # The previous contents were deleted
+            return False
+
+        deltas = [
+            {'hash': digest, 'base': base,
+             'ops': make_delta(contents.get(base, ''), contents[digest])}
+            for digest, base in changed.items()
+        ]
+        chain_size = previous.chain_size + len(json.dumps(deltas))
+        if chain_size > self.script.total_size:
+            return False
+
+        self.checkpoint = previous.checkpoint
+        self.deltas, self.chain_size = deltas, chain_size
+        return True
+
+    def get_files(self) -> list:
+        """Return the names and contents of the files of the revision.
+
+        The checkpoint and the deltas since are read with one query, and the
+        blobs of the checkpoint with another.
+        """
+        chain = [self]
+        if not self.is_checkpoint:
+            chain = [*ScriptRevision.objects.filter(
+                script=self.script_id,
+                number__gte=self.checkpoint,
+                number__lt=self.number,
+            ).order_by('number').only('files', 'deltas'), self]
+
+        contents = Blob.objects.contents(
+            file['hash'] for file in chain[0].files
+        )
+        for revision in chain[1:]:
+            for delta in revision.deltas:
+                contents[delta['hash']] = apply_delta(
+                    contents.get(delta['base'], ''), delta['ops']
+                )
+
+        return [{'name': file['name'], 'content': contents[file['hash']]}
+                for file in self.files]
+
+    def __str__(self) -> str:
+        """Return a string representation of the model."""
+        return f"{self.script_id} #{self.number}"
+
+
+class ScriptChangeManager(models.Manager):
+    """Manager for the ScriptChange model."""
+
+    def record(self, script: Script, created: bool = False,
+               deleted: bool = False) -> 'ScriptChange':
+        """Record that a script was saved (or deleted) in the change log.
+
+        Nothing is recorded (and None is returned) when the script wasn't
+        and still isn't in the catalog.
+        """
+        listed = not deleted and ScriptChange.is_listed(script)
+        last_action = None if created else self.filter(
+            script=script.pk
+        ).order_by('-id').values_list('action', flat=True).first()
+        was_listed = last_action not in (None, ScriptChange.DELETED)
+
+        if listed:
+            action = ScriptChange.UPDATED if was_listed \
+                else ScriptChange.CREATED
+        elif was_listed:
+            action = ScriptChange.DELETED
+        else:
+            return None
+        return self.create(script=script.pk, action=action)
+
+    def number(self) -> None:
+        """Number the committed changes that aren't numbered yet, in order.
+
+        Only the committed changes are visible here, so a change committed
+        after a client read the feed is numbered after all the changes the
+        client received, even if its id (given when it was inserted) is
+        lower. When changes are numbered concurrently, the first numbering
+        is kept.
+        """
+        if not self.filter(position=None).exists():
+            return
+        try:
+            with transaction.atomic():
+                pending = list(self.select_for_update().filter(
+                    position=None
+                ).order_by('id').only('id'))
+                last = self.aggregate(
+                    last=models.Max('position')
+                )['last'] or 0
+                for position, change in enumerate(pending, last + 1):
+                    change.position = position
+                self.bulk_update(pending, ['position'], batch_size=500)
+        except IntegrityError:
+            pass
+
+
+class ScriptChange(models.Model):
+    """A change of the catalog of scripts (the public, listed scripts).
+
+    The changes are ordered by their position, which clients use as a token
+    to resume synchronizing the catalog (see ScriptViewSet.changes). The
+    position is given once the change is committed (see
+    ScriptChangeManager.number), unlike the id, so that the changes of long
+    transactions aren't numbered before changes already sent. A script leaving
+    the catalog (deleted, or made private or unlisted) is recorded as a
+    tombstone (a deleted change), and coming back to it as a new creation.
+    The views and the ratings of the scripts are not changes of the scripts.
+    """
+
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    ACTIONS = [
+        (CREATED, _('Created')),
+        (UPDATED, _('Updated')),
+        (DELETED, _('Deleted')),
+    ]
+
+    # The id of the script (not a foreign key, as the changes of the deleted
+    # scripts are kept)
+    script = models.UUIDField()
+
+    # What happened to the script
+    action = models.CharField(max_length=7, choices=ACTIONS)
+
+    # The date of the change
+    created = models.DateTimeField(auto_now_add=True)
+
+    # The position of the change in the feed (None until the change is
+    # committed and numbered)
+    position = models.PositiveBigIntegerField(null=True, unique=True,
+                                              editable=False)
+
+    objects = ScriptChangeManager()
+
+    class Meta:
+        """Meta class for the ScriptChange model."""
+
+        indexes = [
+            # Last change of a script
+            models.Index(fields=['script', '-id'],
+                         name='script_change_script_idx'),
+        ]
+
+    @staticmethod
+    def is_listed(script: Script) -> bool:
+        """Return whether a script is in the catalog."""
+        return script.is_public and not script.is_unlisted
+
+    def __str__(self) -> str:
+        """Return a string representation of the model."""
+        return f"{self.action} {self.script}"
+
+
+class ScriptDeletion(models.Model):
+    """A deletion of a script outside of the catalog (private or unlisted).
+
+    The deletions of the scripts of the catalog are tombstones of the change
+    log (see ScriptChange). The others are only numbered here, so that the
+    ETags of the lists of scripts change when a script they may show is
+    deleted (see ScriptViewSet.get_list_version).
+    """
+
+    # The date of the deletion
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self) -> str:
+        """Return a string representation of the model."""
+        return f"deletion {self.pk}"
+
+
+class ScriptTokenManager(models.Manager):
+    """Manager for the ScriptToken model."""
+
+    def get_tokens(self, scripts: list, source: str) -> dict:
+        """Return the tokens of a source of scripts, by script id.
+
+        The texts and the names of the files are read from the scripts, and
+        the names of the tags and OS from the links of the scripts (which can
+        be given by id for them).
+        """
+        if source == ScriptToken.TEXT:
+            return {script.pk: tokenize(*(
+                getattr(script, Script._meta.get_field(name).attname)
+                for name in TEXT_FIELDS
+            )) for script in scripts}
+        if source == ScriptToken.FILES:
+            return {script.pk: tokenize(*(file['name']
+                                          for file in script.files))
+                    for script in scripts}
+        field = Script._meta.get_field(source)
+        tokens = {getattr(script, 'pk', script): set() for script in scripts}
+        for script_id, name in field.remote_field.through.objects.filter(**{
+            f"{field.m2m_field_name()}__in": list(tokens)
+        }).values_list(f"{field.m2m_field_name()}_id",
+                       f"{field.m2m_reverse_field_name()}_id"):
+            tokens[script_id] |= tokenize(name)
+        return tokens
+
+    def index(self, scripts: list, sources) -> None:
+        """Replace the tokens of some sources of scripts in the index."""
+        self.write({source: self.get_tokens(scripts, source)
+                    for source in sources})
+
+    def write(self, tokens: dict, replace: bool = True) -> None:
+        """Replace tokens in the index, by source and by script id.
+
+        The previous tokens aren't deleted for new scripts (replace=False).
+        """
+        if replace:
+            self.filter(script__in={script_id for by_script in tokens.values()
+                                    for script_id in by_script},
+                        source__in=list(tokens)).delete()
+        # Tokens differing by their accents are the same for MySQL
+        self.bulk_create([
+            ScriptToken(script_id=script_id, source=source, token=token)
+            for source, by_script in tokens.items()
+            for script_id, words in by_script.items() for token in words
+        ], ignore_conflicts=True)
+
+
+class ScriptToken(models.Model):
+    """A token (word) of a script, in the search index (see search.py).
+
+    The tokens are grouped by source (the texts of the script, the names of
+    its files, its tags and its OS), and the tokens of a source are replaced
+    when it changes. The tokens of the contents of the files are the ones of
+    their blobs (see BlobToken).
+    """
+
+    TEXT = 'text'
+    FILES = 'files'
+    TAGS = 'tags'
+    COMPATIBILITY = 'compatibility'
+
+    # The script of the token (indexed with the token, see Meta)
+    script = models.ForeignKey(Script, on_delete=models.CASCADE,
+                               related_name='tokens', db_index=False)
+
+    # Where the token is in the script
+    source = models.CharField(max_length=13, choices=[
+        (TEXT, _('Text')),
+        (FILES, _('Files')),
+        (TAGS, _('Tags')),
+        (COMPATIBILITY, _('Compatibility')),
+    ])
+
+    # The token (lowercase)
+    token = TokenField(max_length=MAX_TOKEN_LENGTH)
+
+    objects = ScriptTokenManager()
+
+    class Meta:
+        """Meta class for the ScriptToken model."""
+
+        constraints = [
+            # Scripts with a token (read from the index only)
+            models.UniqueConstraint(fields=['token', 'script', 'source'],
+                                    name='script_token_unique'),
+        ]
+        indexes = [
+            # Tokens of a script (to check a script for a common token)
+            models.Index(fields=['script', 'token'],
+                         name='script_token_script_idx'),
+        ]
+
+    def __str__(self) -> str:
+        """Return a string representation of the model."""
+        return f"{self.token} ({self.source} of {self.script_id})"
+
+
+# Tags and operating systems list their scripts, so their modification date
+# has to change when scripts are added to or removed from them
+
+
+@receiver(m2m_changed, sender=Script.tags.through)
+@receiver(m2m_changed, sender=Script.compatibility.through)
+def touch_script_set(sender, instance, action, reverse, model, pk_set,
+                     **kwargs):
+    """Update the modification date of the tags or OS of a script."""
+    if action not in ('post_add', 'post_remove', 'pre_clear'):
+        return
+
+    now = timezone.now()
+    if reverse:
+        # The scripts of a tag or OS were changed
+        type(instance).objects.filter(pk=instance.pk).update(modified=now)
+    elif action == 'pre_clear':
+        # All the tags or OS of a script are about to be removed
+        model.objects.filter(script=instance).update(modified=now)
+    elif pk_set:
+        model.objects.filter(pk__in=pk_set).update(modified=now)
+
+
+@receiver(pre_delete, sender=Script)
+def touch_script_sets_on_delete(sender, instance, **kwargs):
+    """Update the modification date of the tags and OS of a deleted script."""
+    now = timezone.now()
+    Tag.objects.filter(script=instance).update(modified=now)
+    OS.objects.filter(script=instance).update(modified=now)
+
+
+@receiver(post_delete, sender=Script)
+def record_script_deletion(sender, instance, **kwargs):
+    """Record the tombstone of a deleted script (in the same transaction).
+
+    The scripts outside of the catalog have no tombstone, and their deletion
+    is recorded as a ScriptDeletion instead.
+    """
+    if ScriptChange.objects.record(instance, deleted=True) is None:
+        ScriptDeletion.objects.create()
+
+
+# The names of the tags and OS of the scripts are in the search index
+
+
+@receiver(m2m_changed, sender=Script.tags.through)
+@receiver(m2m_changed, sender=Script.compatibility.through)
+def index_script_set(sender, instance, action, reverse, model, pk_set,
+                     **kwargs):
+    """Index the tags or OS of the scripts whose tags or OS changed."""
+    source = ScriptToken.TAGS if sender is Script.tags.through \
+        else ScriptToken.COMPATIBILITY
+    if reverse and action == 'pre_clear':
+        # The scripts of a tag or OS are about to be removed
+        instance._cleared_scripts = list(
+            instance.script_set.values_list('pk', flat=True)
+        )
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+
+    if not reverse:
+        scripts = [instance.pk]
+    elif action == 'post_clear':
+        scripts = instance._cleared_scripts
+    else:
+        scripts = pk_set
+    if scripts:
+        ScriptToken.objects.index(list(scripts), [source])
+
+
+@receiver(pre_delete, sender=Tag)
+@receiver(pre_delete, sender=OS)
+def index_script_set_on_delete(sender, instance, **kwargs):
+    """Keep the scripts of a tag or OS about to be deleted."""
+    instance._deleted_scripts = list(
+        instance.script_set.values_list('pk', flat=True)
+    )
+
+
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=OS)
+def index_script_set_after_delete(sender, instance, **kwargs):
+    """Index the tags or OS of the scripts, once the tag or OS is deleted."""
+    source = ScriptToken.TAGS if sender is Tag else ScriptToken.COMPATIBILITY
+    if instance._deleted_scripts:
+        ScriptToken.objects.index(instance._deleted_scripts, [source])
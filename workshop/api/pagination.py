@@ -0,0 +1,304 @@
+"""Pagination classes for Upsilon Workshop."""
+import hashlib
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import EmptyResultSet
+from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
+from django.db import connections
+from django.db.models import QuerySet
+from django.utils.functional import cached_property
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination, CursorPagination
+
+
+def estimate_count(queryset: QuerySet):
+    """Return the number of rows of a table from the MySQL statistics.
+
+    Return None when the queryset isn't a whole table, when the database
+    isn't MySQL, or when the table is too small for the estimation to be
+    worth its inaccuracy.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'mysql' or queryset.query.where\
+            or queryset.query.distinct:
+        return None
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT TABLE_ROWS FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+            [queryset.model._meta.db_table]
+        )
+        row = cursor.fetchone()
+
+    if row is None or row[0] is None\
+            or row[0] < settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD:
+        return None
+    return row[0]
+
+
+def get_query_key(queryset: QuerySet) -> str:
+    """Return a key identifying the query of a queryset.
+
+    The key includes the parameters of the query (which contain the user for
+    the visibility rules).
+    """
+    sql, params = queryset.query.sql_with_params()
+    return hashlib.sha256(
+        repr((queryset.db, sql, params)).encode()
+    ).hexdigest()
+
+
+def cached_count(queryset: QuerySet) -> int:
+    """Return the number of rows of a queryset, cached for a short time."""
+    timeout = settings.PAGINATION_COUNT_CACHE_TIMEOUT
+    if not timeout:
+        return queryset.count()
+    try:
+        key = get_query_key(queryset)
+    except EmptyResultSet:
+        # The query can't match any row (such as none() or `pk__in=[]`)
+        return 0
+    return cache.get_or_set("pagination-count:" + key, queryset.count,
+                            timeout)
+
+
+def count_objects(queryset: QuerySet) -> int:
+    """Return the (possibly estimated or cached) number of rows of a queryset.
+
+    The whole tables are estimated from the MySQL statistics, and the other
+    querysets are counted with cached_count.
+    """
+    count = estimate_count(queryset)
+    if count is None:
+        count = cached_count(queryset)
+    return count
+
+
+class LenientPaginator(Paginator):
+    """Paginator that tolerates counts that aren't exact.
+
+    The pages are never truncated to the count, and the pages after the
+    count are valid as long as they contain objects.
+    """
+
+    def validate_number(self, number) -> int:
+        """Validate a page number, without an upper bound."""
+        try:
+            if isinstance(number, float) and not number.is_integer():
+                raise ValueError
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger(self.error_messages["invalid_page"])
+        if number < 1:
+            raise EmptyPage(self.error_messages["min_page"])
+        return number
+
+    def page(self, number):
+        """Return a page of objects."""
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        objects = list(self.object_list[bottom:bottom + self.per_page])
+        if not objects and number > 1:
+            raise EmptyPage(self.error_messages["no_results"])
+        return self._get_page(objects, number, self)
+
+
+class CountingPaginator(LenientPaginator):
+    """Paginator that avoids exact counts when they are too expensive.
+
+    Whole tables are counted with the MySQL table statistics, and the other
+    counts are cached for PAGINATION_COUNT_CACHE_TIMEOUT seconds (see
+    count_objects, or the counter given to the paginator).
+    """
+
+    def __init__(self, *args, counter=count_objects, **kwargs):
+        """Set the function counting the objects."""
+        super().__init__(*args, **kwargs)
+        self.counter = counter
+
+    @cached_property
+    def count(self) -> int:
+        """Return the number of objects."""
+        if not isinstance(self.object_list, QuerySet):
+            return super().count
+        return self.counter(self.object_list)
+
+
+class UncountedPaginator(LenientPaginator):
+    """Paginator that doesn't count the objects.
+
+    One more object than the page size is fetched to know whether there is a
+    next page.
+    """
+
+    count = None
+
+    # Only known once a page has been fetched
+    num_pages = 1
+
+    def page(self, number):
+        """Return a page of objects."""
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        objects = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not objects and number > 1:
+            raise EmptyPage(self.error_messages["no_results"])
+
+        self.num_pages = number + 1 if len(objects) > self.per_page \
+            else number
+        return self._get_page(objects[:self.per_page], number, self)
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination over a fixed, indexed ordering.
+
+    The ordering requested by the client (if any) is ignored, so that pages
+    are always read from an index, whatever their depth.
+    """
+
+    def __init__(self, ordering: tuple, page_size: int):
+        """Set the ordering and the size of the pages."""
+        self.ordering = ordering
+        self.page_size = page_size
+
+    def get_ordering(self, request, queryset, view) -> tuple:
+        """Return the ordering of the pages."""
+        return self.ordering
+
+
+class WorkshopPagination(PageNumberPagination):
+    """Page number pagination, with an opt-in cursor mode.
+
+    Clients select the cursor mode with `?pagination=cursor` (the links of
+    the cursor mode contain a `cursor` parameter, which selects it too). The
+    cursor mode is only available on the views that define a
+    `cursor_ordering`, and doesn't return the number of results.
+
+    In the page number mode, clients that don't need the number of results
+    can skip it with `?count=false` (the count is then null, and the last
+    page can't be requested).
+    """
+
+    django_paginator_class = CountingPaginator
+
+    mode_query_param = 'pagination'
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+
+    cursor_paginator = None
+
+    def __init__(self):
+        """Initialize the counts of the request."""
+        self.counts = {}
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """Paginate a queryset, with the mode requested by the client."""
+        if self.use_cursor(request, view):
+            self.cursor_paginator = KeysetPagination(
+                view.cursor_ordering, self.get_page_size(request)
+            )
+            page = self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+            self.display_page_controls = \
+                self.cursor_paginator.display_page_controls
+            return page
+
+        if not self.is_counted(request, view):
+            self.django_paginator_class = UncountedPaginator
+        else:
+            self.django_paginator_class = partial(CountingPaginator,
+                                                  counter=self.count_objects)
+        return super().paginate_queryset(queryset, request, view)
+
+    def count_objects(self, queryset: QuerySet) -> int:
+        """Return the number of objects of a queryset (see count_objects).
+
+        The counts are kept for the request, so that a count made before
+        paginating (for the ETag of the list) isn't made again.
+        """
+        try:
+            key = get_query_key(queryset)
+        except EmptyResultSet:
+            # The query can't match any row (such as none() or `pk__in=[]`)
+            return 0
+        if key not in self.counts:
+            self.counts[key] = count_objects(queryset)
+        return self.counts[key]
+
+    def is_counted(self, request, view=None) -> bool:
+        """Return whether the pages of a request have a number of results."""
+        if self.use_cursor(request, view):
+            return False
+        return request.query_params.get(self.count_query_param) not in (
+            'false', '0'
+        )
+
+    def get_page_number(self, request, paginator):
+        """Return the page number requested by the client."""
+        page_number = request.query_params.get(self.page_query_param)
+        if page_number in self.last_page_strings and\
+                isinstance(paginator, UncountedPaginator):
+            raise NotFound("The last page can't be requested without count.")
+        return super().get_page_number(request, paginator)
+
+    def use_cursor(self, request, view) -> bool:
+        """Return whether the cursor mode is requested and available."""
+        if getattr(view, 'cursor_ordering', None) is None:
+            return False
+        return (
+            request.query_params.get(self.mode_query_param) == 'cursor'
+            or self.cursor_query_param in request.query_params
+        )
+
+    def get_paginated_response(self, data):
+        """Return the response of a page."""
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        """Return the schema of the paginated responses."""
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count']['nullable'] = True
+        return response_schema
+
+    def to_html(self):
+        """Return the page controls of the browsable API."""
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.to_html()
+        return super().to_html()
+
+    def get_schema_operation_parameters(self, view):
+        """Return the query parameters of the paginated views."""
+        parameters = super().get_schema_operation_parameters(view) + [
+            {
+                'name': self.count_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Set to "false" to skip the number of '
+                               'results.',
+                'schema': {'type': 'boolean'},
+            },
+        ]
+        if getattr(view, 'cursor_ordering', None) is None:
+            return parameters
+        return parameters + [
+            {
+                'name': self.mode_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Set to "cursor" to use cursor pagination.',
+                'schema': {'type': 'string', 'enum': ['page', 'cursor']},
+            },
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value.',
+                'schema': {'type': 'string'},
+            },
+        ]
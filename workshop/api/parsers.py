@@ -0,0 +1,9 @@
+"""Parsers of the Upsilon Workshop API."""
+from rest_framework import parsers
+
+
+class JSONPatchParser(parsers.JSONParser):
+    """Parse JSON Patches (RFC 6902), converted by the views that accept
+    them (see patches.py).
+    """
+    media_type = 'application/json-patch+json'
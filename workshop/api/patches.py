@@ -0,0 +1,265 @@
+"""Edit the files of a script with operations instead of sending them all.
+
+An operation only loads the contents of the files it changes, and the size
+of the script is updated from the size of the changes, so editing a line of
+a large script costs as much as the line. The operations are:
+
+- {"op": "add", "name": ..., "content": ..., "index": ...} (index optional)
+- {"op": "remove", "name": ...}
+- {"op": "rename", "name": ..., "new_name": ...}
+- {"op": "replace", "name": ..., "content": ...}
+- {"op": "replace_range", "name": ..., "start": ..., "end": ..., "text": ...}
+  (start and end are offsets in characters, end excluded)
+- {"op": "test", "name": ..., "content": ...} (fails if the content differs)
+
+JSON Patches (RFC 6902) on the representation of a script are converted to
+these operations by json_patch_to_data().
+"""
+from django.core.exceptions import ValidationError
+from django.utils.translation import gettext_lazy as _
+
+# Import the validators from the validators.py file
+from workshop.api.validators import MAX_SCRIPT_SIZE, script_file_size, validate_file_name
+
+# The fields of each operation
+OPERATIONS = {
+    'add': ('name', 'content'),
+    'remove': ('name',),
+    'rename': ('name', 'new_name'),
+    'replace': ('name', 'content'),
+    'replace_range': ('name', 'start', 'end', 'text'),
+    'test': ('name', 'content'),
+}
+
+# The operations that need the current content of the file
+CONTENT_OPERATIONS = ('remove', 'replace', 'replace_range', 'test')
+
+# The fields of the operations that are strings
+STRING_FIELDS = ('name', 'new_name', 'content', 'text')
+
+
+def files_size(entries_size: int, count: int) -> int:
+    """Return script_files_size() from the size of each file."""
+    # The files are in a list, separated by ", "
+    return 2 + entries_size + 2 * max(count - 1, 0)
+
+
+def apply_file_operations(manifest: list, total_size: int, operations: list,
+                          load_contents) -> tuple:
+    """Apply operations to the manifest of the files of a script.
+
+    load_contents(hashes) returns the contents of blobs by hash. Return the
+    new manifest (where the changed files have their content instead of
+    their hash) and the new size of the files. Raise ValidationError if an
+    operation is invalid.
+    """
+    files = [dict(file) for file in manifest]
+    entries_size = total_size - files_size(0, len(files))
+
+    # Load the contents of all the edited files at once
+    edited = {operation.get('name') for operation in operations
+              if operation.get('op') in CONTENT_OPERATIONS}
+    contents = load_contents(
+        file['hash'] for file in files if file['name'] in edited
+    )
+
+    def get_content(file: dict) -> str:
+        if 'content' not in file:
+            if file['hash'] not in contents:
+                contents.update(load_contents([file['hash']]))
+            file['content'] = contents[file['hash']]
+        return file['content']
+
+    def set_content(file: dict, content: str) -> None:
+        nonlocal entries_size
+        entries_size += (script_file_size(file['name'], content)
+                         - script_file_size(file['name'], get_content(file)))
+        file.pop('hash', None)
+        file['content'] = content
+
+    for position, operation in enumerate(operations):
+        kind = operation.get('op')
+        if kind not in OPERATIONS:
+            raise ValidationError(
+                _('Operation %(position)s: unknown operation %(op)s.'),
+                params={'position': position, 'op': kind},
+            )
+        for field in OPERATIONS[kind]:
+            if field not in operation:
+                raise ValidationError(
+                    _('Operation %(position)s: the field "%(field)s" is '
+                      'missing.'),
+                    params={'position': position, 'field': field},
+                )
+            if field in STRING_FIELDS and \
+                    not isinstance(operation[field], str):
+                raise ValidationError(
+                    _('Operation %(position)s: the field "%(field)s" is not '
+                      'a string.'),
+                    params={'position': position, 'field': field},
+                )
+
+        names = [file['name'] for file in files]
+        name = operation['name']
+        if kind == 'add':
+            if name in names:
+                raise ValidationError(
+                    _('Operation %(position)s: the file %(name)s already '
+                      'exists.'),
+                    params={'position': position, 'name': name},
+                )
+            validate_file_name(name)
+            content = operation['content']
+            index = operation.get('index', len(files))
+            if not isinstance(index, int) or not 0 <= index <= len(files):
+                raise ValidationError(
+                    _('Operation %(position)s: invalid index.'),
+                    params={'position': position},
+                )
+            files.insert(index, {'name': name, 'content': content})
+            entries_size += script_file_size(name, content)
+            continue
+
+        if name not in names:
+            raise ValidationError(
+                _('Operation %(position)s: the file %(name)s does not '
+                  'exist.'),
+                params={'position': position, 'name': name},
+            )
+        file = files[names.index(name)]
+
+        if kind == 'remove':
+            entries_size -= script_file_size(name, get_content(file))
+            files.remove(file)
+        elif kind == 'rename':
+            new_name = operation['new_name']
+            if new_name in names:
+                raise ValidationError(
+                    _('Operation %(position)s: the file %(name)s already '
+                      'exists.'),
+                    params={'position': position, 'name': new_name},
+                )
+            validate_file_name(new_name)
+            # Only the name changes, not its content
+            entries_size += (script_file_size(new_name, '')
+                             - script_file_size(name, ''))
+            file['name'] = new_name
+        elif kind == 'replace':
+            set_content(file, operation['content'])
+        elif kind == 'replace_range':
+            content = get_content(file)
+            start, end = operation['start'], operation['end']
+            if not isinstance(start, int) or not isinstance(end, int) \
+                    or not 0 <= start <= end <= len(content):
+                raise ValidationError(
+                    _('Operation %(position)s: invalid range.'),
+                    params={'position': position},
+                )
+            set_content(file, content[:start] + operation['text']
+                        + content[end:])
+        elif kind == 'test':
+            if get_content(file) != operation['content']:
+                raise ValidationError(
+                    _('Operation %(position)s: the content of %(name)s '
+                      'differs.'),
+                    params={'position': position, 'name': name},
+                )
+
+    if not files:
+        raise ValidationError(_('The file is empty.'))
+
+    size = files_size(entries_size, len(files))
+    if size > MAX_SCRIPT_SIZE:
+        raise ValidationError(
+            _('The file is too large (%(size)s bytes). '
+              'The maximum file size is %(max_size)s bytes.'),
+            params={'size': size, 'max_size': MAX_SCRIPT_SIZE},
+        )
+
+    return files, size
+
+
+def json_patch_to_data(patch, names: list) -> dict:
+    """Convert a JSON Patch (RFC 6902) on a script to the data of a PATCH.
+
+    The patch can replace or add the fields of the script (/name, /tags...),
+    and edit its files (/files/<index>, /files/<index>/name and
+    /files/<index>/content), which are converted to file operations. names
+    are the names of the files of the script, in order. Raise
+    ValidationError if the patch can't be converted.
+    """
+    if not isinstance(patch, list):
+        raise ValidationError(_('A JSON Patch is a list of operations.'))
+
+    names = list(names)
+    data, operations = {}, []
+
+    def get_index(token: str, adding: bool = False) -> int:
+        if adding and token == '-':
+            return len(names)
+        if not token.isdigit() or int(token) >= len(names) + adding:
+            raise ValidationError(
+                _('Invalid path /files/%(index)s.'), params={'index': token}
+            )
+        return int(token)
+
+    for operation in patch:
+        if not isinstance(operation, dict) \
+                or not isinstance(operation.get('path'), str) \
+                or not isinstance(operation.get('op'), str):
+            raise ValidationError(_('Invalid JSON Patch operation.'))
+        kind, path = operation.get('op'), operation['path']
+        tokens = path.split('/')[1:] if path.startswith('/') else None
+        if not tokens or ('value' not in operation and kind != 'remove'):
+            raise ValidationError(
+                _('Invalid JSON Patch operation on %(path)s.'),
+                params={'path': path},
+            )
+        value = operation.get('value')
+
+        if tokens[0] != 'files':
+            # Other fields of the script
+            if len(tokens) != 1 or kind not in ('add', 'replace'):
+                raise ValidationError(
+                    _('Unsupported JSON Patch operation on %(path)s.'),
+                    params={'path': path},
+                )
+            data[tokens[0]] = value
+        elif len(tokens) == 2 and kind == 'add':
+            index = get_index(tokens[1], adding=True)
+            if not isinstance(value, dict):
+                raise ValidationError(_('A file is an object.'))
+            operations.append({'op': 'add', 'name': value.get('name'),
+                               'content': value.get('content'),
+                               'index': index})
+            names.insert(index, value.get('name'))
+        elif len(tokens) == 2 and kind == 'remove':
+            index = get_index(tokens[1])
+            operations.append({'op': 'remove', 'name': names.pop(index)})
+        elif len(tokens) == 3 and tokens[2] == 'name' \
+                and kind in ('replace', 'test'):
+            index = get_index(tokens[1])
+            if kind == 'test':
+                if names[index] != value:
+                    raise ValidationError(
+                        _('The test of %(path)s failed.'),
+                        params={'path': path},
+                    )
+                continue
+            operations.append({'op': 'rename', 'name': names[index],
+                               'new_name': value})
+            names[index] = value
+        elif len(tokens) == 3 and tokens[2] == 'content' \
+                and kind in ('replace', 'test'):
+            index = get_index(tokens[1])
+            operations.append({'op': kind, 'name': names[index],
+                               'content': value})
+        else:
+            raise ValidationError(
+                _('Unsupported JSON Patch operation on %(path)s.'),
+                params={'path': path},
+            )
+
+    if operations:
+        data['file_operations'] = operations
+    return data
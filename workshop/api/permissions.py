@@ -36,11 +36,17 @@ class IsScriptOwnerOrReadOnly(BasePermission):
 
     def has_object_permission(self, request, view: object, obj: object) -> bool:
         """Check if the user has permission to access the object."""
+        # Everyone can read the scripts they can see (without loading the
+        # collaborators)
+        if request.method in SAFE_METHODS:
+            return True
+
         is_admin = request.user and request.user.is_superuser
 
         # To check if the user is the owner of the script, we need to check if
-        # the user is in the list of authors of the script
-        is_owner = request.user == obj.author
+        # the user is in the list of authors of the script (compare the primary
+        # keys to avoid loading the author)
+        is_owner = obj.author_id == request.user.pk
         is_script_admin = is_admin or is_owner
         if is_script_admin:
             return True
@@ -53,28 +59,14 @@ class IsScriptOwnerOrReadOnly(BasePermission):
             if request.method in ['DELETE']:
                 return False
 
-            # Disallow changing the collaborators list for collaborators
+            # Disallow changing the collaborators list for collaborators (the
+            # JSON Patches are checked by the view, once converted)
             if (
                 request.method in ['PATCH', 'PUT']
-                and 'collaborators' in request.data
+                and isinstance(request.data, dict)
             ):
-                data = dict(request.data.copy())
-                # Get the list of collaborators from the request
-                collaborators = data['collaborators']
-
-                # Get the list of collaborators from the database
-                collaborators_db = list(obj.collaborators.all().values_list(
-                    'username', flat=True
-                ))
-
-                # Convert the list of collaborators from the request to a list
-                # of ids
-                collaborators = [collaborator.split('/')[-2]
-                                 for collaborator in collaborators]
-
-                # Check if the list of collaborators is the same
-                if collaborators != collaborators_db:
-                    return False
+                return self.has_data_permission(request, view, obj,
+                                                request.data)
 
             return True
 
@@ -82,6 +74,34 @@ class IsScriptOwnerOrReadOnly(BasePermission):
         # allow read-only access
         return request.method in SAFE_METHODS
 
+    def has_data_permission(self, request, view: object, obj: object,
+                            data: dict) -> bool:
+        """Check if the user can write data to the script.
+
+        The author and the admins can write everything, and the
+        collaborators everything but the list of collaborators.
+        """
+        is_admin = request.user and request.user.is_superuser
+        if is_admin or obj.author_id == request.user.pk \
+                or 'collaborators' not in data:
+            return True
+
+        data = dict(data.copy())
+        # Get the list of collaborators from the request
+        collaborators = data['collaborators']
+
+        # Get the list of collaborators from the database
+        collaborators_db = list(obj.collaborators.all().values_list(
+            'username', flat=True
+        ))
+
+        # Convert the list of collaborators from the request to a list of ids
+        collaborators = [collaborator.split('/')[-2]
+                         for collaborator in collaborators]
+
+        # Check if the list of collaborators is the same
+        return collaborators == collaborators_db
+
 
 class IsRatingOwnerOrReadOnly(BasePermission):
     """Allow read/write permissions to the owner of the object and admin."""
@@ -89,7 +109,8 @@ class IsRatingOwnerOrReadOnly(BasePermission):
     def has_object_permission(self, request, view: object, obj: object) -> bool:
         """Check if the user has permission to access the object."""
         is_admin = request.user and request.user.is_superuser
-        is_owner = obj.user == request.user
+        # Compare the primary keys to avoid loading the user
+        is_owner = obj.user_id == request.user.pk
         is_allowed = is_admin or is_owner
 
         return request.method in SAFE_METHODS or is_allowed
@@ -0,0 +1,63 @@
+"""Renderers of the Upsilon Workshop API."""
+import json
+
+from rest_framework import renderers
+
+
+class PlainTextRenderer(renderers.BaseRenderer):
+    """Render raw content (such as the content of a file) as plain text.
+
+    Errors are rendered as their message.
+    """
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, bytes):
+            return data
+        if isinstance(data, dict) and 'detail' in data:
+            data = data['detail']
+        return str(data).encode(self.charset)
+
+
+class ArchiveRenderer(renderers.BaseRenderer):
+    """Base renderer of the archives of the scripts (see bundles.py).
+
+    The archives are served as files, so only the errors are rendered (as
+    their message).
+    """
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if isinstance(data, bytes):
+            return data
+        if isinstance(data, dict) and 'detail' in data:
+            data = data['detail']
+        return str(data).encode('utf-8')
+
+
+class ZipRenderer(ArchiveRenderer):
+    """Render zip archives."""
+    media_type = 'application/zip'
+    format = 'zip'
+
+
+class TarRenderer(ArchiveRenderer):
+    """Render tar archives."""
+    media_type = 'application/x-tar'
+    format = 'tar'
+
+
+class NDJSONRenderer(renderers.BaseRenderer):
+    """Render newline-delimited JSON (see exports.py).
+
+    The exports are streamed, so only the errors are rendered (as a line).
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data).encode(self.charset) + b'\n'
@@ -0,0 +1,89 @@
+"""Line deltas between two versions of a file, for the script revisions.
+
+A delta is a list of operations rebuilding the new version from the old one:
+[start, end] copies the lines start to end (excluded) of the old version,
+and a string is inserted as is. Edits are usually local, so the lines that
+are common to the start and to the end of both versions are matched first,
+and only the lines in between are compared with difflib.
+"""
+import difflib
+
+
+def make_delta(base: str, content: str) -> list:
+    """Return the delta from a version of a file to another one."""
+    old = base.splitlines(keepends=True)
+    new = content.splitlines(keepends=True)
+
+    # Common lines at the start and at the end
+    prefix = 0
+    while prefix < min(len(old), len(new)) and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < min(len(old), len(new)) - prefix \
+            and old[-suffix - 1] == new[-suffix - 1]:
+        suffix += 1
+
+    delta = [[0, prefix]] if prefix else []
+    matcher = difflib.SequenceMatcher(None, old[prefix:len(old) - suffix],
+                                      new[prefix:len(new) - suffix])
+    for tag, old_start, old_end, new_start, new_end in matcher.get_opcodes():
+        if tag == 'equal':
+            delta.append([prefix + old_start, prefix + old_end])
+        elif new_start < new_end:
+            delta.append(''.join(new[prefix + new_start:prefix + new_end]))
+    if suffix:
+        delta.append([len(old) - suffix, len(old)])
+    return delta
+
+
+def apply_delta(base: str, delta: list) -> str:
+    """Return the version of a file rebuilt from the previous one."""
+    old = base.splitlines(keepends=True)
+    return ''.join(
+        ''.join(old[operation[0]:operation[1]])
+        if isinstance(operation, list) else operation
+        for operation in delta
+    )
+
+
+def diff_files(old_files: list, new_files: list) -> list:
+    """Return the unified diffs of the files that changed between versions.
+
+    The files are lists of names and contents.
+    """
+    old = {file['name']: file['content'] for file in old_files}
+    new = {file['name']: file['content'] for file in new_files}
+
+    diffs = []
+    for name in [*old, *(name for name in new if name not in old)]:
+        if old.get(name) == new.get(name):
+            continue
+        status = ('added' if name not in old else
+                  'removed' if name not in new else 'modified')
+        diffs.append({
+            'name': name,
+            'status': status,
+            'diff': unified_diff(
+                old.get(name, ''), new.get(name, ''),
+                f"a/{name}" if name in old else "/dev/null",
+                f"b/{name}" if name in new else "/dev/null",
+            ),
+        })
+    return diffs
+
+
+def unified_diff(old: str, new: str, fromfile: str, tofile: str) -> str:
+    """Return the unified diff between two versions of a file.
+
+    Like diff and git, a last line without a newline is ended and followed
+    by a "No newline at end of file" marker, instead of being joined to the
+    next line of the diff.
+    """
+    lines = []
+    for line in difflib.unified_diff(old.splitlines(keepends=True),
+                                     new.splitlines(keepends=True),
+                                     fromfile=fromfile, tofile=tofile):
+        lines.append(line)
+        if not line.endswith('\n'):
+            lines.append('\n\\ No newline at end of file\n')
+    return ''.join(lines)
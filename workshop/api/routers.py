@@ -0,0 +1,21 @@
+"""Routers of the Upsilon Workshop API."""
+from rest_framework import routers
+
+
+class WorkshopRouter(routers.DefaultRouter):
+    """Router of the API, with an optional trailing slash on some actions.
+
+    The URLs of the actions listed in the `optional_slash_actions` of a
+    viewset end with a name taken whole (such as a file name, with its
+    extension). They match with or without a trailing slash, before the
+    format suffix patterns, which would otherwise split the extension of the
+    name as a format.
+    """
+
+    def get_routes(self, viewset):
+        actions = set(getattr(viewset, 'optional_slash_actions', ()))
+        return [
+            route._replace(url=route.url.replace('{trailing_slash}', '/?'))
+            if not actions.isdisjoint(route.mapping.values()) else route
+            for route in super().get_routes(viewset)
+        ]
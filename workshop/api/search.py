@@ -0,0 +1,39 @@
+"""Full-text search of the scripts, with an inverted index.
+
+Searching with `LIKE '%term%'` reads the descriptions and the contents of
+the files of every script, on every search. Instead, the words (tokens) of
+the scripts (with the names of their files) are stored in the ScriptToken
+table (see models.py), and the words of the contents of the files in the
+BlobToken table (once per content, when it is first stored). Both are
+indexed by token, and each term of a search is looked up as the beginning of
+tokens, which is a range of the indexes.
+
+Tokens are the lowercase words of the texts (letters and digits, split at
+spaces, punctuation and underscores), truncated to MAX_TOKEN_LENGTH. A term
+matches a script when each of its tokens begins a token of the script, in
+one of the SEARCH_FIELDS: "hel" finds "Hello", and "print_hello" finds
+"print('hello')". Unlike LIKE, a term doesn't match in the middle of a word.
+"""
+import re
+
+# The words of the texts (without the underscores, so that the parts of
+# identifiers are words)
+TOKEN_RE = re.compile(r'[^\W_]+')
+
+# Maximum length of the tokens (longer words are indexed by their beginning)
+MAX_TOKEN_LENGTH = 64
+
+# The fields of the scripts indexed with their texts, and all the searched
+# fields (the names and contents of the files, and the names of the tags and
+# OS)
+TEXT_FIELDS = ('id', 'name', 'short_description', 'long_description',
+               'language', 'version', 'licence', 'author')
+SEARCH_FIELDS = TEXT_FIELDS + ('files', 'tags', 'compatibility')
+
+
+def tokenize(*texts) -> set:
+    """Return the tokens of texts."""
+    return {
+        token[:MAX_TOKEN_LENGTH]
+        for text in texts for token in TOKEN_RE.findall(str(text).lower())
+    }
@@ -1,13 +1,25 @@
+import uuid
+
 from django.contrib.auth.models import Group
+from django.core.exceptions import ValidationError
 from rest_framework import serializers, exceptions
+from rest_framework.reverse import reverse
+from rest_framework.utils import model_meta
 
 # Import the models from the models.py file
-from workshop.api.models import Script, Rating, OS, Tag, User
+from workshop.api.models import Script, ScriptChange, ScriptRevision, Rating, OS, Tag, User
+
+# Import the validators from the validators.py file
+from workshop.api.validators import validate_script_files
+
+# Import the sparse fieldsets from the fieldsets.py file
+from workshop.api.fieldsets import ExpandableFieldsMixin, SparseFieldsMixin
 
 # Serializers define the API representation.
 
 
-class UserSerializer(serializers.HyperlinkedModelSerializer):
+class UserSerializer(SparseFieldsMixin,
+                     serializers.HyperlinkedModelSerializer):
     """A serializer for the User model."""
 
     class Meta:
@@ -57,7 +69,7 @@ class UserSerializer(serializers.HyperlinkedModelSerializer):
                 .to_representation(instance)
 
             # Remove the password from the representation
-            representation.pop('password')
+            representation.pop('password', None)
 
             # Return the representation
             return representation
@@ -66,53 +78,41 @@ class UserSerializer(serializers.HyperlinkedModelSerializer):
         representation = super(UserSerializer, self)\
             .to_representation(instance)
 
-        # Remove private scripts querying the database with a filter
-        queryset = Script.objects.filter(author=instance, is_public=True,
-                                         is_unlisted=False)
-        queryset |= Script.objects.filter(
-            author=instance,
-            collaborators=self.context['request'].user
-        )
-        queryset = queryset.distinct()
-        representation['scripts'] = ScriptSerializer(
-            queryset,
-            many=True,
-            context={'request': self.context['request']}
-        ).data
-        representation['scripts'] = [script['url']
-                                     for script in representation['scripts']]
+        # Remove private scripts querying the database with a filter (only
+        # their ids are needed to build their URLs), unless the visible
+        # scripts were prefetched by the view
+        request = self.context['request']
+        visible_scripts = Script.objects.visible_to(request.user)
+        prefetched = getattr(instance, '_prefetched_objects_cache', {})
+        if 'scripts' in representation and 'scripts' not in prefetched:
+            representation['scripts'] = [
+                reverse('script-detail', kwargs={'pk': pk}, request=request)
+                for pk in visible_scripts.filter(author=instance).values_list(
+                    'pk', flat=True
+                )
+            ]
 
         # Remove private collaborations querying the database with a filter
-        queryset = Script.objects.filter(collaborators=instance,
-                                         is_public=True, is_unlisted=False)
-        queryset |= Script.objects.filter(
-            collaborators=instance,
-            author=self.context['request'].user
-        )
-        queryset |= Script.objects.filter(collaborators=instance)\
-            .filter(collaborators=self.context['request'].user)
-        queryset = queryset.distinct()
-        representation['collaborations'] = ScriptSerializer(
-            queryset,
-            many=True,
-            context={'request': self.context['request']}
-        ).data
-        representation['collaborations'] = [
-            script['url'] for script in representation['collaborations']
-        ]
-
-        # Return only the url and username
+        if 'collaborations' in representation \
+                and 'collaborations' not in prefetched:
+            representation['collaborations'] = [
+                reverse('script-detail', kwargs={'pk': pk}, request=request)
+                for pk in visible_scripts.filter(
+                    collaborators=instance
+                ).values_list('pk', flat=True)
+            ]
+
+        # Return only the public fields (of the fields that were asked for)
         return {
-            'url': representation['url'],
-            'username': representation['username'],
-            'groups': representation['groups'],
-            'scripts': representation['scripts'],
-            'collaborations': representation['collaborations'],
-            'ratings': representation['ratings']
+            key: representation[key]
+            for key in ('url', 'username', 'groups', 'scripts',
+                        'collaborations', 'ratings')
+            if key in representation
         }
 
 
-class GroupSerializer(serializers.HyperlinkedModelSerializer):
+class GroupSerializer(SparseFieldsMixin,
+                      serializers.HyperlinkedModelSerializer):
     """Serializer for the Group model."""
 
     class Meta:
@@ -124,9 +124,167 @@ class GroupSerializer(serializers.HyperlinkedModelSerializer):
         read_only_fields = ['user_set']
 
 
-class ScriptSerializer(serializers.HyperlinkedModelSerializer):
+# Compact representations of the related objects inlined with ?expand=
+
+
+class UserCompactSerializer(serializers.HyperlinkedModelSerializer):
+    """Compact serializer for the User model (public fields only)."""
+
+    class Meta:
+        """Meta class for the UserCompactSerializer."""
+
+        model = User
+        fields = ['url', 'username']
+
+
+class ScriptCompactSerializer(serializers.HyperlinkedModelSerializer):
+    """Compact serializer for the Script model."""
+
+    class Meta:
+        """Meta class for the ScriptCompactSerializer."""
+
+        model = Script
+        fields = ['url', 'id', 'name', 'short_description', 'author']
+
+
+class RatingCompactSerializer(serializers.HyperlinkedModelSerializer):
+    """Compact serializer for the Rating model."""
+
+    class Meta:
+        """Meta class for the RatingCompactSerializer."""
+
+        model = Rating
+        fields = ['url', 'rating', 'comment', 'user', 'created']
+
+
+class OSCompactSerializer(serializers.HyperlinkedModelSerializer):
+    """Compact serializer for the OS model."""
+
+    class Meta:
+        """Meta class for the OSCompactSerializer."""
+
+        model = OS
+        fields = ['url', 'name', 'homepage']
+
+
+class TagCompactSerializer(serializers.HyperlinkedModelSerializer):
+    """Compact serializer for the Tag model."""
+
+    class Meta:
+        """Meta class for the TagCompactSerializer."""
+
+        model = Tag
+        fields = ['url', 'name', 'description']
+
+
+class ScriptFilesField(serializers.JSONField):
+    """The files of a script, with their names and contents.
+
+    The script only stores a manifest of its files (see Script.set_files),
+    so the contents are read from their blobs.
+    """
+
+    def get_attribute(self, instance):
+        return instance.get_files()
+
+
+class CachedHyperlinkedRelatedField(serializers.HyperlinkedRelatedField):
+    """A hyperlinked related field that loads each object once.
+
+    The objects are cached by URL in the context of the serializer, so that
+    the scripts of a bulk request linking the same tags, OS and users don't
+    resolve and load them again for each script.
+    """
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            return super().to_internal_value(data)
+        cache = self.context.setdefault('related_objects', {})
+        key = (self.view_name, data)
+        if key not in cache:
+            cache[key] = super().to_internal_value(data)
+        return cache[key]
+
+
+class BulkScriptListSerializer(serializers.ListSerializer):
+    """Create or update several scripts at once.
+
+    Scripts are created with bulk inserts (see ScriptQuerySet.create_in_bulk),
+    and updated one by one. To update scripts, the serializer is given the
+    scripts the user can edit by id, and each script of the data has its id.
+    The errors are reported for each script, by index.
+    """
+
+    def run_child_validation(self, data):
+        """Validate a script, with the script it updates."""
+        if self.instance is None:
+            return super().run_child_validation(data)
+
+        script = None
+        if isinstance(data, dict):
+            try:
+                script = self.instance.get(uuid.UUID(str(data.get('id'))))
+            except ValueError:
+                pass
+        if script is None:
+            raise serializers.ValidationError({
+                'id': "Unknown script, or not editable."
+            })
+
+        # Only the author can change the collaborators
+        user = self.context['request'].user
+        if 'collaborators' in data and script.author_id != user.pk \
+                and not user.is_superuser:
+            raise serializers.ValidationError({
+                'collaborators': "Only the author can change the "
+                                 "collaborators."
+            })
+
+        self.child.instance = script
+        self.child.initial_data = data
+        attrs = super().run_child_validation(data)
+        attrs['id'] = script.pk
+        return attrs
+
+    def create(self, validated_data: list) -> list:
+        """Create the scripts, with bulk inserts."""
+        relations_info = model_meta.get_field_info(Script).relations
+        author = self.context['request'].user
+
+        scripts, relations = [], []
+        for attrs in validated_data:
+            attrs = {name: value for name, value in attrs.items()
+                     if name != 'file_operations'}
+            relations.append({
+                name: attrs.pop(name) for name, info in relations_info.items()
+                if info.to_many and name in attrs
+            })
+            script = Script(author=author, **attrs)
+            script.set_files(script.files)
+            scripts.append(script)
+        return Script.objects.create_in_bulk(scripts, relations)
+
+    def update(self, instance: dict, validated_data: list) -> list:
+        """Update the scripts, one by one."""
+        return [self.child.update(instance[attrs.pop('id')], attrs)
+                for attrs in validated_data]
+
+
+class ScriptSerializer(SparseFieldsMixin, ExpandableFieldsMixin,
+                       serializers.HyperlinkedModelSerializer):
     """Serializer for the Script model."""
 
+    # Load each linked tag, OS and user once per request
+    serializer_related_field = CachedHyperlinkedRelatedField
+
+    files = ScriptFilesField(validators=[validate_script_files])
+
+    # Edit the files with operations (see patches.py) instead of sending them
+    # all, when updating a script
+    file_operations = serializers.ListField(
+        child=serializers.DictField(), write_only=True, required=False
+    )
+
     class Meta:
         """Meta class for the ScriptSerializer."""
 
@@ -134,11 +292,26 @@ class ScriptSerializer(serializers.HyperlinkedModelSerializer):
         fields = ['url', 'name', 'created', 'modified', 'language', 'version',
                   'short_description', 'long_description', 'ratings', 'author',
                   'collaborators', 'files', 'licence', 'compatibility', 'views',
-                  'id', 'tags', 'is_public', 'is_unlisted', 'runner']
+                  'id', 'tags', 'is_public', 'is_unlisted', 'runner',
+                  'file_count', 'total_size', 'unique_views',
+                  'file_operations']
 
         # Set the read_only fields
         read_only_fields = ['created', 'modified', 'downloads', 'views',
-                            'author', 'ratings']
+                            'author', 'ratings', 'file_count', 'total_size',
+                            'unique_views']
+
+        # Several scripts are created or updated at once with many=True
+        list_serializer_class = BulkScriptListSerializer
+
+        # The related objects that can be inlined (?expand=)
+        expandable_fields = {
+            'author': UserCompactSerializer,
+            'collaborators': UserCompactSerializer,
+            'ratings': RatingCompactSerializer,
+            'compatibility': OSCompactSerializer,
+            'tags': TagCompactSerializer,
+        }
 
     # Handle the author field (can't be changed by the user, for now)
     def create(self, validated_data: dict) -> Script:
@@ -149,8 +322,106 @@ class ScriptSerializer(serializers.HyperlinkedModelSerializer):
         # Return the created script
         return super().create(validated_data)
 
+    def update(self, instance: Script, validated_data: dict) -> Script:
+        """Update a Script object."""
+        # The file operations are already applied by validate()
+        validated_data.pop('file_operations', None)
+
+        # Record the user editing the script as the author of the revision
+        instance._revision_author = self.context['request'].user.pk
+        return super().update(instance, validated_data)
+
+    def validate(self, attrs: dict) -> dict:
+        """Apply the file operations to the script being updated."""
+        operations = attrs.get('file_operations')
+        if operations is not None:
+            if self.instance is None:
+                raise serializers.ValidationError({
+                    'file_operations': "Files can only be edited on updates."
+                })
+            if 'files' in attrs:
+                raise serializers.ValidationError({
+                    'file_operations': "Files can't be both sent and edited."
+                })
+            try:
+                self.instance.edit_files(operations)
+            except ValidationError as error:
+                raise serializers.ValidationError({
+                    'file_operations': error.messages
+                })
+        return attrs
+
+
+class ScriptSummarySerializer(ScriptSerializer):
+    """Serializer for the Script model, without the content of the script.
+
+    Used for lists, where loading the files of every script would be too
+    expensive. The files are only available when retrieving a single script.
+    """
+
+    class Meta(ScriptSerializer.Meta):
+        """Meta class for the ScriptSummarySerializer."""
+
+        fields = ['url', 'name', 'created', 'modified', 'language', 'version',
+                  'short_description', 'ratings', 'author', 'collaborators',
+                  'licence', 'compatibility', 'views', 'id', 'tags',
+                  'is_public', 'is_unlisted', 'runner', 'file_count',
+                  'total_size', 'unique_views']
+
+        # The fields of the model that are not needed for the summary, and
+        # thus don't have to be loaded from the database
+        deferred_fields = ['files', 'long_description']
+
+
+class ScriptRevisionSerializer(SparseFieldsMixin,
+                               serializers.ModelSerializer):
+    """Serializer for the ScriptRevision model, without the files."""
+
+    url = serializers.SerializerMethodField()
+    author = serializers.HyperlinkedRelatedField(view_name='user-detail',
+                                                 read_only=True)
+    file_count = serializers.SerializerMethodField()
+
+    class Meta:
+        """Meta class for the ScriptRevisionSerializer."""
+
+        model = ScriptRevision
+        fields = ['url', 'number', 'created', 'author', 'file_count']
 
-class RatingSerializer(serializers.HyperlinkedModelSerializer):
+    def get_url(self, instance: ScriptRevision) -> str:
+        """Return the URL of the revision."""
+        return reverse('script-revision', kwargs={
+            'pk': instance.script_id, 'number': instance.number
+        }, request=self.context['request'])
+
+    def get_file_count(self, instance: ScriptRevision) -> int:
+        """Return the number of files of the revision."""
+        return len(instance.files)
+
+
+class ScriptRevisionDetailSerializer(ScriptRevisionSerializer):
+    """Serializer for the ScriptRevision model, with the files."""
+
+    files = ScriptFilesField(read_only=True)
+
+    class Meta(ScriptRevisionSerializer.Meta):
+        """Meta class for the ScriptRevisionDetailSerializer."""
+
+        fields = ScriptRevisionSerializer.Meta.fields + ['files']
+
+
+class ScriptChangeSerializer(serializers.ModelSerializer):
+    """Serializer for the ScriptChange model."""
+
+    class Meta:
+        """Meta class for the ScriptChangeSerializer."""
+
+        model = ScriptChange
+        fields = ['script', 'action', 'created']
+
+
+class RatingSerializer(SparseFieldsMixin, ExpandableFieldsMixin,
+                       serializers.HyperlinkedModelSerializer):
     """Serializer for the Rating model."""
 
     class Meta:
@@ -163,6 +434,12 @@ class RatingSerializer(serializers.HyperlinkedModelSerializer):
         # Set the read_only fields
         read_only_fields = ['user']
 
+        # The related objects that can be inlined (?expand=)
+        expandable_fields = {
+            'user': UserCompactSerializer,
+            'script': ScriptCompactSerializer,
+        }
+
     # Handle the user field (can't be changed by the user, for now)
     def create(self, validated_data: dict) -> Rating:
         """Create a new Rating object."""
@@ -173,7 +450,8 @@ class RatingSerializer(serializers.HyperlinkedModelSerializer):
         return super().create(validated_data)
 
 
-class OSSerializer(serializers.HyperlinkedModelSerializer):
+class OSSerializer(SparseFieldsMixin,
+                   serializers.HyperlinkedModelSerializer):
     """Serializer for the OS model."""
 
     class Meta:
@@ -186,7 +464,8 @@ class OSSerializer(serializers.HyperlinkedModelSerializer):
         read_only_fields = ['version', 'script_set']
 
 
-class TagSerializer(serializers.HyperlinkedModelSerializer):
+class TagSerializer(SparseFieldsMixin,
+                    serializers.HyperlinkedModelSerializer):
     """Serializer for the Tag model."""
 
     class Meta:
@@ -199,7 +478,8 @@ class TagSerializer(serializers.HyperlinkedModelSerializer):
         read_only_fields = ['version', 'script_set']
 
 
-class RegisterSerializer(serializers.HyperlinkedModelSerializer):
+class RegisterSerializer(SparseFieldsMixin,
+                         serializers.HyperlinkedModelSerializer):
     """Serializer for the User model."""
 
     class Meta:
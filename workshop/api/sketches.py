@@ -0,0 +1,61 @@
+"""Probabilistic sketches for Upsilon Workshop."""
+import hashlib
+import math
+
+
+class HyperLogLog:
+    """Fixed-size sketch estimating the number of distinct values added to it.
+
+    The sketch uses 2 ** PRECISION one-byte registers (1 KiB), whatever the
+    number of values, with a standard error of about 3%. Sketches are merged
+    by taking the maximum of each register, so they can be built separately
+    (by each process) and combined later.
+    """
+
+    PRECISION = 10
+    SIZE = 1 << PRECISION
+
+    def __init__(self, registers: bytes = b''):
+        """Create a sketch from its registers (empty if not given)."""
+        if registers and len(registers) != self.SIZE:
+            raise ValueError(f"A sketch has {self.SIZE} registers, "
+                             f"not {len(registers)}")
+        self.registers = bytearray(registers or self.SIZE)
+
+    def add(self, value: bytes) -> None:
+        """Add a value to the sketch."""
+        digest = hashlib.blake2b(value, digest_size=8).digest()
+        hashed = int.from_bytes(digest, 'big')
+
+        # The first bits select the register, which keeps the highest
+        # position of the first 1 bit in the remaining bits
+        index = hashed >> (64 - self.PRECISION)
+        remaining = hashed & ((1 << (64 - self.PRECISION)) - 1)
+        rank = 64 - self.PRECISION - remaining.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: 'HyperLogLog') -> None:
+        """Add the values of another sketch to this one."""
+        self.registers = bytearray(
+            max(mine, theirs)
+            for mine, theirs in zip(self.registers, other.registers)
+        )
+
+    def count(self) -> int:
+        """Return the estimated number of distinct values."""
+        alpha = 0.7213 / (1 + 1.079 / self.SIZE)
+        estimate = alpha * self.SIZE ** 2 / sum(
+            2.0 ** -register for register in self.registers
+        )
+
+        # Use linear counting for small cardinalities, where the raw estimate
+        # is biased
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * self.SIZE and zeros:
+            estimate = self.SIZE * math.log(self.SIZE / zeros)
+        return round(estimate)
+
+    def to_bytes(self) -> bytes:
+        """Return the registers of the sketch, to store it."""
+        return bytes(self.registers)
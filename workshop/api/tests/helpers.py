@@ -0,0 +1,35 @@
+"""Helpers shared by the tests of the API."""
+# Import the models to create the scripts directly
+from workshop.api.models import Rating, Script
+
+# The content of the file of the scripts, when no files are given
+DEFAULT_CONTENT = "print('Hello!')"
+
+
+def create_script(author, name: str = "script", files: list = None, *,
+                  collaborators=(), tags=(), compatibility=(), raters=(),
+                  comment: str = "", **fields) -> Script:
+    """Create a Python script, with its collaborators, tags and OS.
+
+    The script has a single test.py file when no files are given. Each of
+    the raters rates it 4 stars, with the comment.
+    """
+    script = Script.objects.create(
+        name=name,
+        author=author,
+        language="python",
+        files=files if files is not None else [
+            {"name": "test.py", "content": DEFAULT_CONTENT}
+        ],
+        **fields
+    )
+    if collaborators:
+        script.collaborators.set(collaborators)
+    if tags:
+        script.tags.set(tags)
+    if compatibility:
+        script.compatibility.set(compatibility)
+    for user in raters:
+        Rating.objects.create(rating=4, comment=comment, user=user,
+                              script=script)
+    return script
@@ -0,0 +1,193 @@
+"""Tests for the storage of the script files as blobs."""
+from io import StringIO
+
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+# Import the models to create the scripts directly
+from workshop.api.models import Blob, Script, User
+from workshop.api.tests.helpers import create_script
+
+
+class BlobTest(TestCase):
+    """Test that the contents of the files are deduplicated."""
+
+    def setUp(self):
+        """Create a user and two scripts sharing a file."""
+        self.user = User.objects.create_user("user", "user@example.com",
+                                             "password")
+        self.common = {"name": "common.py", "content": "def helper(): pass"}
+        self.script = Script.objects.create(
+            name="script",
+            author=self.user,
+            language="python",
+            files=[{"name": "main.py", "content": "print('main')"},
+                   self.common],
+        )
+        self.fork = Script.objects.create(
+            name="fork",
+            author=self.user,
+            language="python",
+            files=[{"name": "main.py", "content": "print('fork')"},
+                   self.common],
+        )
+
+    def test_manifest(self):
+        """Test that the scripts only store the manifest of their files."""
+        script = Script.objects.get(pk=self.script.pk)
+        self.assertEqual(script.files, [
+            {"name": "main.py", "hash": Blob.from_content("print('main')").hash,
+             "size": 13},
+            {"name": "common.py",
+             "hash": Blob.from_content(self.common['content']).hash,
+             "size": 18},
+        ])
+        self.assertEqual(script.get_files(), [
+            {"name": "main.py", "content": "print('main')"}, self.common
+        ])
+
+        # The common file is only stored once
+        self.assertEqual(Blob.objects.count(), 3)
+        self.assertEqual(script.blobs.count(), 2)
+
+    def test_api(self):
+        """Test that the API still reads and writes the contents."""
+        self.client.force_login(self.user)
+        files = [{"name": "main.py", "content": "print('updated')"},
+                 self.common]
+        response = self.client.patch(f"/scripts/{self.script.id}/",
+                                     {"files": files},
+                                     content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['files'], files)
+
+        response = self.client.get(f"/scripts/{self.script.id}/")
+        self.assertEqual(response.data['files'], files)
+        self.assertEqual(
+            Script.objects.filter(blobs__content="print('updated')").get(),
+            self.script
+        )
+
+    def test_manifest_validation(self):
+        """Test the validation of the manifest of the files."""
+        script = Script.objects.get(pk=self.script.pk)
+        script.full_clean()
+        manifest = script.files
+
+        # The files can still be given with their contents
+        script.files = [{"name": "main.py", "content": "print('new')"}]
+        script.full_clean()
+
+        for files in (
+            [],
+            "main.py",
+            [{"name": "main.py"}],
+            [{**manifest[0], "extra": True}],
+            [{**manifest[0], "hash": "not a hash"}],
+            [{**manifest[0], "size": -1}],
+            [{**manifest[0], "name": "main"}],
+            [manifest[0], manifest[0]],
+            [{**manifest[0], "hash": "0" * 64}],
+            [{**manifest[0], "size": 1}],
+            [{"name": "main.py", "content": 1}],
+        ):
+            with self.subTest(files=files):
+                script.files = files
+                with self.assertRaises(ValidationError) as context:
+                    script.full_clean()
+                self.assertIn('files', context.exception.message_dict)
+
+    def test_admin_search(self):
+        """Test that the admin searches the contents of the files."""
+        admin = User.objects.create_superuser("admin", "admin@example.com",
+                                              "password")
+        self.client.force_login(admin)
+        with override_settings(SCRIPT_FILES_COMPRESSION=True):
+            compressed = Script.objects.create(
+                name="compressed", author=self.user, language="python",
+                files=[{"name": "main.py",
+                        "content": "import kandinsky\n" * 20}],
+            )
+        self.assertTrue(compressed.blobs.get().codec)
+
+        for term, names in (("kandinsky", ["compressed"]),
+                            ("helper", ["fork", "script"]),
+                            ("fork", ["fork"])):
+            with self.subTest(term=term):
+                response = self.client.get("/admin/workshop/script/",
+                                           {"q": term})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(sorted(
+                    script.name
+                    for script in response.context['cl'].result_list
+                ), names)
+
+    def test_collect_blobs(self):
+        """Test that only the unused blobs are deleted."""
+        self.fork.delete()
+        output = StringIO()
+        call_command('collect_blobs', '--dry-run', stdout=output)
+        self.assertIn("1 unused blob(s)", output.getvalue())
+        self.assertEqual(Blob.objects.count(), 3)
+
+        call_command('collect_blobs', stdout=StringIO())
+        self.assertEqual(Blob.objects.count(), 2)
+        self.assertEqual(Script.objects.get(pk=self.script.pk).get_files(),
+                         [{"name": "main.py", "content": "print('main')"},
+                          self.common])
+
+
+class CompressionTest(TestCase):
+    """Test the compression of the contents of the files."""
+
+    def setUp(self):
+        """Create a user."""
+        self.user = User.objects.create_user("user", "user@example.com",
+                                             "password")
+        self.content = "from kandinsky import *\n" + "".join(
+            f"fill_rect({index}, {index}, 10, 10, (255, 0, 0))\n"
+            for index in range(100)
+        )
+
+    def create_script(self, content: str) -> Script:
+        """Create a script with a single file."""
+        return create_script(self.user,
+                             files=[{"name": "main.py", "content": content}])
+
+    @override_settings(SCRIPT_FILES_COMPRESSION=True)
+    def test_compression(self):
+        """Test that the contents are compressed, and read transparently."""
+        script = self.create_script(self.content)
+        blob = Blob.objects.get()
+        self.assertEqual(blob.codec, 'zlib-v1')
+        self.assertEqual(blob.content, '')
+        self.assertLess(len(blob.data), blob.size // 4)
+        self.assertEqual(blob.size, len(self.content))
+
+        response = self.client.get(f"/scripts/{script.id}/")
+        self.assertEqual(response.data['files'][0]['content'], self.content)
+        response = self.client.get(f"/scripts/{script.id}/files/main.py/")
+        self.assertEqual(response.content.decode(), self.content)
+        self.assertEqual(Script.objects.get().get_files()[0]['content'],
+                         self.content)
+
+    @override_settings(SCRIPT_FILES_COMPRESSION=True)
+    def test_incompressible(self):
+        """Test that the contents are only compressed when smaller."""
+        self.create_script("x")
+        blob = Blob.objects.get()
+        self.assertEqual(blob.codec, '')
+        self.assertEqual(blob.content, "x")
+
+    def test_compress_blobs(self):
+        """Test that the existing contents can be compressed."""
+        script = self.create_script(self.content)
+        self.assertEqual(Blob.objects.get().codec, '')
+
+        output = StringIO()
+        call_command('compress_blobs', stdout=output)
+        self.assertIn("1 blob(s) compressed", output.getvalue())
+        self.assertEqual(Blob.objects.get().codec, 'zlib-v1')
+        self.assertEqual(Script.objects.get(pk=script.pk).get_files(),
+                         [{"name": "main.py", "content": self.content}])
@@ -0,0 +1,140 @@
+"""Tests for the retrieval of several objects at once (?ids=)."""
+import uuid
+
+from django.test import TestCase, override_settings
+
+# Import the models to create the objects directly
+from workshop.api.models import Script, Rating, Tag, User
+from workshop.api.tests.helpers import create_script
+
+
+# Count the results of every list, instead of using cached counts
+@override_settings(PAGINATION_COUNT_CACHE_TIMEOUT=0,
+                   SCRIPT_VIEWS_FLUSH_INTERVAL=3600)
+class BulkRetrieveTest(TestCase):
+    """Test the bulk retrieval of scripts, users and ratings."""
+
+    def setUp(self):
+        """Create users, scripts and ratings."""
+        self.users = [
+            User.objects.create_user(f"user{index}", f"user{index}@a.com",
+                                     "password")
+            for index in range(3)
+        ]
+        self.tag = Tag.objects.create(name="tag")
+        self.scripts = [self.create_script(index) for index in range(5)]
+        self.private = self.create_script(5, is_public=False)
+        self.unlisted = self.create_script(6, is_unlisted=True)
+
+    def create_script(self, index: int, **fields) -> Script:
+        """Create a script with a collaborator, a tag and ratings."""
+        return create_script(self.users[0], f"script{index}",
+                             collaborators=[self.users[1]], tags=[self.tag],
+                             raters=self.users, **fields)
+
+    def get_ids(self, url: str) -> set:
+        """Return the ids of the objects of a list."""
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return {result['url'].rstrip('/').rsplit('/', 1)[1]
+                for result in response.data['results']}
+
+    def test_scripts(self):
+        """Test the retrieval of scripts by id."""
+        requested = [self.scripts[0], self.scripts[3], self.private,
+                     self.unlisted]
+        url = "/scripts/?ids=" + ",".join(str(script.id)
+                                          for script in requested)
+
+        # Unlisted scripts can be requested by id, but not private ones
+        self.assertEqual(self.get_ids(url), {
+            str(self.scripts[0].id), str(self.scripts[3].id),
+            str(self.unlisted.id)
+        })
+        self.client.force_login(self.users[1])
+        self.assertEqual(self.get_ids(url),
+                         {str(script.id) for script in requested})
+
+        # Unknown ids are left out
+        self.assertEqual(self.get_ids(f"/scripts/?ids={uuid.uuid4()}"),
+                         set())
+
+    def test_script_queries(self):
+        """Test that the number of queries doesn't depend on the ids."""
+        for scripts in (self.scripts[:1], self.scripts):
+            url = "/scripts/?ids=" + ",".join(str(script.id)
+                                              for script in scripts)
+            # ETag (last modification, last change and last deletion),
+            # count, scripts, ratings, collaborators, compatibility, tags
+            with self.assertNumQueries(9):
+                response = self.client.get(url)
+            self.assertEqual(len(response.data['results']), len(scripts))
+
+    def test_invalid_ids(self):
+        """Test that invalid and too many ids are rejected."""
+        response = self.client.get("/scripts/?ids=1,2")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('ids', response.data)
+
+        with self.settings(BULK_RETRIEVE_MAX_IDS=2):
+            response = self.client.get("/scripts/?ids=" + ",".join(
+                str(script.id) for script in self.scripts
+            ))
+        self.assertEqual(response.status_code, 400)
+
+        # Empty lists of ids
+        for url in ("/scripts/?ids=", "/scripts/?ids=,", "/scripts/?ids=, ",
+                    "/ratings/?ids=", "/users/?usernames=",
+                    "/scripts/?ids=&count=false"):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(set(response.data),
+                                 {url.split('?')[1].split('=')[0]})
+
+        # Spaces around the ids are ignored
+        response = self.client.get(f"/scripts/?ids= {self.scripts[0].id} ,")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 1)
+
+    def test_users(self):
+        """Test the retrieval of users by username."""
+        response = self.client.get("/users/?usernames=user0,user2,unknown")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual({user['username']
+                          for user in response.data['results']},
+                         {"user0", "user2"})
+
+        response = self.client.get("/users/?usernames=user0,user1")
+        results = {user['username']: user
+                   for user in response.data['results']}
+        self.assertEqual(set(results), {"user0", "user1"})
+
+        # Private scripts are hidden from other users
+        self.assertEqual(len(results['user0']['scripts']), 5)
+        self.assertEqual(len(results['user1']['collaborations']), 5)
+        self.assertEqual(len(results['user1']['ratings']), 7)
+
+        self.client.force_login(self.users[0])
+        response = self.client.get("/users/?usernames=user0")
+        self.assertEqual(len(response.data['results'][0]['scripts']), 7)
+
+    def test_user_queries(self):
+        """Test that the number of queries doesn't depend on the users."""
+        for users in (self.users[:1], self.users):
+            url = "/users/?usernames=" + ",".join(user.username
+                                                  for user in users)
+            # Count, users, groups, scripts, collaborations, ratings
+            with self.assertNumQueries(6):
+                response = self.client.get(url)
+            self.assertEqual(len(response.data['results']), len(users))
+
+    def test_ratings(self):
+        """Test the retrieval of ratings by id."""
+        ratings = Rating.objects.filter(script=self.scripts[0])
+        url = "/ratings/?ids=" + ",".join(str(rating.id)
+                                          for rating in ratings)
+        # Count, ratings
+        with self.assertNumQueries(2):
+            ids = self.get_ids(url)
+        self.assertEqual(ids, {str(rating.id) for rating in ratings})
@@ -0,0 +1,152 @@
+"""Tests for the creation and update of several scripts at once."""
+from django.test import TestCase
+
+# Import the models to check the saved scripts
+from workshop.api.models import Blob, OS, Script, ScriptRevision, Tag, User
+
+
+class BulkWriteTest(TestCase):
+    """Test the /scripts/bulk/ endpoint."""
+
+    def setUp(self):
+        """Create users, tags and OS."""
+        self.user = User.objects.create_user("user", "user@example.com",
+                                             "password")
+        self.other = User.objects.create_user("other", "other@example.com",
+                                              "password")
+        self.tags = [Tag.objects.create(name=f"tag{index}")
+                     for index in range(2)]
+        self.os = OS.objects.create(name="os")
+        self.client.force_login(self.user)
+
+    def make_script(self, index: int, **fields) -> dict:
+        """Return the data of a script."""
+        return {
+            "name": f"script{index}",
+            "language": "python",
+            "files": [{"name": "main.py", "content": f"print({index})"},
+                      {"name": "lib.py", "content": "shared = True"}],
+            "tags": [f"http://testserver/tags/{tag.name}/"
+                     for tag in self.tags],
+            "compatibility": ["http://testserver/os/os/"],
+            "collaborators": ["http://testserver/users/other/"],
+            **fields
+        }
+
+    def post(self, data, method="post"):
+        """Send scripts to the bulk endpoint."""
+        return getattr(self.client, method)("/scripts/bulk/", data,
+                                            content_type="application/json")
+
+    def test_create(self):
+        """Test the creation of scripts."""
+        tag_modified = self.tags[0].modified
+        data = [self.make_script(index) for index in range(20)]
+
+        # Session, linked objects (once each), blobs and their tokens,
+        # scripts, links, tags and OS, revisions, tokens (in two batches on
+        # SQLite), changes, and the response (the queries don't depend on the
+        # number of scripts, but on the batches of the inserts)
+        with self.assertNumQueries(29):
+            response = self.post(data)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([script['name'] for script in response.data],
+                         [script['name'] for script in data])
+
+        scripts = Script.objects.all()
+        self.assertEqual(scripts.count(), 20)
+        script = scripts.get(name="script3")
+        self.assertEqual(script.author, self.user)
+        self.assertEqual(script.get_files(), data[3]['files'])
+        self.assertEqual(script.file_count, 2)
+        self.assertEqual(set(script.tags.all()), set(self.tags))
+        self.assertEqual(list(script.compatibility.all()), [self.os])
+        self.assertEqual(list(script.collaborators.all()), [self.other])
+        self.assertEqual(script.blobs.count(), 2)
+
+        # The shared file is stored once
+        self.assertEqual(Blob.objects.count(), 21)
+
+        # The first revisions are recorded
+        revision = ScriptRevision.objects.get(script=script)
+        self.assertTrue(revision.is_checkpoint)
+        self.assertEqual(revision.get_files(), data[3]['files'])
+
+        # The lists of the tags changed
+        self.tags[0].refresh_from_db()
+        self.assertGreater(self.tags[0].modified, tag_modified)
+
+    def test_errors(self):
+        """Test that invalid scripts are reported, and nothing is saved."""
+        data = [self.make_script(0), self.make_script(1, language="cobol"),
+                self.make_script(2, files=[]),
+                self.make_script(3, tags=["http://testserver/tags/none/"])]
+        response = self.post(data)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data), {1, 2, 3})
+        self.assertIn('language', response.data[1])
+        self.assertIn('files', response.data[2])
+        self.assertIn('tags', response.data[3])
+        self.assertFalse(Script.objects.exists())
+        self.assertFalse(Blob.objects.exists())
+
+        response = self.post({"name": "not a list"})
+        self.assertEqual(response.status_code, 400)
+        with self.settings(BULK_WRITE_MAX_SCRIPTS=2):
+            response = self.post([self.make_script(index)
+                                  for index in range(3)])
+        self.assertEqual(response.status_code, 400)
+
+        self.client.logout()
+        self.assertEqual(self.post([self.make_script(0)]).status_code, 401)
+
+    def test_format_suffix(self):
+        """Test the bulk endpoint with a format suffix."""
+        response = self.client.post("/scripts/bulk.json",
+                                    [self.make_script(0)],
+                                    content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response['Content-Type'], "application/json")
+        self.assertEqual(response.json()[0]['name'], "script0")
+
+    def test_update(self):
+        """Test the update of scripts."""
+        response = self.post([self.make_script(index) for index in range(3)])
+        ids = [script['id'] for script in response.data]
+        mine = Script.objects.create(
+            name="other", author=self.other, language="python",
+            files=[{"name": "main.py", "content": "pass"}]
+        )
+
+        response = self.post([
+            {"id": ids[0], "name": "renamed"},
+            {"id": ids[2], "file_operations": [
+                {"op": "replace", "name": "main.py", "content": "print(42)"},
+            ]},
+        ], method="patch")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Script.objects.get(pk=ids[0]).name, "renamed")
+        script = Script.objects.get(pk=ids[2])
+        self.assertEqual(script.get_files()[0]['content'], "print(42)")
+        self.assertEqual(script.revisions.count(), 2)
+
+        # Scripts of other users can't be updated, and nothing is saved
+        response = self.post([
+            {"id": ids[1], "name": "renamed"},
+            {"id": str(mine.id), "name": "stolen"},
+            {"name": "no id"},
+        ], method="patch")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(set(response.data), {1, 2})
+        self.assertEqual(Script.objects.get(pk=ids[1]).name, "script1")
+        self.assertEqual(Script.objects.get(pk=mine.id).name, "other")
+
+        # Collaborators can edit the scripts, but not their collaborators
+        self.client.force_login(self.other)
+        response = self.post([{"id": ids[1], "name": "edited"}],
+                             method="patch")
+        self.assertEqual(response.status_code, 200)
+        response = self.post([{"id": ids[1], "collaborators": []}],
+                             method="patch")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('collaborators', response.data[0])
@@ -0,0 +1,179 @@
+"""Tests for the archives of the scripts (/scripts/<id>/bundle.zip)."""
+import io
+import os
+import shutil
+import tarfile
+import tempfile
+import threading
+import time
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+# Import the models to create the scripts directly
+from workshop.api.models import Script, User
+from workshop.api import bundles
+
+
+class BundleTest(TestCase):
+    """Test the archives of the files of the scripts."""
+
+    def setUp(self):
+        """Create a script, and a directory for the archives."""
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        settings = override_settings(SCRIPT_BUNDLES_DIR=self.directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+        self.user = User.objects.create_user("user", "user@example.com",
+                                             "password")
+        self.files = [{"name": "main.py", "content": "import lib # é\n"},
+                      {"name": "lib.py", "content": "print('Hello!')\n"}]
+        self.script = Script.objects.create(name="My script", author=self.user,
+                                            language="python",
+                                            files=self.files)
+        self.url = f"/scripts/{self.script.id}/bundle"
+
+    def test_zip(self):
+        """Test the zip archive."""
+        response = self.client.get(self.url + ".zip")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], "application/zip")
+        self.assertIn('attachment; filename="my-script.zip"',
+                      response['Content-Disposition'])
+        self.assertIn('ETag', response)
+
+        with zipfile.ZipFile(io.BytesIO(b"".join(response))) as archive:
+            self.assertEqual(archive.namelist(), ["main.py", "lib.py"])
+            self.assertEqual(archive.read("main.py").decode(),
+                             self.files[0]['content'])
+
+    def test_tar(self):
+        """Test the tar archive, also negotiated with the Accept header."""
+        for response in (
+            self.client.get(self.url + ".tar"),
+            self.client.get(self.url + "/", HTTP_ACCEPT="application/x-tar"),
+        ):
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response['Content-Type'], "application/x-tar")
+            with tarfile.open(fileobj=io.BytesIO(b"".join(response))) \
+                    as archive:
+                self.assertEqual(archive.getnames(), ["main.py", "lib.py"])
+                self.assertEqual(
+                    archive.extractfile("lib.py").read().decode(),
+                    self.files[1]['content']
+                )
+
+        self.assertEqual(self.client.get(self.url + ".rar").status_code, 404)
+
+    def test_cached(self):
+        """Test that each version of the files is built once."""
+        with mock.patch.dict(bundles.FORMATS,
+                             zip=mock.Mock(wraps=bundles.build_zip)) as formats:
+            first = b"".join(self.client.get(self.url + ".zip"))
+            second = b"".join(self.client.get(self.url + ".zip"))
+            self.assertEqual(formats['zip'].call_count, 1)
+            self.assertEqual(first, second)
+
+            # Identical files are the same archive, for any script
+            Script.objects.create(name="Copy", author=self.user,
+                                  language="python", files=self.files)
+            self.client.get(f"/scripts/{Script.objects.get(name='Copy').id}"
+                            f"/bundle.zip")
+            self.assertEqual(formats['zip'].call_count, 1)
+
+            # A new version of the files is a new archive
+            self.script.files = [{"name": "main.py", "content": "pass"}]
+            self.script.save()
+            self.client.get(self.url + ".zip")
+            self.assertEqual(formats['zip'].call_count, 2)
+
+        self.assertEqual(len(os.listdir(self.directory)), 2)
+
+    def test_deterministic(self):
+        """Test that rebuilding an archive gives the same bytes."""
+        first = b"".join(self.client.get(self.url + ".tar"))
+        shutil.rmtree(self.directory)
+        time.sleep(1)
+        second = b"".join(self.client.get(self.url + ".tar"))
+        self.assertEqual(first, second)
+
+    def test_not_modified(self):
+        """Test the conditional requests."""
+        etag = self.client.get(self.url + ".zip")['ETag']
+        response = self.client.get(self.url + ".zip", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_interrupted_build(self):
+        """Test that an interrupted build doesn't block the archive."""
+        key = bundles.get_bundle_key(self.script.files, 'zip')
+        building = Path(self.directory) / f"{key}.zip.building"
+        building.touch()
+        past = time.time() - bundles.BUILD_TIMEOUT - 1
+        os.utime(building, (past, past))
+
+        response = self.client.get(self.url + ".zip")
+        self.assertEqual(response.status_code, 200)
+
+        # The lock of the other build is left (for clear_bundles)
+        self.assertEqual(sorted(os.listdir(self.directory)),
+                         [f"{key}.zip", f"{key}.zip.building"])
+
+    def test_slow_build(self):
+        """Test that a slow build finishes after another one replaced it."""
+        contents = {file['hash']: content['content'] for file, content in
+                    zip(self.script.files, self.files)}
+        started, finish = threading.Event(), threading.Event()
+        errors = []
+
+        def load_slowly(hashes):
+            started.set()
+            finish.wait(5)
+            return {digest: contents[digest] for digest in hashes}
+
+        def build_slowly():
+            try:
+                bundles.get_bundle(self.script.files, 'zip', load_slowly)
+            except Exception as error:
+                errors.append(error)
+
+        thread = threading.Thread(target=build_slowly)
+        thread.start()
+        self.assertTrue(started.wait(5))
+
+        # Another request gives up waiting, and builds the archive itself
+        with mock.patch.object(bundles, 'BUILD_TIMEOUT', 0.1):
+            path = bundles.get_bundle(self.script.files, 'zip',
+                                      lambda hashes: {
+                                          digest: contents[digest]
+                                          for digest in hashes
+                                      })
+        self.assertTrue(path.exists())
+
+        finish.set()
+        thread.join(5)
+        self.assertEqual(errors, [])
+        self.assertEqual(os.listdir(self.directory), [path.name])
+        with zipfile.ZipFile(path) as archive:
+            self.assertEqual(archive.namelist(), ["main.py", "lib.py"])
+
+    def test_private_script(self):
+        """Test that the archives of private scripts are hidden."""
+        self.script.is_public = False
+        self.script.save(update_fields=['is_public'])
+        self.assertEqual(self.client.get(self.url + ".zip").status_code, 404)
+
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(self.url + ".zip").status_code, 200)
+
+    def test_clear_bundles(self):
+        """Test the deletion of the old archives."""
+        self.client.get(self.url + ".zip")
+        call_command('clear_bundles', stdout=io.StringIO())
+        self.assertEqual(len(os.listdir(self.directory)), 1)
+        call_command('clear_bundles', days=-1, stdout=io.StringIO())
+        self.assertEqual(os.listdir(self.directory), [])
@@ -0,0 +1,164 @@
+"""Tests for the change feed of the scripts (/scripts/changes/)."""
+from unittest import mock
+
+from django.db import DatabaseError
+from django.test import TestCase
+
+# Import the models to create the scripts directly
+from workshop.api.models import Script, ScriptChange, User
+from workshop.api.tests.helpers import create_script
+
+
+class ScriptChangesTest(TestCase):
+    """Test the change log and the change feed of the catalog."""
+
+    def setUp(self):
+        """Create a user."""
+        self.user = User.objects.create_user("user", "user@example.com",
+                                             "password")
+
+    def get_changes(self, since=None, **params) -> dict:
+        """Return the changes since a token."""
+        if since is not None:
+            params['since'] = since
+        response = self.client.get("/scripts/changes/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def get_actions(self, since=None) -> list:
+        """Return the scripts and actions of the changes since a token."""
+        return [(str(change['script']), change['action'])
+                for change in self.get_changes(since)['changes']]
+
+    def test_actions(self):
+        """Test the changes recorded when saving and deleting scripts."""
+        script = create_script(self.user, "script")
+        script_id = str(script.id)
+        script.name = "renamed"
+        script.save()
+
+        # Leaving the catalog is a deletion, and coming back a creation
+        script.is_unlisted = True
+        script.save()
+        script.is_unlisted = False
+        script.save()
+        script.delete()
+
+        self.assertEqual(self.get_actions(), [
+            (script_id, 'created'), (script_id, 'updated'),
+            (script_id, 'deleted'), (script_id, 'created'),
+            (script_id, 'deleted'),
+        ])
+
+    def test_private_scripts(self):
+        """Test that the scripts never in the catalog have no changes."""
+        script = create_script(self.user, "private", is_public=False)
+        script.name = "renamed"
+        script.save()
+        script.delete()
+        create_script(self.user, "unlisted", is_unlisted=True)
+        self.assertEqual(self.get_actions(), [])
+
+    def test_resume(self):
+        """Test resuming the feed with the tokens."""
+        first = create_script(self.user, "first")
+        create_script(self.user, "second")
+        data = self.get_changes(limit=1)
+        self.assertEqual(data['more'], True)
+        self.assertEqual(len(data['changes']), 1)
+
+        data = self.get_changes(data['next'])
+        self.assertEqual(data['more'], False)
+        self.assertEqual(len(data['changes']), 1)
+
+        # Nothing new
+        token = data['next']
+        self.assertEqual(self.get_changes(token),
+                         {'changes': [], 'next': token, 'more': False})
+
+        first_id = str(first.id)
+        first.delete()
+        self.assertEqual(self.get_actions(token), [(first_id, 'deleted')])
+
+        # The cost doesn't depend on the size of the catalog (the changes to
+        # number, and the changes since the token)
+        with self.assertNumQueries(2):
+            self.get_changes(token)
+
+    def test_cascade(self):
+        """Test the tombstones of the scripts deleted with their author."""
+        scripts = [create_script(self.user, f"script{index}")
+                   for index in range(3)]
+        token = self.get_changes()['next']
+        self.user.delete()
+        self.assertEqual(
+            sorted(self.get_actions(token)),
+            sorted((str(script.id), 'deleted') for script in scripts)
+        )
+
+    def test_bulk_create(self):
+        """Test the changes of the scripts created in bulk."""
+        self.client.force_login(self.user)
+        response = self.client.post("/scripts/bulk/", [
+            {"name": f"script{index}", "language": "python",
+             "files": [{"name": "test.py", "content": "print('Hello!')"}],
+             "is_public": index != 1}
+            for index in range(3)
+        ], content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.get_actions(), [
+            (str(Script.objects.get(name="script0").id), 'created'),
+            (str(Script.objects.get(name="script2").id), 'created'),
+        ])
+
+    def test_late_commit(self):
+        """Test a change committed after the changes following it were sent.
+
+        A long transaction inserts its change first (with the lowest id),
+        and commits it after a client received a newer change: the change
+        is still sent after the client's token.
+        """
+        script = create_script(self.user, "slow")
+        token = self.get_changes()['next']
+
+        # The change of the long transaction isn't committed yet
+        slow = ScriptChange.objects.create(script=script.id,
+                                           action=ScriptChange.UPDATED)
+        slow_values = {'id': slow.id, 'script': slow.script,
+                       'action': slow.action}
+        slow.delete()
+        fast = create_script(self.user, "fast")
+        self.assertLess(slow_values['id'], ScriptChange.objects.get(
+            script=fast.id
+        ).id)
+        data = self.get_changes(token)
+        self.assertEqual(self.get_actions(token), [(str(fast.id), 'created')])
+
+        # It is committed after the client read the newer change
+        ScriptChange.objects.create(**slow_values)
+        self.assertEqual(self.get_actions(data['next']),
+                         [(str(script.id), 'updated')])
+
+    def test_format_suffix(self):
+        """Test the change feed with a format suffix."""
+        create_script(self.user, "script")
+        response = self.client.get("/scripts/changes.json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['next'], self.get_changes()['next'])
+
+    def test_invalid_token(self):
+        """Test the invalid tokens."""
+        for since in ("abc", "-1"):
+            response = self.client.get("/scripts/changes/", {'since': since})
+            self.assertEqual(response.status_code, 400)
+
+    def test_atomic(self):
+        """Test that a script isn't saved without its change."""
+        script = create_script(self.user, "script")
+        script.name = "renamed"
+        with mock.patch.object(ScriptChange.objects, 'create',
+                               side_effect=DatabaseError):
+            with self.assertRaises(DatabaseError):
+                script.save()
+        script.refresh_from_db()
+        self.assertEqual(script.name, "script")
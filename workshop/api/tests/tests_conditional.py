@@ -0,0 +1,210 @@
+"""Tests for the conditional requests on the /scripts/ endpoint."""
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+# Import the models to create the scripts directly
+from workshop.api.models import Script, User, Tag, OS
+
+
+@override_settings(SCRIPT_VIEWS_FLUSH_INTERVAL=3600)
+class ScriptConditionalTest(TestCase):
+    """Test the ETag and Last-Modified headers of the scripts."""
+
+    def setUp(self):
+        """Create a public and a private script."""
+        self.user = User.objects.create_user("user", "user@example.com",
+                                             "password")
+        self.script = Script.objects.create(
+            name="script",
+            author=self.user,
+            language="python",
+            files=[{"name": "test.py", "content": "print('Hello!')"}],
+        )
+        self.private_script = Script.objects.create(
+            name="private_script",
+            author=self.user,
+            language="python",
+            files=[{"name": "test.py", "content": "print('Hello!')"}],
+            is_public=False,
+        )
+        self.url = f"/scripts/{self.script.id}/"
+
+    def test_etag(self):
+        """Test that scripts are not sent again when they didn't change."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertTrue(etag.startswith('"'))
+        self.assertIn('Last-Modified', response)
+
+        # The script is only checked, not loaded
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(response['ETag'], etag)
+
+        # Once modified, the script is sent again
+        self.script.name = "renamed"
+        self.script.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], "renamed")
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_etag_format(self):
+        """Test that each representation has its own ETag."""
+        json_etag = self.client.get(self.url)['ETag']
+        html_etag = self.client.get(self.url, {'format': 'api'})['ETag']
+        self.assertNotEqual(json_etag, html_etag)
+
+    def test_last_modified(self):
+        """Test the If-Modified-Since header."""
+        response = self.client.get(self.url)
+        last_modified = response['Last-Modified']
+        response = self.client.get(self.url,
+                                   HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get(
+            self.url, HTTP_IF_MODIFIED_SINCE="Mon, 01 Jan 2001 00:00:00 GMT"
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_private_script(self):
+        """Test that private scripts are never answered to others."""
+        url = f"/scripts/{self.private_script.id}/"
+        self.client.force_login(self.user)
+        etag = self.client.get(url)['ETag']
+        self.client.logout()
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(PAGINATION_COUNT_CACHE_TIMEOUT=0)
+class ListConditionalTest(TestCase):
+    """Test the ETag of the lists."""
+
+    def setUp(self):
+        """Create a user, a tag, an OS and a script."""
+        self.user = User.objects.create_user("user", "user@example.com",
+                                             "password")
+        self.tag = Tag.objects.create(name="tag")
+        self.os = OS.objects.create(name="os")
+        self.script = Script.objects.create(
+            name="script",
+            author=self.user,
+            language="python",
+            files=[{"name": "test.py", "content": "print('Hello!')"}],
+        )
+
+    def assertNotModified(self, url: str, etag: str, queries: int = 1,
+                          **params):
+        """Assert that a list wasn't modified since its ETag was sent."""
+        with self.assertNumQueries(queries):
+            response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def assertModified(self, url: str, etag: str, **params) -> str:
+        """Assert that a list was modified, and return its new ETag."""
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        return response['ETag']
+
+    def test_scripts(self):
+        """Test the ETag of the script list."""
+        etag = self.client.get("/scripts/")['ETag']
+
+        # Last modification date, last change of the catalog, last deletion
+        # outside of it and count
+        self.assertNotModified("/scripts/", etag, queries=4)
+
+        # Query parameters and users have their own ETags
+        self.assertModified("/scripts/", etag, search="script")
+        self.client.force_login(self.user)
+        etag = self.assertModified("/scripts/", etag)
+        self.client.logout()
+
+        # Modified, added and deleted scripts change the ETag
+        self.script.save()
+        etag = self.assertModified("/scripts/", etag)
+        script = Script.objects.create(
+            name="other_script",
+            author=self.user,
+            language="python",
+            files=[{"name": "test.py", "content": "print('Hello!')"}],
+        )
+        etag = self.assertModified("/scripts/", etag)
+        script.delete()
+        self.assertModified("/scripts/", etag)
+
+    def test_scripts_count(self):
+        """Test the count in the ETag of the script list."""
+        # Lists without count don't count the scripts for their ETag
+        etag = self.client.get("/scripts/", {'count': 'false'})['ETag']
+        with CaptureQueriesContext(connection) as queries:
+            self.assertNotModified("/scripts/", etag, queries=3,
+                                   count='false')
+        self.assertFalse(any("COUNT(" in query['sql']
+                             for query in queries.captured_queries))
+
+        # The cached count of the page is reused
+        with override_settings(PAGINATION_COUNT_CACHE_TIMEOUT=30):
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                self.client.get("/scripts/")
+        self.assertEqual(len([query for query in queries.captured_queries
+                              if "COUNT(" in query['sql']]), 1)
+
+    @override_settings(PAGINATION_COUNT_CACHE_TIMEOUT=30)
+    def test_scripts_deletions(self):
+        """Test that deleted scripts outside of the catalog change the ETag.
+
+        Their deletion changes neither the modification dates, the catalog
+        nor the count when it isn't shown or is cached.
+        """
+        self.client.force_login(self.user)
+        for params in ({}, {'count': 'false'}, {'pagination': 'cursor'}):
+            for field in ('is_public', 'is_unlisted'):
+                with self.subTest(params=params, field=field):
+                    cache.clear()
+                    script = Script.objects.create(
+                        name="hidden_script",
+                        author=self.user,
+                        language="python",
+                        files=[{"name": "test.py", "content": "print('Hi')"}],
+                        **{field: field == 'is_unlisted'},
+                    )
+                    etag = self.client.get("/scripts/", params)['ETag']
+                    script.delete()
+                    self.assertModified("/scripts/", etag, **params)
+
+    def test_tags_and_os(self):
+        """Test that tags and OS change with their scripts."""
+        for url, field, value in (("/tags/", 'tags', self.tag),
+                                  ("/os/", 'compatibility', self.os)):
+            with self.subTest(url=url):
+                script = Script.objects.create(
+                    name=f"script_{field}",
+                    author=self.user,
+                    language="python",
+                    files=[{"name": "test.py", "content": "print('Hi!')"}],
+                )
+                etag = self.client.get(url)['ETag']
+                self.assertNotModified(url, etag)
+
+                # Scripts added and removed from the tag or OS
+                getattr(script, field).add(value)
+                etag = self.assertModified(url, etag)
+                getattr(script, field).clear()
+                etag = self.assertModified(url, etag)
+
+                # Deleted scripts
+                getattr(script, field).add(value)
+                etag = self.assertModified(url, etag)
+                script.delete()
+                self.assertModified(url, etag)
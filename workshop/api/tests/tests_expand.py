@@ -0,0 +1,125 @@
+"""Tests for the inlining of the related objects (?expand=)."""
+from django.test import TestCase, override_settings
+
+# Import the models to create the objects directly
+from workshop.api.models import OS, Script, Rating, Tag, User
+from workshop.api.tests.helpers import create_script
+
+
+# Count the results of every list, instead of using cached counts
+@override_settings(PAGINATION_COUNT_CACHE_TIMEOUT=0,
+                   SCRIPT_VIEWS_FLUSH_INTERVAL=3600)
+class ExpandTest(TestCase):
+    """Test the expansion of the related objects of scripts and ratings."""
+
+    def setUp(self):
+        """Create users, scripts and ratings."""
+        self.users = [
+            User.objects.create_user(f"user{index}", f"user{index}@a.com",
+                                     "password")
+            for index in range(3)
+        ]
+        self.tag = Tag.objects.create(name="tag", description="A tag")
+        self.os = OS.objects.create(name="os", homepage="https://os.org")
+        self.scripts = [self.create_script(index) for index in range(3)]
+
+    def create_script(self, index: int, **fields) -> Script:
+        """Create a script with collaborators, a tag, an OS and ratings."""
+        return create_script(self.users[0], f"script{index}",
+                             collaborators=self.users[1:], tags=[self.tag],
+                             compatibility=[self.os], raters=self.users,
+                             comment="Nice", **fields)
+
+    def test_script(self):
+        """Test the expanded related objects of a script."""
+        url = f"/scripts/{self.scripts[0].id}/"
+        response = self.client.get(
+            url + "?expand=author,tags,ratings,compatibility,collaborators"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['author'], {
+            'url': "http://testserver/users/user0/", 'username': "user0"
+        })
+        self.assertEqual(response.data['tags'], [{
+            'url': "http://testserver/tags/tag/", 'name': "tag",
+            'description': "A tag"
+        }])
+        self.assertEqual(response.data['compatibility'][0]['homepage'],
+                         "https://os.org")
+        self.assertEqual(len(response.data['collaborators']), 2)
+        self.assertEqual(
+            {rating['user'] for rating in response.data['ratings']},
+            {f"http://testserver/users/user{index}/" for index in range(3)}
+        )
+        self.assertEqual(response.data['ratings'][0]['comment'], "Nice")
+
+        # The expanded scripts have no validators, as their related objects
+        # change without them
+        self.assertNotIn('ETag', response)
+        self.assertIn('ETag', self.client.get(url))
+
+        # Without expansion, the hyperlinks are unchanged
+        response = self.client.get(url + "?expand=unknown")
+        self.assertEqual(response.data['author'],
+                         "http://testserver/users/user0/")
+
+    def test_script_queries(self):
+        """Test that the number of queries doesn't depend on the objects."""
+        expand = "?expand=author,tags,ratings,compatibility,collaborators"
+
+        # The script, its files, author, ratings, collaborators, OS and tags
+        for script in (self.scripts[0], self.create_script(3)):
+            with self.assertNumQueries(7):
+                self.client.get(f"/scripts/{script.id}/{expand}")
+
+        # The count, the scripts and their related objects
+        for count in (4, 6):
+            if count == 6:
+                self.create_script(4)
+                self.create_script(5)
+            with self.assertNumQueries(7):
+                response = self.client.get(f"/scripts/{expand}")
+            self.assertEqual(len(response.data['results']), count)
+
+    def test_sparse_fieldsets(self):
+        """Test that only the shown fields are expanded."""
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                f"/scripts/{self.scripts[0].id}/?fields=name,author"
+                f"&expand=author,tags"
+            )
+        self.assertEqual(set(response.data), {'name', 'author'})
+        self.assertEqual(response.data['author']['username'], "user0")
+
+    def test_writes(self):
+        """Test that writes still take hyperlinks."""
+        self.client.force_login(self.users[0])
+        response = self.client.patch(
+            f"/scripts/{self.scripts[0].id}/?expand=tags",
+            {"tags": []}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['tags'], [])
+
+    def test_ratings(self):
+        """Test the expanded users and scripts of the ratings."""
+        private = self.create_script(3, is_public=False)
+        with self.assertNumQueries(4):
+            response = self.client.get("/ratings/?expand=user,script")
+        results = response.data['results']
+        self.assertEqual(len(results), 12)
+
+        # The private scripts are hidden
+        scripts = [rating['script'] for rating in results]
+        self.assertEqual(scripts.count(None), 3)
+        self.assertEqual(
+            {script['name'] for script in scripts if script is not None},
+            {"script0", "script1", "script2"}
+        )
+        self.assertEqual(results[0]['user']['username'],
+                         Rating.objects.order_by('-created')[0].user_id)
+
+        self.client.force_login(self.users[0])
+        response = self.client.get("/ratings/?expand=script")
+        self.assertIn(private.name, {rating['script']['name']
+                                     for rating in response.data['results']})
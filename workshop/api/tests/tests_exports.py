@@ -0,0 +1,112 @@
+"""Tests for the NDJSON exports of the scripts."""
+import gzip
+import io
+import json
+import shutil
+import tempfile
+from pathlib import Path
+
+from django.core.management import call_command
+from django.test import TestCase
+
+# Import the models to create the scripts directly
+from workshop.api.models import OS, Script, Tag, User
+from workshop.api.tests.helpers import create_script
+from workshop.api.exports import export_lines, get_catalog
+
+
+class ExportTest(TestCase):
+    """Test the exports of the catalog."""
+
+    def setUp(self):
+        """Create scripts, some of them outside of the catalog."""
+        self.user = User.objects.create_user("user", "user@example.com",
+                                             "password")
+        self.other = User.objects.create_user("other", "other@example.com",
+                                              "password")
+        self.tag = Tag.objects.create(name="tag")
+        self.os = OS.objects.create(name="os")
+        self.scripts = [self.create_script(f"script{index}")
+                        for index in range(5)]
+        self.create_script("private", is_public=False)
+        self.create_script("unlisted", is_unlisted=True)
+
+    def create_script(self, name: str, **fields) -> Script:
+        """Create a script with a collaborator, a tag and an OS."""
+        return create_script(
+            self.user, name,
+            [{"name": "main.py", "content": f"print('{name}') # é"},
+             {"name": "lib.py", "content": "pass"}],
+            collaborators=[self.other], tags=[self.tag],
+            compatibility=[self.os], **fields
+        )
+
+    def read_lines(self, data: bytes) -> list:
+        """Return the scripts of NDJSON lines."""
+        return [json.loads(line) for line in data.decode().splitlines()]
+
+    def test_endpoint(self):
+        """Test the export of the catalog."""
+        response = self.client.get("/scripts/export/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], "application/x-ndjson")
+        self.assertTrue(response.streaming)
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+        scripts = self.read_lines(b"".join(response.streaming_content))
+        self.assertEqual(sorted(script['name'] for script in scripts),
+                         [f"script{index}" for index in range(5)])
+        script = next(script for script in scripts
+                      if script['name'] == "script0")
+        self.assertEqual(script['id'], str(self.scripts[0].id))
+        self.assertEqual(script['author'], "user")
+        self.assertEqual(script['collaborators'], ["other"])
+        self.assertEqual(script['tags'], ["tag"])
+        self.assertEqual(script['compatibility'], ["os"])
+        self.assertEqual(script['files'], self.scripts[0].get_files())
+
+        # The export can be followed by the changes made since
+        token = response['X-Changes-Token']
+        response = self.client.get("/scripts/changes/", {'since': token})
+        self.assertEqual(response.data['changes'], [])
+
+    def test_gzip(self):
+        """Test the compressed export."""
+        response = self.client.get("/scripts/export/",
+                                   HTTP_ACCEPT_ENCODING="gzip, deflate")
+        self.assertEqual(response['Content-Encoding'], "gzip")
+        data = gzip.decompress(b"".join(response.streaming_content))
+        self.assertEqual(len(self.read_lines(data)), 5)
+
+    def test_chunks(self):
+        """Test that the scripts are read a chunk at a time."""
+        # Each chunk reads the scripts, their collaborators, OS, tags and
+        # blobs (the last chunk is shorter, so there are 3 chunks)
+        with self.assertNumQueries(15):
+            lines = list(export_lines(get_catalog(), chunk_size=2))
+        self.assertEqual(len(lines), 5)
+
+        # Exactly full chunks end with an empty chunk
+        with self.assertNumQueries(6):
+            self.assertEqual(len(list(export_lines(get_catalog(),
+                                                   chunk_size=5))), 5)
+
+    def test_command(self):
+        """Test the export_catalog command."""
+        directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, directory)
+        stderr = io.StringIO()
+
+        call_command('export_catalog', str(directory / "catalog.ndjson"),
+                     stderr=stderr)
+        self.assertIn("5 script(s) exported", stderr.getvalue())
+        data = (directory / "catalog.ndjson").read_bytes()
+        self.assertEqual(len(self.read_lines(data)), 5)
+
+        # All the scripts, compressed
+        call_command('export_catalog', str(directory / "all.ndjson.gz"),
+                     '--all', '--chunk-size', '3', stderr=stderr)
+        with gzip.open(directory / "all.ndjson.gz") as file:
+            scripts = self.read_lines(file.read())
+        self.assertEqual(len(scripts), 7)
+        self.assertEqual(len({script['id'] for script in scripts}), 7)
@@ -0,0 +1,118 @@
+"""Tests for the sparse fieldsets (?fields= and ?omit=)."""
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+# Import the models to create the objects directly
+from workshop.api.models import Script, Rating, Tag, User
+
+
+# Count the results of every list, instead of using cached counts
+@override_settings(PAGINATION_COUNT_CACHE_TIMEOUT=0,
+                   SCRIPT_VIEWS_FLUSH_INTERVAL=3600)
+class SparseFieldsetTest(TestCase):
+    """Test the selection of the fields of the responses."""
+
+    def setUp(self):
+        """Create users, scripts and ratings."""
+        self.user = User.objects.create_user("user", "user@example.com",
+                                             "password")
+        self.other = User.objects.create_user("other", "other@example.com",
+                                              "password")
+        self.tag = Tag.objects.create(name="tag")
+        self.scripts = []
+        for index in range(3):
+            script = Script.objects.create(
+                name=f"script{index}", author=self.user, language="python",
+                long_description="A long description",
+                files=[{"name": "test.py", "content": "print('Hello!')"}]
+            )
+            script.collaborators.set([self.other])
+            script.tags.set([self.tag])
+            Rating.objects.create(rating=4, user=self.other, script=script)
+            self.scripts.append(script)
+
+    def get_queries(self, url: str, fields: set) -> list:
+        """Return the SQL queries of a request, checking its fields."""
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        results = response.data.get('results', [response.data])
+        for result in results:
+            self.assertEqual(set(result), fields)
+        return [query['sql'] for query in context.captured_queries]
+
+    def test_script_list(self):
+        """Test that hidden fields and relations aren't loaded."""
+        queries = self.get_queries("/scripts/?fields=name,author,views",
+                                   {'name', 'author', 'views'})
+
+        # ETag (three queries), count and scripts: no files, no related
+        # objects
+        self.assertEqual(len(queries), 5)
+        for query in queries:
+            self.assertNotIn('"files"', query)
+            self.assertNotIn('"short_description"', query)
+
+        # Unknown fields are ignored
+        self.get_queries("/scripts/?fields=name,unknown", {'name'})
+
+    def test_script_detail(self):
+        """Test the fields of a script."""
+        url = f"/scripts/{self.scripts[0].id}/"
+        queries = self.get_queries(url + "?fields=name,tags",
+                                   {'name', 'tags'})
+        # The script and its tags
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('"files"', queries[0])
+
+        response = self.client.get(url + "?omit=files,long_description")
+        self.assertNotIn('files', response.data)
+        self.assertNotIn('long_description', response.data)
+        self.assertIn('tags', response.data)
+
+        # The views are still counted
+        self.client.get(url + "?fields=name")
+        response = self.client.get(url + "?fields=views")
+        self.assertEqual(response.data['views'], 4)
+
+    def test_writes(self):
+        """Test that writes are validated and answered with all fields."""
+        self.client.force_login(self.user)
+        response = self.client.patch(
+            f"/scripts/{self.scripts[0].id}/?fields=name",
+            {"name": "renamed"}, content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], "renamed")
+        self.assertIn('files', response.data)
+
+    def test_users(self):
+        """Test the fields of the users."""
+        queries = self.get_queries("/users/?fields=username,scripts",
+                                   {'username', 'scripts'})
+        # Count, users and their scripts
+        self.assertEqual(len(queries), 3)
+
+        # Only the public fields are shown to others
+        self.get_queries(f"/users/{self.user.pk}/?omit=scripts,url",
+                         {'username', 'groups', 'collaborations', 'ratings'})
+
+        self.client.force_login(self.user)
+        self.get_queries(f"/users/{self.user.pk}/?fields=email,password",
+                         {'email'})
+
+    def test_ratings_and_tags(self):
+        """Test the fields of the ratings and the tags."""
+        queries = self.get_queries("/ratings/?fields=rating,user",
+                                   {'rating', 'user'})
+        self.assertEqual(len(queries), 2)
+        for query in queries:
+            self.assertNotIn('"comment"', query)
+
+        self.get_queries("/tags/?omit=script_set",
+                         {'name', 'description', 'url'})
+        queries = self.get_queries("/tags/", {'name', 'description', 'url',
+                                              'script_set'})
+        # ETag, count, tags and their scripts
+        self.assertEqual(len(queries), 4)
@@ -0,0 +1,161 @@
+"""Tests for the /scripts/{id}/files/{name} endpoint."""
+from django.test import TestCase
+
+# Import the models to create the scripts directly
+from workshop.api.models import Blob, Script, User
+
+
+class ScriptFileTest(TestCase):
+    """Test the content of the files of the scripts."""
+
+    def setUp(self):
+        """Create a public and a private script."""
+        self.user = User.objects.create_user("user", "user@example.com",
+                                             "password")
+        self.content = "print('Hello world!')\n# é"
+        self.script = Script.objects.create(
+            name="script",
+            author=self.user,
+            language="python",
+            files=[
+                {"name": "test.py", "content": self.content},
+                {"name": "other.py", "content": "print('Other')"},
+                {"name": "notes.txt", "content": "Notes"},
+                {"name": "data.json", "content": "{}"},
+            ],
+        )
+        self.private_script = Script.objects.create(
+            name="private_script",
+            author=self.user,
+            language="python",
+            files=[{"name": "test.py", "content": self.content}],
+            is_public=False,
+        )
+        self.url = f"/scripts/{self.script.id}/files/test.py/"
+        self.bytes = self.content.encode('utf-8')
+
+    def test_file(self):
+        """Test that the content of a file is returned as plain text."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], "text/plain; charset=utf-8")
+        self.assertEqual(response['Accept-Ranges'], "bytes")
+        self.assertEqual(response.content, self.bytes)
+
+        response = self.client.get(
+            f"/scripts/{self.script.id}/files/other.py/"
+        )
+        self.assertEqual(response.content, b"print('Other')")
+
+    def test_file_names(self):
+        """Test the URLs without a trailing slash and the extensions."""
+        for name, content in (("test.py", self.bytes), ("notes.txt", b"Notes"),
+                              ("data.json", b"{}")):
+            for url in (f"/scripts/{self.script.id}/files/{name}",
+                        f"/scripts/{self.script.id}/files/{name}/"):
+                with self.subTest(url=url):
+                    response = self.client.get(url)
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(response.content, content)
+
+        # The extension isn't a format suffix
+        response = self.client.get(f"/scripts/{self.script.id}/files/notes")
+        self.assertEqual(response.status_code, 404)
+
+    def test_not_found(self):
+        """Test the missing files and the private scripts."""
+        response = self.client.get(
+            f"/scripts/{self.script.id}/files/missing.py/"
+        )
+        self.assertEqual(response.status_code, 404)
+
+        url = f"/scripts/{self.private_script.id}/files/test.py/"
+        self.assertEqual(self.client.get(url).status_code, 404)
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get(url).content, self.bytes)
+
+    def test_invalid_id(self):
+        """Test that the routes of a script don't match a malformed id."""
+        for path in ("", "files/test.py/", "revisions/", "revisions/1/",
+                     "revisions/1/diff/", "bundle.zip"):
+            for script_id in ("invalid", "1234", str(self.script.id) + "0"):
+                url = f"/scripts/{script_id}/{path}"
+                with self.subTest(url=url):
+                    self.assertEqual(self.client.get(url).status_code, 404)
+
+        # The ids without dashes are still accepted
+        url = f"/scripts/{self.script.id.hex}/files/test.py"
+        self.assertEqual(self.client.get(url).content, self.bytes)
+
+    def test_missing_blob(self):
+        """Test that a file whose content isn't stored is not found."""
+        Script.objects.filter(pk=self.script.pk).update(files=[
+            {"name": "test.py", "hash": "0" * 64, "size": 1},
+        ])
+        self.assertFalse(Blob.objects.filter(hash="0" * 64).exists())
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_etag(self):
+        """Test the ETag of the files."""
+        etag = self.client.get(self.url)['ETag']
+
+        # The file isn't read to answer a conditional request
+        with self.assertNumQueries(1):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # The ETag only changes with the content of the file
+        self.script.set_files([
+            {"name": "test.py", "content": self.content},
+            {"name": "other.py", "content": "print('Changed')"},
+        ])
+        self.script.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.script.set_files([
+            {"name": "test.py", "content": "print('Changed')"},
+        ])
+        self.script.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_range(self):
+        """Test the byte ranges."""
+        length = len(self.bytes)
+        for header, expected, content_range in (
+            ("bytes=0-4", self.bytes[:5], f"bytes 0-4/{length}"),
+            ("bytes=6-", self.bytes[6:], f"bytes 6-{length - 1}/{length}"),
+            ("bytes=-3", self.bytes[-3:],
+             f"bytes {length - 3}-{length - 1}/{length}"),
+            ("bytes=6-1000", self.bytes[6:], f"bytes 6-{length - 1}/{length}"),
+        ):
+            with self.subTest(header=header):
+                response = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 206)
+                self.assertEqual(response.content, expected)
+                self.assertEqual(response['Content-Range'], content_range)
+
+        # Invalid and multiple ranges are ignored
+        for header in ("bytes=4-2", "lines=1-2", "bytes=0-1,4-5"):
+            with self.subTest(header=header):
+                response = self.client.get(self.url, HTTP_RANGE=header)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.content, self.bytes)
+
+        response = self.client.get(self.url, HTTP_RANGE=f"bytes={length}-")
+        self.assertEqual(response.status_code, 416)
+        self.assertEqual(response['Content-Range'], f"bytes */{length}")
+
+    def test_if_range(self):
+        """Test that ranges are only sent for the same version of a file."""
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_RANGE="bytes=0-4",
+                                   HTTP_IF_RANGE=etag)
+        self.assertEqual(response.status_code, 206)
+
+        response = self.client.get(self.url, HTTP_RANGE="bytes=0-4",
+                                   HTTP_IF_RANGE='"outdated"')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, self.bytes)
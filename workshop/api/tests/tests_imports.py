@@ -0,0 +1,183 @@
+"""Tests for the imports of scripts and users (import_catalog)."""
+import gzip
+import io
+import json
+import shutil
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import DatabaseError
+from django.test import TestCase
+
+# Import the models to check the imported objects
+from workshop.api.models import OS, Script, ScriptChange, Tag, User
+from workshop.api import imports
+
+
+class ImportTest(TestCase):
+    """Test the import_catalog command."""
+
+    def setUp(self):
+        """Create a directory for the files."""
+        self.directory = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def make_script(self, index: int, **fields) -> dict:
+        """Return the data of a script."""
+        return {
+            "name": f"script{index}", "author": "author",
+            "language": "python",
+            "files": [{"name": "main.py", "content": f"print({index}) # é"}],
+            "tags": ["tag"], "compatibility": ["os"],
+            "collaborators": ["other"],
+            **fields
+        }
+
+    def write(self, rows: list, name: str = "catalog.ndjson") -> str:
+        """Write rows as NDJSON, and return the path of the file."""
+        path = self.directory / name
+        data = "".join(json.dumps(row) + "\n" for row in rows).encode()
+        path.write_bytes(gzip.compress(data) if name.endswith('.gz')
+                         else data)
+        return str(path)
+
+    def run_import(self, path: str, **options) -> tuple:
+        """Import a file, and return the output and the errors."""
+        stdout, stderr = io.StringIO(), io.StringIO()
+        options.setdefault('workers', 0)
+        call_command('import_catalog', path, stdout=stdout, stderr=stderr,
+                     **options)
+        return stdout.getvalue(), stderr.getvalue()
+
+    def test_import(self):
+        """Test the import of users and scripts."""
+        path = self.write([
+            {"username": "author", "email": "author@example.com",
+             "password": "password"},
+            self.make_script(0, created="2020-01-02T03:04:05Z",
+                             modified="2021-01-02T03:04:05Z", views=12),
+            self.make_script(1, is_public=False),
+        ], "catalog.ndjson.gz")
+        output, errors = self.run_import(path, batch_size=2)
+        self.assertEqual(output.strip(), "2 script(s) and 2 user(s) imported, "
+                                         "0 invalid line(s).")
+
+        author = User.objects.get(pk="author")
+        self.assertTrue(author.check_password("password"))
+        self.assertFalse(User.objects.get(pk="other").has_usable_password())
+
+        script = Script.objects.get(name="script0")
+        self.assertEqual(script.author, author)
+        self.assertEqual(script.get_files()[0]['content'], "print(0) # é")
+        self.assertEqual(script.created.year, 2020)
+        self.assertEqual(script.modified.year, 2021)
+        self.assertEqual(script.views, 12)
+        self.assertEqual(list(script.tags.all()), [Tag.objects.get()])
+        self.assertEqual(list(script.compatibility.all()), [OS.objects.get()])
+        self.assertEqual(script.collaborators.get().pk, "other")
+        self.assertEqual(script.revisions.count(), 1)
+        self.assertEqual(ScriptChange.objects.count(), 1)
+
+    def test_users_after_scripts(self):
+        """Test that the users created for earlier scripts are filled in."""
+        User.objects.create_user("other", "other@example.com", "secret")
+        path = self.write([
+            self.make_script(0),
+            self.make_script(1),
+            {"username": "author", "email": "author@example.com",
+             "password": "password", "first_name": "Ada"},
+            {"username": "other", "email": "changed@example.com",
+             "password": "password"},
+        ])
+        output, _ = self.run_import(path, batch_size=2)
+        self.assertIn("2 script(s) and 2 user(s) imported", output)
+
+        author = User.objects.get(pk="author")
+        self.assertEqual(author.email, "author@example.com")
+        self.assertEqual(author.first_name, "Ada")
+        self.assertTrue(author.check_password("password"))
+
+        # The users that already existed are kept as they were
+        other = User.objects.get(pk="other")
+        self.assertEqual(other.email, "other@example.com")
+        self.assertTrue(other.check_password("secret"))
+
+    def test_invalid_lines(self):
+        """Test that the invalid lines are reported and skipped."""
+        path = self.write([
+            self.make_script(0),
+            self.make_script(1, language="cobol"),
+            self.make_script(2, files=[]),
+            self.make_script(3, tags="tag"),
+            [],
+            self.make_script(5, files=[{"name": "main.py", "content": 5}]),
+        ])
+        output, errors = self.run_import(path)
+        self.assertIn("1 script(s) and 2 user(s) imported, 5 invalid line(s)",
+                      output)
+        self.assertIn("Line 2: ", errors)
+        self.assertIn("Line 5: ", errors)
+        self.assertIn("Line 6: ", errors)
+        self.assertEqual(Script.objects.get().name, "script0")
+
+    def test_reimport(self):
+        """Test that the scripts already imported are skipped."""
+        script = self.make_script(0, id="01900000-0000-7000-8000-000000000000")
+        path = self.write([script, script])
+        self.run_import(path)
+        output, _ = self.run_import(path)
+        self.assertIn("0 script(s) and 0 user(s) imported", output)
+        self.assertEqual(Script.objects.count(), 1)
+
+    def test_resume(self):
+        """Test that a failed import resumes after the saved batches."""
+        path = self.write([self.make_script(index) for index in range(5)])
+        import_rows = imports.import_rows
+        calls = []
+
+        def fail_second_batch(rows):
+            calls.append(rows)
+            if len(calls) == 2:
+                raise DatabaseError("Connection lost")
+            return import_rows(rows)
+
+        with mock.patch(
+            'workshop.management.commands.import_catalog.import_rows',
+            fail_second_batch
+        ):
+            with self.assertRaises(DatabaseError):
+                self.run_import(path, batch_size=2)
+        self.assertEqual(Script.objects.count(), 2)
+        self.assertEqual(Path(path + ".checkpoint").read_text(), "2")
+
+        output, errors = self.run_import(path, batch_size=2)
+        self.assertIn("Resuming after line 2", errors)
+        self.assertIn("3 script(s)", output)
+        self.assertEqual(Script.objects.count(), 5)
+        self.assertFalse(Path(path + ".checkpoint").exists())
+
+    def test_round_trip(self):
+        """Test that an exported catalog is imported as it was."""
+        user = User.objects.create_user("author", "a@example.com", "pass")
+        other = User.objects.create_user("other", "o@example.com", "pass")
+        tag = Tag.objects.create(name="tag")
+        for index in range(3):
+            script = Script.objects.create(
+                name=f"script{index}", author=user, language="python",
+                short_description="A script", version="1.0",
+                files=[{"name": "main.py", "content": f"print({index})"},
+                       {"name": "lib.py", "content": "pass"}]
+            )
+            script.collaborators.set([other])
+            script.tags.set([tag])
+        path = str(self.directory / "export.ndjson")
+        call_command('export_catalog', path, '--all', stderr=io.StringIO())
+        exported = Path(path).read_bytes()
+
+        Script.objects.all().delete()
+        output, _ = self.run_import(path, workers=2)
+        self.assertIn("3 script(s) and 0 user(s) imported", output)
+        call_command('export_catalog', path, '--all', stderr=io.StringIO())
+        self.assertEqual(Path(path).read_bytes(), exported)
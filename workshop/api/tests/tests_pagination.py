@@ -0,0 +1,174 @@
+"""Tests for the pagination of the lists."""
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+# Import the models to create the objects directly
+from workshop.api.models import Script, Rating, User
+from workshop.api.pagination import WorkshopPagination, estimate_count
+
+
+@mock.patch.object(WorkshopPagination, 'page_size', 3)
+class PaginationTest(TestCase):
+    """Test the page number and cursor pagination modes."""
+
+    def setUp(self):
+        """Create users, scripts and ratings."""
+        # Don't reuse the counts cached by other tests
+        cache.clear()
+
+        self.users = [
+            User.objects.create_user(f"user{index}", f"user{index}@a.com",
+                                     "password")
+            for index in range(4)
+        ]
+        self.scripts = [
+            Script.objects.create(
+                name=f"script{index}",
+                author=self.users[0],
+                language="python",
+                files=[{"name": "test.py", "content": "print('Hello!')"}],
+            )
+            for index in range(8)
+        ]
+        for script in self.scripts[:2]:
+            for user in self.users:
+                Rating.objects.create(rating=3, user=user, script=script)
+
+    def walk_cursor(self, url: str) -> list:
+        """Return all the results of a list, following the cursor links."""
+        results = []
+        response = self.client.get(url, {'pagination': 'cursor'})
+        while True:
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            self.assertLessEqual(len(response.data['results']), 3)
+            results += response.data['results']
+            if response.data['next'] is None:
+                return results
+            response = self.client.get(response.data['next'])
+
+    def test_page_number_mode(self):
+        """Test that the page number mode is still the default."""
+        response = self.client.get("/scripts/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 8)
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertIn("page=2", response.data['next'])
+
+    def test_cursor_mode_scripts(self):
+        """Test that the cursor mode returns every script once, in order."""
+        results = self.walk_cursor("/scripts/")
+        expected = Script.objects.order_by('-created', 'id')
+        self.assertEqual([script['id'] for script in results],
+                         [str(script.id) for script in expected])
+
+    def test_cursor_mode_ratings(self):
+        """Test the cursor mode of the ratings."""
+        results = self.walk_cursor("/ratings/")
+        expected = Rating.objects.order_by('-created', 'id')
+        self.assertEqual([rating['url'] for rating in results],
+                         [f"http://testserver/ratings/{rating.id}/"
+                          for rating in expected])
+
+    def test_cursor_mode_users(self):
+        """Test the cursor mode of the users."""
+        results = self.walk_cursor("/users/")
+        expected = User.objects.order_by('-date_joined', 'username')
+        self.assertEqual([user['username'] for user in results],
+                         [user.username for user in expected])
+
+    def test_cursor_previous(self):
+        """Test that the previous links go back to the previous pages."""
+        first = self.client.get("/scripts/", {'pagination': 'cursor'})
+        second = self.client.get(first.data['next'])
+        previous = self.client.get(second.data['previous'])
+        self.assertEqual(previous.data['results'], first.data['results'])
+
+    def test_cursor_invalid(self):
+        """Test that invalid cursors are rejected."""
+        response = self.client.get("/scripts/", {'cursor': 'invalid'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_cursor_unavailable(self):
+        """Test that views without cursor ordering use page numbers."""
+        response = self.client.get("/tags/", {'pagination': 'cursor'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('count', response.data)
+
+    def test_count_skipped(self):
+        """Test that the count can be skipped."""
+        response = self.client.get("/scripts/", {'count': 'false'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data['count'])
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertIn("page=2", response.data['next'])
+
+        # The last page has no next link
+        response = self.client.get("/scripts/", {'count': 'false',
+                                                 'page': 3})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNone(response.data['next'])
+        self.assertIn("page=2", response.data['previous'])
+
+        # Pages after the last one don't exist
+        response = self.client.get("/scripts/", {'count': 'false',
+                                                 'page': 4})
+        self.assertEqual(response.status_code, 404)
+
+        # The last page can't be found without the count
+        response = self.client.get("/scripts/", {'count': 'false',
+                                                 'page': 'last'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_count_cached(self):
+        """Test that the counts are cached."""
+        response = self.client.get("/scripts/", {'name': 'script1'})
+        self.assertEqual(response.data['count'], 1)
+
+        Script.objects.create(
+            name="script1",
+            author=self.users[0],
+            language="python",
+            files=[{"name": "test.py", "content": "print('Hello!')"}],
+        )
+
+        # The cached count is used, but the results are up to date
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get("/scripts/", {'name': 'script1'})
+        self.assertFalse(any("COUNT(" in query['sql']
+                             for query in queries.captured_queries))
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(len(response.data['results']), 2)
+
+        # Without cache, the count is exact
+        with override_settings(PAGINATION_COUNT_CACHE_TIMEOUT=0):
+            response = self.client.get("/scripts/", {'name': 'script1'})
+        self.assertEqual(response.data['count'], 2)
+
+    def test_empty_queryset(self):
+        """Test the lists whose queryset can't match any object."""
+        for params in ({}, {'count': 'false'}):
+            with self.subTest(params=params):
+                response = self.client.get("/register/", params)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.data['results'], [])
+                self.assertEqual(response.data['count'],
+                                 None if params else 0)
+
+    def test_count_estimate(self):
+        """Test that the counts are only estimated on MySQL tables."""
+        # Estimations are only done with the MySQL statistics
+        self.assertIsNone(estimate_count(Script.objects.all()))
+
+        # Filtered querysets are never estimated
+        with mock.patch('workshop.api.pagination.connections') as connections:
+            connections.__getitem__.return_value.vendor = 'mysql'
+            self.assertIsNone(estimate_count(
+                Script.objects.filter(is_public=True)
+            ))
+            connections.__getitem__.return_value.cursor.assert_not_called()
@@ -0,0 +1,219 @@
+"""Tests for the edition of the script files with operations."""
+import json
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+# Import the models to create the scripts directly
+from workshop.api.models import Blob, Script, User
+from workshop.api.validators import script_files_size
+
+
+class FileOperationsTest(TestCase):
+    """Test the file operations and the JSON Patches."""
+
+    def setUp(self):
+        """Create a user and a script with a large file."""
+        self.user = User.objects.create_user("user", "user@example.com",
+                                             "password")
+        self.large = "print('Hello world!')\n" * 1000
+        self.script = Script.objects.create(
+            name="script",
+            author=self.user,
+            language="python",
+            files=[{"name": "main.py", "content": "import lib\nlib.run()"},
+                   {"name": "lib.py", "content": self.large}],
+        )
+        self.url = f"/scripts/{self.script.id}/"
+        self.client.force_login(self.user)
+
+    def patch(self, data, content_type="application/json", **headers):
+        """Send a PATCH request to the script."""
+        return self.client.patch(self.url, json.dumps(data),
+                                 content_type=content_type, headers=headers)
+
+    def assertFiles(self, files: list):
+        """Assert the files of the script, and their statistics."""
+        script = Script.objects.get(pk=self.script.pk)
+        self.assertEqual(script.get_files(), files)
+        self.assertEqual(script.file_count, len(files))
+        self.assertEqual(script.total_size, script_files_size(files))
+        self.assertEqual(script.blobs.count(),
+                         len({file['content'] for file in files}))
+
+    def test_operations(self):
+        """Test each operation."""
+        response = self.patch({"file_operations": [
+            {"op": "replace_range", "name": "main.py", "start": 11,
+             "end": 20, "text": "lib.main() # é"},
+            {"op": "add", "name": "data.py", "content": "DATA = \"\\n\"",
+             "index": 0},
+            {"op": "rename", "name": "lib.py", "new_name": "library.py"},
+            {"op": "test", "name": "library.py", "content": self.large},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        files = [{"name": "data.py", "content": "DATA = \"\\n\""},
+                 {"name": "main.py", "content": "import lib\nlib.main() # é"},
+                 {"name": "library.py", "content": self.large}]
+        self.assertEqual(response.data['files'], files)
+        self.assertFiles(files)
+
+        response = self.patch({"file_operations": [
+            {"op": "remove", "name": "data.py"},
+            {"op": "replace", "name": "main.py", "content": "pass"},
+        ]})
+        self.assertEqual(response.status_code, 200)
+        self.assertFiles([{"name": "main.py", "content": "pass"},
+                          {"name": "library.py", "content": self.large}])
+
+    def test_only_edited_files_loaded(self):
+        """Test that the contents of the other files are not loaded."""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.patch({"file_operations": [
+                {"op": "replace_range", "name": "main.py", "start": 0,
+                 "end": 0, "text": "# Edited\n"},
+            ]}, Prefer="return=minimal")
+        self.assertEqual(response.status_code, 204)
+        self.assertEqual(response.content, b"")
+        self.assertIn('ETag', response)
+        # The large file is neither read nor written
+        large_hash = Blob.from_content(self.large).hash
+        for query in queries.captured_queries:
+            if '"content"' in query['sql']:
+                self.assertNotIn(large_hash, query['sql'])
+        self.assertFiles([
+            {"name": "main.py", "content": "# Edited\nimport lib\nlib.run()"},
+            {"name": "lib.py", "content": self.large},
+        ])
+
+    def test_invalid_operations(self):
+        """Test that invalid operations are rejected without changes."""
+        for operation in (
+            {"op": "delete", "name": "main.py"},
+            {"op": "remove", "name": "missing.py"},
+            {"op": "add", "name": "main.py", "content": ""},
+            {"op": "add", "name": "noextension", "content": ""},
+            {"op": "rename", "name": "main.py", "new_name": "lib.py"},
+            {"op": "replace_range", "name": "main.py", "start": 5, "end": 2,
+             "text": ""},
+            {"op": "replace", "name": "main.py", "content": 42},
+            {"op": "replace", "name": "main.py",
+             "content": "x" * 1024 * 1024},
+            {"op": "test", "name": "main.py", "content": "outdated"},
+        ):
+            with self.subTest(operation=operation):
+                response = self.patch({"file_operations": [operation]})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn('file_operations', response.data)
+
+        response = self.patch({"file_operations": [
+            {"op": "remove", "name": "main.py"},
+            {"op": "remove", "name": "lib.py"},
+        ]})
+        self.assertEqual(response.status_code, 400)
+        self.assertFiles([
+            {"name": "main.py", "content": "import lib\nlib.run()"},
+            {"name": "lib.py", "content": self.large},
+        ])
+
+    def test_json_patch(self):
+        """Test the JSON Patches."""
+        response = self.patch([
+            {"op": "test", "path": "/files/1/name", "value": "lib.py"},
+            {"op": "replace", "path": "/files/0/content", "value": "pass"},
+            {"op": "replace", "path": "/files/1/name", "value": "util.py"},
+            {"op": "add", "path": "/files/-",
+             "value": {"name": "new.py", "content": "new"}},
+            {"op": "remove", "path": "/files/0"},
+            {"op": "replace", "path": "/name", "value": "patched"},
+        ], content_type="application/json-patch+json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['name'], "patched")
+        self.assertFiles([{"name": "util.py", "content": self.large},
+                          {"name": "new.py", "content": "new"}])
+
+        for patch in (
+            {"op": "replace"},
+            [{"op": "move", "from": "/files/0", "path": "/files/1"}],
+            [{"op": "remove", "path": "/files/5"}],
+            [{"op": "test", "path": "/files/0/name", "value": "lib.py"}],
+            [{"op": "replace", "path": 1, "value": "x"}],
+            [{"op": "replace", "path": None, "value": "x"}],
+            [{"op": ["replace"], "path": "/name", "value": "x"}],
+            [{"path": "/name", "value": "x"}],
+            ["replace"],
+        ):
+            with self.subTest(patch=patch):
+                response = self.patch(
+                    patch, content_type="application/json-patch+json"
+                )
+                self.assertEqual(response.status_code, 400)
+
+    def test_json_patch_collaborators(self):
+        """Test that collaborators can't change the collaborators."""
+        collaborator = User.objects.create_user(
+            "collaborator", "collaborator@example.com", "password"
+        )
+        other = User.objects.create_user("other", "other@example.com",
+                                         "password")
+        self.script.collaborators.add(collaborator)
+        self.client.force_login(collaborator)
+        collaborators = [f"http://testserver/users/{user.username}/"
+                         for user in (collaborator, other)]
+
+        for content_type, data in (
+            ("application/json", {"collaborators": collaborators}),
+            ("application/json-patch+json", [
+                {"op": "replace", "path": "/collaborators",
+                 "value": collaborators},
+            ]),
+        ):
+            with self.subTest(content_type=content_type):
+                response = self.patch(data, content_type=content_type)
+                self.assertEqual(response.status_code, 403)
+                self.assertEqual(
+                    list(self.script.collaborators.values_list('username',
+                                                               flat=True)),
+                    ["collaborator"]
+                )
+
+        # Other fields can be patched, and the author can change the
+        # collaborators
+        response = self.patch([
+            {"op": "replace", "path": "/name", "value": "patched"},
+        ], content_type="application/json-patch+json")
+        self.assertEqual(response.status_code, 200)
+        self.client.force_login(self.user)
+        response = self.patch([
+            {"op": "replace", "path": "/collaborators",
+             "value": collaborators},
+        ], content_type="application/json-patch+json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.script.collaborators.count(), 2)
+
+    def test_if_match(self):
+        """Test that outdated versions of the script are not edited."""
+        etag = self.client.get(self.url)['ETag']
+        operations = {"file_operations": [
+            {"op": "replace_range", "name": "main.py", "start": 0, "end": 0,
+             "text": "# Edited\n"},
+        ]}
+        response = self.patch(operations, If_Match=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+        # The script was modified since
+        response = self.patch(operations, If_Match=etag)
+        self.assertEqual(response.status_code, 412)
+
+    def test_create(self):
+        """Test that file operations are not allowed on creation."""
+        response = self.client.post("/scripts/", {
+            "name": "new",
+            "language": "python",
+            "files": [{"name": "main.py", "content": "pass"}],
+            "file_operations": [{"op": "remove", "name": "main.py"}],
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('file_operations', response.data)
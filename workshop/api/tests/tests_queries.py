@@ -0,0 +1,74 @@
+"""Tests for the number of queries run by the /scripts/ endpoint."""
+from django.test import TestCase, override_settings
+
+# Import the models to create the scripts directly
+from workshop.api.models import Script, OS, Tag, User
+from workshop.api.tests.helpers import create_script
+
+
+# Count the results of every list, instead of using cached counts, and don't
+# save the views during the tests
+@override_settings(PAGINATION_COUNT_CACHE_TIMEOUT=0,
+                   SCRIPT_VIEWS_FLUSH_INTERVAL=3600)
+class ScriptQueriesTest(TestCase):
+    """Test that the number of queries doesn't depend on the page size."""
+
+    def setUp(self):
+        """Create scripts with all their related objects."""
+        self.users = [
+            User.objects.create_user(f"user{index}", f"user{index}@a.com",
+                                     "password")
+            for index in range(3)
+        ]
+        self.tags = [Tag.objects.create(name=f"tag{index}")
+                     for index in range(3)]
+        self.os = [OS.objects.create(name=f"os{index}")
+                   for index in range(3)]
+
+        self.create_scripts(5)
+
+    def create_scripts(self, count: int):
+        """Create scripts with collaborators, tags, OS and ratings."""
+        for index in range(count):
+            create_script(self.users[0], f"script{index}",
+                          collaborators=self.users[1:], tags=self.tags,
+                          compatibility=self.os, raters=self.users)
+
+    def test_list_queries(self):
+        """Test the number of queries of the script list."""
+        # ETag (last modification, last change and last deletion), count
+        # (shared with the ETag), scripts, ratings, collaborators,
+        # compatibility, tags
+        with self.assertNumQueries(9):
+            response = self.client.get("/scripts/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), 5)
+
+        # The number of queries must not grow with the number of scripts
+        self.create_scripts(20)
+        with self.assertNumQueries(9):
+            response = self.client.get("/scripts/")
+        self.assertEqual(len(response.data['results']), 25)
+
+        # Each script must still have its related objects
+        for script in response.data['results']:
+            self.assertEqual(len(script['ratings']), 3)
+            self.assertEqual(len(script['collaborators']), 2)
+            self.assertEqual(len(script['compatibility']), 3)
+            self.assertEqual(len(script['tags']), 3)
+
+    def test_detail_queries(self):
+        """Test the number of queries of the script detail."""
+        script = Script.objects.first()
+
+        # Script, file contents, ratings, collaborators, compatibility, tags
+        # (the view is saved later)
+        with self.assertNumQueries(6):
+            response = self.client.get(f"/scripts/{script.id}/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['ratings']), 3)
+
+        # Without the view counter
+        with self.assertNumQueries(6):
+            response = self.client.get(f"/scripts/{script.id}/?skip_view=1")
+        self.assertEqual(response.status_code, 200)
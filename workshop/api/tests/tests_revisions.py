@@ -0,0 +1,230 @@
+"""Tests for the revisions of the scripts."""
+import io
+import json
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+# Import the models to create the scripts directly
+from workshop.api.models import Blob, Script, ScriptRevision, User
+from workshop.api.revisions import apply_delta, diff_files, make_delta
+
+
+class DeltaTest(TestCase):
+    """Test the deltas between versions of a file."""
+
+    def test_round_trip(self):
+        """Test that the deltas rebuild the new versions."""
+        base = "".join(f"line {number}\n" for number in range(100))
+        for content in (
+            base,
+            "",
+            base.replace("line 50\n", "line fifty\n"),
+            "first\n" + base + "last",
+            base.replace("line 10\n", "").replace("line 90\n", "x\ny\n"),
+            "completely different",
+        ):
+            with self.subTest(content=content[:20]):
+                delta = make_delta(base, content)
+                self.assertEqual(apply_delta(base, delta), content)
+        self.assertEqual(apply_delta("", make_delta("", "new")), "new")
+
+    def test_small_edit(self):
+        """Test that a small edit gives a small delta."""
+        base = "print('Hello world!')\n" * 1000
+        content = base[:5000] + "# Edited\n" + base[5000:]
+        delta = make_delta(base, content)
+        self.assertLess(len(json.dumps(delta)), 100)
+
+    def test_diff_without_newline(self):
+        """Test the diffs of files not ending with a newline."""
+        diffs = diff_files([{"name": "a.py", "content": "x = 1\nnew"}],
+                           [{"name": "a.py", "content": "x = 1\nNew"}])
+        self.assertEqual(diffs[0]['diff'], (
+            "--- a/a.py\n+++ b/a.py\n@@ -1,2 +1,2 @@\n x = 1\n"
+            "-new\n\\ No newline at end of file\n"
+            "+New\n\\ No newline at end of file\n"
+        ))
+
+        # Only the version without a newline has the marker
+        diffs = diff_files([{"name": "a.py", "content": "old"}],
+                           [{"name": "a.py", "content": "old\n"}])
+        self.assertEqual(diffs[0]['diff'], (
+            "--- a/a.py\n+++ b/a.py\n@@ -1 +1 @@\n"
+            "-old\n\\ No newline at end of file\n+old\n"
+        ))
+
+
+class RevisionTest(TestCase):
+    """Test the revision history of the scripts."""
+
+    def setUp(self):
+        """Create a user and a script."""
+        self.user = User.objects.create_user("user", "user@example.com",
+                                             "password")
+        self.line = "print('Hello world!')  # Some comment\n"
+        self.script = Script.objects.create(
+            name="script",
+            author=self.user,
+            language="python",
+            files=[{"name": "main.py", "content": "import lib\n"},
+                   {"name": "lib.py", "content": self.line * 500}],
+        )
+        self.url = f"/scripts/{self.script.id}/revisions/"
+        self.client.force_login(self.user)
+
+    def edit(self, text: str):
+        """Insert a line at the start of main.py."""
+        response = self.client.patch(
+            f"/scripts/{self.script.id}/",
+            json.dumps({"file_operations": [
+                {"op": "replace_range", "name": "main.py", "start": 0,
+                 "end": 0, "text": text},
+            ]}),
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_revisions_recorded(self):
+        """Test that each change of the files records a revision."""
+        self.edit("# One\n")
+        self.edit("# Two\n")
+
+        # Saves that don't change the files don't record revisions
+        response = self.client.patch(f"/scripts/{self.script.id}/",
+                                     {"name": "renamed"},
+                                     content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+
+        revisions = ScriptRevision.objects.filter(script=self.script)
+        self.assertEqual(
+            list(revisions.order_by('number').values_list('number',
+                                                          'checkpoint')),
+            [(1, 1), (2, 1), (3, 1)]
+        )
+        for revision in revisions:
+            self.assertEqual(revision.author, self.user)
+
+        # Only the changed file is stored, as a small delta
+        deltas = revisions.get(number=3).deltas
+        self.assertEqual(len(deltas), 1)
+        self.assertEqual(deltas[0]['ops'], ["# Two\n", [0, 2]])
+
+    def test_rebuild(self):
+        """Test that every revision rebuilds its files."""
+        versions = [self.script.get_files()]
+        for number in range(8):
+            self.edit(f"# Edit {number}\n")
+            versions.append(Script.objects.get(pk=self.script.pk).get_files())
+
+        # The old contents are not needed by the revisions
+        call_command('collect_blobs', stdout=io.StringIO())
+
+        revisions = ScriptRevision.objects.filter(
+            script=self.script
+        ).order_by('number')
+        self.assertEqual(len(revisions), len(versions))
+        for revision, files in zip(revisions, versions):
+            with self.subTest(number=revision.number):
+                self.assertEqual(revision.get_files(), files)
+
+    @override_settings(SCRIPT_REVISIONS_MAX_CHAIN=3)
+    def test_checkpoints(self):
+        """Test that checkpoints bound the deltas to apply."""
+        for number in range(7):
+            self.edit(f"# Edit {number}\n")
+        checkpoints = ScriptRevision.objects.filter(
+            script=self.script
+        ).order_by('number').values_list('checkpoint', flat=True)
+        self.assertEqual(list(checkpoints), [1, 1, 1, 4, 4, 4, 7, 7])
+
+        revision = ScriptRevision.objects.get(script=self.script, number=6)
+        with self.assertNumQueries(2):
+            files = revision.get_files()
+        self.assertEqual(files[0]['content'],
+                         "".join(f"# Edit {number}\n"
+                                 for number in reversed(range(5)))
+                         + "import lib\n")
+
+        # Large rewrites make checkpoints too
+        self.client.patch(f"/scripts/{self.script.id}/", {
+            "files": [{"name": "main.py", "content": "import os\n" * 2000}],
+        }, content_type="application/json")
+        latest = ScriptRevision.objects.filter(
+            script=self.script
+        ).latest('number')
+        self.assertTrue(latest.is_checkpoint)
+
+    def test_storage_growth(self):
+        """Test that the history grows with the edits, not the saves."""
+        for number in range(30):
+            self.edit(f"# Edit {number}\n")
+        call_command('collect_blobs', stdout=io.StringIO())
+
+        stored = sum(blob.size for blob in Blob.objects.all())
+        stored += sum(len(json.dumps(revision.deltas))
+                      for revision in ScriptRevision.objects.all())
+        # Less than two copies of the script, instead of 31
+        self.assertLess(stored, 2 * self.script.total_size)
+
+    def test_endpoints(self):
+        """Test the list, the detail and the diff of the revisions."""
+        self.edit("# Edited\n")
+
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([revision['number']
+                          for revision in response.data['results']], [2, 1])
+        self.assertEqual(response.data['results'][0]['file_count'], 2)
+        self.assertTrue(response.data['results'][0]['author'].endswith(
+            f"/users/{self.user.pk}/"
+        ))
+
+        response = self.client.get(response.data['results'][1]['url'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['files'][0],
+                         {"name": "main.py", "content": "import lib\n"})
+
+        response = self.client.get(self.url + "2/diff/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['from'], 1)
+        self.assertEqual(response.data['to'], 2)
+        self.assertEqual(response.data['files'], [{
+            "name": "main.py",
+            "status": "modified",
+            "diff": "--- a/main.py\n+++ b/main.py\n@@ -1 +1,2 @@\n"
+                    "+# Edited\n import lib\n",
+        }])
+
+        # From an empty script
+        response = self.client.get(self.url + "2/diff/?from=0")
+        self.assertEqual(response.data['from'], None)
+        self.assertEqual([file['status'] for file in response.data['files']],
+                         ["added", "added"])
+
+        for url in ("3/", "3/diff/", "2/diff/?from=5"):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(self.url + url).status_code,
+                                 404)
+        self.assertEqual(self.client.get(self.url + "2/diff/?from=x")
+                         .status_code, 400)
+
+    def test_format_suffixes(self):
+        """Test the revisions with a format suffix."""
+        self.edit("# Edited\n")
+        url = self.url.rstrip("/")
+        for suffix in (".json", "/2.json", "/2/diff.json"):
+            with self.subTest(suffix=suffix):
+                response = self.client.get(url + suffix)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['Content-Type'], "application/json")
+
+    def test_private_script(self):
+        """Test that the revisions of private scripts are hidden."""
+        self.script.is_public = False
+        self.script.save(update_fields=['is_public'])
+        self.client.logout()
+        for url in ("", "1/", "1/diff/"):
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(self.url + url).status_code,
+                                 404)
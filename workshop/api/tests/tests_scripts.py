@@ -1,10 +1,13 @@
 """Tests for /scripts/ endpoint."""
 import json
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 
 # Import User model to create a superuser
-from workshop.api.models import User
+from workshop.api.models import Script, User
+
+# Import the view counter to save the views
+from workshop.api.counters import script_views
 
 
 class ScriptsTest(TestCase):
@@ -50,7 +53,16 @@ class ScriptsTest(TestCase):
             "tags",
             "is_public",
             "is_unlisted",
-            "runner"
+            "runner",
+            "file_count",
+            "total_size",
+            "unique_views"
+        ]
+
+        # Lists only show a summary of the scripts, without their content
+        self.scriptSummaryFields = [
+            field for field in self.scriptPublicFields
+            if field not in ["files", "long_description"]
         ]
 
         # Register a user
@@ -136,11 +148,13 @@ class ScriptsTest(TestCase):
         # Logout
         self.client.logout()
 
-    def ensure_script_fields(self, script):
+    def ensure_script_fields(self, script, fields=None):
         """Ensure that all fields are present in the script."""
-        for field in self.scriptPublicFields:
+        if fields is None:
+            fields = self.scriptPublicFields
+        for field in fields:
             self.assertIn(field, script)
-        self.assertEqual(len(script), len(self.scriptPublicFields))
+        self.assertEqual(len(script), len(fields))
 
     def ensure_files_valid(self, files):
         """Ensure that files are valid."""
@@ -165,13 +179,15 @@ class ScriptsTest(TestCase):
         )
         self.assertEqual(response.status_code, 401)
 
-        # Check that we can't remove scripts
-        response = self.client.delete("/scripts/1/")
+        # Check that we can't remove scripts (the id is a well-formed UUID,
+        # so that it matches the route)
+        url = "/scripts/00000000-0000-0000-0000-000000000001/"
+        response = self.client.delete(url)
         self.assertEqual(response.status_code, 401)
 
         # Check we can't edit scripts
         response = self.client.put(
-            "/scripts/1/",
+            url,
             {
                 "name": "test",
                 "language": "python",
@@ -620,6 +636,23 @@ class ScriptsTest(TestCase):
         )
         self.assertEqual(response.status_code, 400)
 
+        # Check that names and contents must be strings
+        for file in ({"name": "test.py", "content": 123},
+                     {"name": 123, "content": "print('Hello, world!')"},
+                     {"name": "test.py", "content": None}):
+            response = self.client.post(
+                "/scripts/",
+                {"name": "test", "language": "python", "files": [file]},
+                content_type="application/json"
+            )
+            self.assertEqual(response.status_code, 400)
+        response = self.client.post(
+            "/scripts/",
+            {"name": "test", "language": "python", "files": ["test.py"]},
+            content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+
         # Check that we can't create a file with no extension
         self.create_script_with_file_name("test", 400)
 
@@ -1072,17 +1105,33 @@ class ScriptsTest(TestCase):
         # Check the return code
         self.assertEqual(result.status_code, 200)
 
-        # Check that the script fields are present
+        # Check that the summary fields are present
         for script in result.data['results']:
-            self.ensure_script_fields(script)
-
-        # Check that the files are valid
-        for script in result.data['results']:
-            self.ensure_files_valid(script['files'])
+            self.ensure_script_fields(script, self.scriptSummaryFields)
 
         # Return the result
         return result
 
+    def test_scripts_list_summary(self):
+        """Test that lists don't show the content of the scripts."""
+        result = self.ensure_list_valid()
+        self.assertEqual(len(result.data['results']), 2)
+
+        # The size of the files is still shown
+        for script in result.data['results']:
+            self.assertEqual(script['file_count'], 1)
+            self.assertEqual(script['total_size'], len(json.dumps([{
+                "name": "test.py",
+                "content": "print('Hello world!')",
+            }])))
+
+        # The content is shown when retrieving a single script
+        result = self.client.get(self.user_script['url'])
+        self.assertEqual(result.status_code, 200)
+        self.ensure_script_fields(result.data)
+        self.ensure_files_valid(result.data['files'])
+        self.assertEqual(result.data['long_description'], "test long")
+
     def test_scripts_stats(self):
         """Test that unauthenticated users can only list public scripts."""
         # Log in as the user
@@ -1128,4 +1177,53 @@ class ScriptsTest(TestCase):
         self.assertEqual(result.data, {
             "public_projects": 2, "total_projects": 3})
 
-    # TODO: Test script download and views when they are implemented
+    @override_settings(SCRIPT_VIEWS_FLUSH_INTERVAL=3600)
+    def test_script_views(self):
+        """Test that the views are counted, and saved in batches."""
+        # Start without views from the other tests
+        script_views.flush()
+
+        # The views are shown before being saved
+        response = self.client.get(self.user_script['url'])
+        self.assertEqual(response.data['views'], 1)
+        response = self.client.get(self.user_script['url'])
+        self.assertEqual(response.data['views'], 2)
+        script = Script.objects.get(id=self.user_script['id'])
+        self.assertEqual(script.views, 0)
+
+        # Views can be skipped
+        response = self.client.get(self.user_script['url'] + "?skip_view=1")
+        self.assertEqual(response.data['views'], 2)
+
+        # Views saved by another process are not lost
+        Script.objects.filter(id=script.id).update(views=5)
+        script_views.flush()
+        script.refresh_from_db()
+        self.assertEqual(script.views, 7)
+        response = self.client.get(self.user_script['url'] + "?skip_view=1")
+        self.assertEqual(response.data['views'], 7)
+
+        # Views are saved once the interval is elapsed
+        with override_settings(SCRIPT_VIEWS_FLUSH_INTERVAL=0):
+            response = self.client.get(self.user_script['url'])
+        self.assertEqual(response.data['views'], 8)
+        script.refresh_from_db()
+        self.assertEqual(script.views, 8)
+
+        # All these views were done by the same anonymous user
+        self.assertEqual(script.unique_views, 1)
+
+        # Views by other users are counted as unique views
+        for user in (self.user, self.user2):
+            self.client.login(username=user['username'],
+                              password=user['password'])
+            for _ in range(3):
+                self.client.get(self.user_script['url'])
+        script_views.flush()
+        script.refresh_from_db()
+        self.assertEqual(script.views, 14)
+        self.assertEqual(script.unique_views, 3)
+        response = self.client.get(self.user_script['url'] + "?skip_view=1")
+        self.assertEqual(response.data['unique_views'], 3)
+
+    # TODO: Test script download when it is implemented
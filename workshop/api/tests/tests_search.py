@@ -0,0 +1,193 @@
+"""Tests for the search of the scripts with the search index."""
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+# Import the models to create the scripts directly
+from workshop.api.models import Blob, BlobToken, OS, Script, ScriptToken, Tag, User
+from workshop.api.search import tokenize
+from workshop.api.tests.helpers import create_script
+
+
+class SearchTest(TestCase):
+    """Test the search of the scripts (?search=)."""
+
+    def setUp(self):
+        """Create users, a tag and an OS."""
+        self.user = User.objects.create_user("alice", "alice@example.com",
+                                             "password")
+        self.other = User.objects.create_user("bob", "bob@example.com",
+                                              "password")
+        self.tag = Tag.objects.create(name="machine-learning")
+        self.os = OS.objects.create(name="Upsilon")
+
+    def create_script(self, name: str, content: str = "pass",
+                      **fields) -> Script:
+        """Create a script with a main.py file."""
+        return create_script(fields.pop('author', self.user), name,
+                             [{"name": "main.py", "content": content}],
+                             **fields)
+
+    def search(self, terms: str) -> list:
+        """Return the names of the scripts found, sorted."""
+        response = self.client.get("/scripts/", {'search': terms})
+        self.assertEqual(response.status_code, 200)
+        return sorted(script['name'] for script in response.data['results'])
+
+    def test_tokenize(self):
+        """Test the tokens of texts."""
+        self.assertEqual(tokenize("print_hello('Café', x2)", "Print"),
+                         {"print", "hello", "café", "x2"})
+        self.assertEqual(tokenize("a" * 100), {"a" * 64})
+        self.assertEqual(tokenize("-- !"), set())
+
+    def test_fields(self):
+        """Test the search in the indexed fields."""
+        script = self.create_script(
+            "Hello World", "def draw_circle(radius):\n    pass",
+            short_description="Greets", long_description="In French: salut"
+        )
+        script.tags.set([self.tag])
+        script.compatibility.set([self.os])
+        self.create_script("Other", author=self.other)
+
+        for terms in ("hello", "WOR", "greets", "salut", "circle", "radius",
+                      "machine", "learning", "upsilon", "alice",
+                      str(script.id), str(script.id)[-12:]):
+            with self.subTest(terms=terms):
+                self.assertEqual(self.search(terms), ["Hello World"])
+
+        # Terms match the beginning of the words only
+        self.assertEqual(self.search("orld"), [])
+        self.assertEqual(self.search("bob"), ["Other"])
+        self.assertEqual(self.search("python"), ["Hello World", "Other"])
+
+    def test_terms(self):
+        """Test that the scripts must match every term."""
+        self.create_script("Snake game", "import kandinsky")
+        self.create_script("Snake solver", "import math")
+        self.assertEqual(self.search("snake"), ["Snake game", "Snake solver"])
+        self.assertEqual(self.search("snake kandinsky"), ["Snake game"])
+        self.assertEqual(self.search("snake,math"), ["Snake solver"])
+        self.assertEqual(self.search("snake turtle"), [])
+
+        # Punctuation alone isn't searched, and isn't a wildcard
+        self.assertEqual(len(self.search("%")), 2)
+        self.assertEqual(self.search("sn%ke"), [])
+
+    def test_updates(self):
+        """Test that the index follows the changes of the scripts."""
+        script = self.create_script("Clock", "import time")
+        self.client.force_login(self.user)
+        response = self.client.patch(f"/scripts/{script.id}/", {
+            "name": "Timer",
+            "files": [{"name": "main.py", "content": "import turtle"}],
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.search("timer turtle"), ["Timer"])
+        self.assertEqual(self.search("clock"), [])
+        self.assertEqual(self.search("time"), ["Timer"])
+
+        # Tags and OS, from both sides
+        script.tags.add(self.tag)
+        self.assertEqual(self.search("machine"), ["Timer"])
+        self.tag.script_set.clear()
+        self.assertEqual(self.search("machine"), [])
+        self.os.script_set.add(script)
+        self.assertEqual(self.search("upsilon"), ["Timer"])
+        self.os.delete()
+        self.assertEqual(self.search("upsilon"), [])
+
+        # Saving other fields doesn't index the script again
+        script = Script.objects.get(pk=script.pk)
+        with CaptureQueriesContext(connection) as queries:
+            script.save(update_fields=['views'])
+        self.assertFalse(any("scripttoken" in query['sql']
+                             for query in queries))
+
+        script.delete()
+        self.assertFalse(ScriptToken.objects.exists())
+
+    def test_file_names(self):
+        """Test the search in the names of the files."""
+        script = self.create_script("Game")
+        self.assertEqual(self.search("main"), ["Game"])
+        self.assertEqual(self.search("main.py"), ["Game"])
+
+        # The names are indexed again when the files change
+        self.client.force_login(self.user)
+        response = self.client.patch(f"/scripts/{script.id}/", {
+            "file_operations": [
+                {"op": "rename", "name": "main.py", "new_name": "snake.py"},
+            ],
+        }, content_type="application/json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.search("snake"), ["Game"])
+        self.assertEqual(self.search("main"), [])
+
+    @override_settings(SCRIPT_FILES_COMPRESSION=True)
+    def test_files(self):
+        """Test the search in the files, indexed once per content."""
+        content = "from kandinsky import fill_rect\n" * 100
+        self.create_script("Drawing", content)
+        self.create_script("Fork", content)
+        self.assertTrue(Blob.objects.get(pk=Blob.from_content(content).hash)
+                        .codec)
+        self.assertEqual(self.search("fill_rect"), ["Drawing", "Fork"])
+        self.assertEqual(
+            BlobToken.objects.values_list('token', flat=True).distinct()
+            .count(),
+            BlobToken.objects.count()
+        )
+
+    def test_bulk(self):
+        """Test that the scripts created in bulk are indexed."""
+        self.client.force_login(self.user)
+        response = self.client.post("/scripts/bulk/", [{
+            "name": f"Bulk {index}", "language": "python",
+            "files": [{"name": "main.py", "content": f"value{index} = 1"}],
+            "tags": ["http://testserver/tags/machine-learning/"],
+        } for index in range(3)], content_type="application/json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.search("bulk machine"),
+                         ["Bulk 0", "Bulk 1", "Bulk 2"])
+        self.assertEqual(self.search("value1"), ["Bulk 1"])
+
+    def test_visibility(self):
+        """Test that the search only finds the visible scripts."""
+        self.create_script("Public game")
+        self.create_script("Private game", is_public=False)
+        self.assertEqual(self.search("game"), ["Public game"])
+        self.client.force_login(self.user)
+        self.assertEqual(self.search("game"), ["Private game", "Public game"])
+
+    def test_common_tokens(self):
+        """Test that the common tokens find the same scripts."""
+        script = self.create_script("Snake game", "import kandinsky",
+                                    short_description="A game")
+        script.tags.set([self.tag])
+        self.create_script("Snake solver", "import math")
+        self.create_script("Private game", is_public=False)
+        searches = ("snake", "snake kandinsky", "game", "machine", "main",
+                    "math snake", "turtle", "%")
+        results = [self.search(terms) for terms in searches]
+
+        # Every token is common, and the scripts are checked one by one
+        with override_settings(SEARCH_COMMON_TERM_TOKENS=1):
+            for terms, found in zip(searches, results):
+                with self.subTest(terms=terms):
+                    self.assertEqual(self.search(terms), found)
+            with CaptureQueriesContext(connection) as queries:
+                self.search("snake")
+        self.assertTrue(any("EXISTS" in query['sql']
+                            for query in queries))
+        self.assertEqual(results[0], ["Snake game", "Snake solver"])
+
+    def test_index_lookup(self):
+        """Test that the tokens are looked up with the index."""
+        self.create_script("Indexed")
+        queryset = ScriptToken.objects.filter(token__istartswith="ind")
+        self.assertEqual(queryset.count(), 1)
+        if connection.vendor == 'sqlite':
+            self.assertIn("USING COVERING INDEX",
+                          queryset.values('script').explain())
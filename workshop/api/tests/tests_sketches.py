@@ -0,0 +1,47 @@
+"""Tests for the probabilistic sketches."""
+from django.test import SimpleTestCase
+
+from workshop.api.sketches import HyperLogLog
+
+
+class HyperLogLogTest(SimpleTestCase):
+    """Test the estimations of the HyperLogLog sketch."""
+
+    def test_count(self):
+        """Test that the estimations are close to the real counts."""
+        for count in (0, 1, 10, 1000, 50000):
+            with self.subTest(count=count):
+                sketch = HyperLogLog()
+                for value in range(count):
+                    sketch.add(str(value).encode())
+                self.assertAlmostEqual(sketch.count(), count,
+                                       delta=count * 0.1)
+
+    def test_duplicates(self):
+        """Test that duplicated values are only counted once."""
+        sketch = HyperLogLog()
+        for _ in range(1000):
+            sketch.add(b"viewer")
+        self.assertEqual(sketch.count(), 1)
+
+    def test_merge(self):
+        """Test that merged sketches count the union of their values."""
+        first, second = HyperLogLog(), HyperLogLog()
+        for value in range(2000):
+            first.add(str(value).encode())
+        for value in range(1000, 3000):
+            second.add(str(value).encode())
+        first.merge(second)
+        self.assertAlmostEqual(first.count(), 3000, delta=300)
+
+    def test_storage(self):
+        """Test that the sketches have a fixed size, and can be restored."""
+        sketch = HyperLogLog()
+        for value in range(10000):
+            sketch.add(str(value).encode())
+        data = sketch.to_bytes()
+        self.assertEqual(len(data), HyperLogLog.SIZE)
+        self.assertEqual(HyperLogLog(data).count(), sketch.count())
+
+        with self.assertRaises(ValueError):
+            HyperLogLog(b"invalid")
@@ -0,0 +1,50 @@
+"""Tests for the time-ordered UUIDs of the scripts and ratings."""
+import time
+import uuid
+
+from django.test import TestCase
+
+# Import the models to create the objects directly
+from workshop.api.models import Script, Rating, User, uuid7
+
+
+class UUIDTest(TestCase):
+    """Test that new primary keys are time-ordered UUIDs."""
+
+    def test_uuid7(self):
+        """Test the format and the order of the UUIDs."""
+        uuids = []
+        for _ in range(50):
+            uuids.append(uuid7())
+            time.sleep(0.001)
+
+        for value in uuids:
+            self.assertEqual(value.version, 7)
+            self.assertEqual(value.variant, uuid.RFC_4122)
+
+        # The UUIDs (and their representation in the database) are sorted by
+        # creation time
+        self.assertEqual(sorted(uuids), uuids)
+        self.assertEqual(sorted(value.hex for value in uuids),
+                         [value.hex for value in uuids])
+        self.assertEqual(len(set(uuids)), len(uuids))
+
+    def test_models(self):
+        """Test that scripts and ratings use time-ordered UUIDs."""
+        user = User.objects.create_user("user", "user@example.com",
+                                        "password")
+        script = Script.objects.create(
+            name="script",
+            author=user,
+            language="python",
+            files=[{"name": "test.py", "content": "print('Hello!')"}],
+        )
+        rating = Rating.objects.create(rating=5, user=user, script=script)
+        self.assertEqual(script.id.version, 7)
+        self.assertEqual(rating.id.version, 7)
+
+        # Existing scripts with random UUIDs are still usable
+        script.id = uuid.uuid4()
+        script.save()
+        response = self.client.get(f"/scripts/{script.id}/")
+        self.assertEqual(response.status_code, 200)
@@ -0,0 +1,101 @@
+"""Tests for the visibility rules of the scripts."""
+import itertools
+
+from django.contrib.auth.models import AnonymousUser
+from django.test import TestCase
+
+# Import the models to create the scripts directly
+from workshop.api.models import Script, User
+
+
+def legacy_visible_scripts(user, pk=None):
+    """Return the visible scripts, the way ScriptViewSet used to do it."""
+    if user.is_superuser:
+        return Script.objects.all()
+    queryset = Script.objects.filter(is_public=True)
+    if pk is not None:
+        queryset = queryset.filter(id=pk)
+    else:
+        queryset = queryset.filter(is_unlisted=False)
+    if user.is_authenticated:
+        queryset = queryset | Script.objects.filter(author=user)
+        queryset = queryset | Script.objects.filter(collaborators=user)
+    return queryset.distinct()
+
+
+class VisibilityTest(TestCase):
+    """Test that visible_to returns the same scripts as the old query."""
+
+    def setUp(self):
+        """Create a script for every combination of visibility settings."""
+        self.author = User.objects.create_user("author", "a@a.com", "pass")
+        self.collaborator = User.objects.create_user("collaborator",
+                                                     "c@a.com", "pass")
+        self.other_collaborator = User.objects.create_user("other",
+                                                           "o@a.com", "pass")
+        self.stranger = User.objects.create_user("stranger", "s@a.com",
+                                                 "pass")
+        self.admin = User.objects.create_superuser("admin", "ad@a.com",
+                                                   "pass")
+
+        for is_public, is_unlisted, collaborators, author in \
+                itertools.product(
+                    (True, False), (True, False),
+                    ((), (self.collaborator,),
+                     (self.collaborator, self.other_collaborator)),
+                    (self.author, self.collaborator)):
+            script = Script.objects.create(
+                name=f"{is_public}-{is_unlisted}-{len(collaborators)}",
+                author=author,
+                language="python",
+                files=[{"name": "test.py", "content": "print('Hello!')"}],
+                is_public=is_public,
+                is_unlisted=is_unlisted,
+            )
+            script.collaborators.set(
+                [user for user in collaborators if user != author]
+            )
+
+        self.users = [AnonymousUser(), self.author, self.collaborator,
+                      self.other_collaborator, self.stranger, self.admin]
+
+    def test_list_equivalence(self):
+        """Test that lists contain the same scripts, without duplicates."""
+        for user in self.users:
+            with self.subTest(user=str(user)):
+                expected = list(legacy_visible_scripts(user)
+                                .values_list('id', flat=True))
+                visible = list(Script.objects.visible_to(user)
+                               .values_list('id', flat=True))
+                self.assertEqual(len(visible), len(set(visible)))
+                self.assertEqual(set(visible), set(expected))
+
+    def test_detail_equivalence(self):
+        """Test that the same scripts can be accessed directly."""
+        for user, script in itertools.product(self.users,
+                                              Script.objects.all()):
+            with self.subTest(user=str(user), script=script.name):
+                expected = legacy_visible_scripts(user, script.id)\
+                    .filter(id=script.id).exists()
+                visible = Script.objects.visible_to(user, listing=False)\
+                    .filter(id=script.id).exists()
+                self.assertEqual(visible, expected)
+
+    def test_no_distinct(self):
+        """Test that the visibility query doesn't use DISTINCT."""
+        queryset = Script.objects.visible_to(self.collaborator)
+        self.assertFalse(queryset.query.distinct)
+        self.assertNotIn("DISTINCT", str(queryset.query))
+
+    def test_api_equivalence(self):
+        """Test that the API lists the same scripts as the old query."""
+        for user in self.users[1:]:
+            with self.subTest(user=str(user)):
+                self.client.force_login(user)
+                response = self.client.get("/scripts/")
+                self.assertEqual(response.status_code, 200)
+                ids = [script['id'] for script in response.data['results']]
+                expected = legacy_visible_scripts(user)\
+                    .values_list('id', flat=True)
+                self.assertEqual(len(ids), len(set(ids)))
+                self.assertEqual({str(pk) for pk in expected}, set(ids))
@@ -24,6 +24,9 @@ ALLOWED_RUNNERS = [
 # Max script size is 1 MiB
 MAX_SCRIPT_SIZE = 1024 * 1024
 
+# The SHA-256 hash of the content of a file (hexadecimal, see Blob)
+FILE_HASH_RE = re.compile(r'[0-9a-f]{64}')
+
 
 def validate_language(value):
     """Validate the language of a script."""
@@ -52,10 +55,39 @@ def validate_runner(value):
         )
 
 
+def script_files_size(value) -> int:
+    """Return the size of script files, as counted against MAX_SCRIPT_SIZE."""
+    return len(json.dumps(value))
+
+
+def script_file_size(name: str, content: str) -> int:
+    """Return the size of a single file in script_files_size."""
+    return len(json.dumps({'name': name, 'content': content}))
+
+
+def validate_file_name(name):
+    """Validate the name of a script file."""
+    # Check that file name is valid (has extension and does not contain any
+    # slash)
+    if '.' not in name:
+        raise ValidationError(
+            _('The file is not a valid JSON file.'
+              'The file %(name)s has no extension.'),
+            params={'name': name},
+        )
+
+    if '/' in name:
+        raise ValidationError(
+            _('The file is not a valid JSON file.'
+              'The file %(name)s contains a slash.'),
+            params={'name': name},
+        )
+
+
 def validate_script_files(value):
     """Validate the script file."""
     # Check file size
-    if len(json.dumps(value)) > MAX_SCRIPT_SIZE:
+    if script_files_size(value) > MAX_SCRIPT_SIZE:
         raise ValidationError(
             _('The file is too large (%(size)s bytes). '
               'The maximum file size is %(max_size)s bytes.'),
@@ -81,6 +113,12 @@ def validate_script_files(value):
         )
     # Check that the format is correct (no missing or extra fields)
     for file in value:
+        if not isinstance(file, dict):
+            raise ValidationError(
+                _('The file is not a valid JSON file.'
+                  'The files must be objects.'),
+            )
+
         # Ensure that content and name are present
         if 'name' not in file:
             raise ValidationError(
@@ -102,19 +140,77 @@ def validate_script_files(value):
                 params={'name': file['name']},
             )
 
-        # Check that file name is valid (has extension and does not contain any
-        # slash)
-        if '.' not in file['name']:
+        # Ensure that content and name are strings
+        if not isinstance(file['name'], str):
+            raise ValidationError(
+                _('The file is not a valid JSON file.'
+                  'The field "name" must be a string.'),
+            )
+        if not isinstance(file['content'], str):
             raise ValidationError(
                 _('The file is not a valid JSON file.'
-                  'The file %(name)s has no extension.'),
+                  'The field "content" of file %(name)s must be a string.'),
                 params={'name': file['name']},
             )
 
-        if '/' in file['name']:
+        validate_file_name(file['name'])
+
+    # Check that the file names are unique
+    names = [file['name'] for file in value]
+    if len(names) != len(set(names)):
+        raise ValidationError(
+            _('The file is not a valid JSON file.'
+              'The file names are not unique.'),
+        )
+
+
+def validate_script_manifest(value):
+    """Validate the manifest of the files of a script (see Script.files).
+
+    Each file has a name, and the hash and the size of its content. The
+    files can also be given with their contents (see validate_script_files),
+    which are stored as blobs when the script is saved.
+    """
+    if not isinstance(value, list):
+        raise ValidationError(
+            _('The file is not a valid JSON file.'
+              'The files must be a list.'),
+        )
+    if any(isinstance(file, dict) and 'content' in file for file in value):
+        validate_script_files(value)
+        return
+
+    if len(value) == 0:
+        raise ValidationError(
+            _('The file is empty.'),
+        )
+    for file in value:
+        # Ensure that name, hash and size are present, without extra fields
+        if not isinstance(file, dict) or set(file) != {'name', 'hash', 'size'}:
+            raise ValidationError(
+                _('The file is not a valid JSON file.'
+                  'The files must have a name, a hash and a size.'),
+            )
+
+        if not isinstance(file['name'], str):
+            raise ValidationError(
+                _('The file is not a valid JSON file.'
+                  'The field "name" must be a string.'),
+            )
+        validate_file_name(file['name'])
+
+        if not isinstance(file['hash'], str) \
+                or FILE_HASH_RE.fullmatch(file['hash']) is None:
+            raise ValidationError(
+                _('The file is not a valid JSON file.'
+                  'The hash of file %(name)s must be a SHA-256 hash.'),
+                params={'name': file['name']},
+            )
+        size = file['size']
+        if not isinstance(size, int) or isinstance(size, bool) or size < 0:
             raise ValidationError(
                 _('The file is not a valid JSON file.'
-                  'The file %(name)s contains a slash.'),
+                  'The size of file %(name)s must be a positive integer.'),
                 params={'name': file['name']},
             )
 
@@ -1,21 +1,74 @@
+import re
+import uuid
+
+from django.conf import settings
 from django.contrib.auth.models import Group
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Max, Prefetch
+from django.http import FileResponse, Http404, StreamingHttpResponse
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, slugify
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema
 from rest_framework import viewsets
 from rest_framework import permissions
+from rest_framework import serializers
+from rest_framework.decorators import action
+from rest_framework.exceptions import UnsupportedMediaType
+from rest_framework.filters import SearchFilter
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 from rest_framework.response import Response
 
 # Import the models from the models.py file
-from workshop.api.models import Script, Rating, OS, Tag, User
+from workshop.api.models import Blob, Script, ScriptChange, ScriptDeletion, ScriptRevision, Rating, OS, Tag, User
 
 # Import the serializers from the serializers.py file
-from workshop.api.serializers import UserSerializer, GroupSerializer, ScriptSerializer, RatingSerializer, OSSerializer, TagSerializer, RegisterSerializer
+from workshop.api.serializers import UserSerializer, GroupSerializer, ScriptSerializer, ScriptSummarySerializer, ScriptRevisionSerializer, ScriptRevisionDetailSerializer, ScriptChangeSerializer, RatingSerializer, OSSerializer, TagSerializer, RegisterSerializer
+
+# Import the view counter from the counters.py file
+from workshop.api.counters import script_views, get_viewer
+
+# Import the conditional requests helpers from the conditional.py file
+from workshop.api.conditional import ConditionalListMixin, RangeNotSatisfiable, is_conditional, make_etag, set_validators, get_not_modified_response, get_byte_range
+
+# Import the JSON Patches conversion from the patches.py file
+from workshop.api.patches import json_patch_to_data
+
+# Import the diffs of the revisions from the revisions.py file
+from workshop.api.revisions import diff_files
+
+# Import the sparse fieldsets from the fieldsets.py file
+from workshop.api.fieldsets import SparseFieldsetViewMixin
+
+# Import the filters from the filters.py file
+from workshop.api.filters import BulkRetrieveFilter, ScriptSearchFilter
+
+# Import the searched fields from the search.py file
+from workshop.api.search import SEARCH_FIELDS
+
+# Import the parsers from the parsers.py file
+from workshop.api.parsers import JSONPatchParser
+
+# Import the renderers from the renderers.py file
+from workshop.api.renderers import NDJSONRenderer, PlainTextRenderer, TarRenderer, ZipRenderer
+
+# Import the archives of the scripts from the bundles.py file
+from workshop.api.bundles import get_bundle, get_bundle_key
+
+# Import the exports of the scripts from the exports.py file
+from workshop.api.exports import export_lines, get_catalog, get_changes_token
 
 # Import the permissions from the permissions.py file
 from workshop.api.permissions import IsAdminOrReadOnly, ReadWriteWithoutPost, IsOwnerOrReadOnly, IsScriptOwnerOrReadOnly, IsRatingOwnerOrReadOnly
 # Views are the functions that are called when a user visits a URL
 
+# Whether a client accepts gzip responses (from its Accept-Encoding header)
+ACCEPTS_GZIP_RE = re.compile(r'\bgzip\b')
+
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows users to be viewed or edited.
     """
@@ -23,12 +76,36 @@ class UserViewSet(viewsets.ModelViewSet):
     serializer_class = UserSerializer
     permission_classes = [ReadWriteWithoutPost, IsOwnerOrReadOnly]
 
+    # Ordering of the cursor pagination
+    cursor_ordering = ('-date_joined', 'username')
+
+    # Users can be retrieved by username (their primary key, ?usernames=)
+    bulk_lookups = {'usernames': 'pk'}
+
     search_fields = ('username', 'groups__name', 'scripts__name')
 
     filterset_fields = ('username', 'email', 'first_name', 'last_name')
 
-
-class GroupViewSet(viewsets.ModelViewSet):
+    def get_queryset(self):
+        # Load the related objects of all the users at once, instead of once
+        # per user
+        return self.prune_queryset(super().get_queryset())
+
+    def get_prefetches(self) -> list:
+        """Return the related objects to prefetch with the users."""
+        # Only the scripts the user can see are listed (their own scripts and
+        # collaborations included), and only their primary keys are needed
+        # to build the hyperlinks
+        visible_scripts = Script.objects.visible_to(self.request.user)
+        return [
+            Prefetch('groups', queryset=Group.objects.only('id')),
+            Prefetch('scripts', queryset=visible_scripts.only('id', 'author')),
+            Prefetch('collaborations', queryset=visible_scripts.only('id')),
+            Prefetch('ratings', queryset=Rating.objects.only('id', 'user')),
+        ]
+
+
+class GroupViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows groups to be viewed or edited.
     """
@@ -40,8 +117,16 @@ class GroupViewSet(viewsets.ModelViewSet):
 
     filterset_fields = ('name', 'user__username')
 
+    def get_queryset(self):
+        return self.prune_queryset(super().get_queryset())
+
+    def get_prefetches(self) -> list:
+        """Return the related objects to prefetch with the groups."""
+        return [Prefetch('user_set', queryset=User.objects.only('username'))]
+
 
-class ScriptViewSet(viewsets.ModelViewSet):
+class ScriptViewSet(SparseFieldsetViewMixin, ConditionalListMixin,
+                    viewsets.ModelViewSet):
     """
     API endpoint that allows scripts to be viewed or edited.
     """
@@ -52,11 +137,36 @@ class ScriptViewSet(viewsets.ModelViewSet):
         IsScriptOwnerOrReadOnly
     ]
 
-    search_fields = (
-        'name', 'short_description', 'long_description', 'files', '^licence',
-        'version', 'language', 'author__username', 'compatibility__name',
-        'tags__name', 'id'
-    )
+    # Only UUIDs (with or without dashes) match the routes of the scripts,
+    # so a malformed id is not found instead of failing in the queries
+    lookup_value_regex = (r'[0-9a-fA-F]{8}(?:-?[0-9a-fA-F]{4}){3}'
+                          r'-?[0-9a-fA-F]{12}')
+
+    # Ordering of the cursor pagination
+    cursor_ordering = ('-created', 'id')
+
+    # Scripts can be retrieved by id (?ids=)
+    bulk_lookups = {'ids': 'pk'}
+
+    # The fields used by the views themselves (for the permissions, the ETag
+    # and the view counter), and the fields showing the prefetched blobs
+    sparse_required_fields = ('author', 'modified', 'views')
+    sparse_prefetch_fields = {'blobs': 'files'}
+
+    # The file names are taken whole, with or without a trailing slash (see
+    # routers.py)
+    optional_slash_actions = ('file',)
+
+    # Scripts can also be edited with JSON Patches
+    parser_classes = api_settings.DEFAULT_PARSER_CLASSES + [JSONPatchParser]
+
+    # The search looks up the tokens of these fields in the search index
+    # (see search.py) instead of scanning them
+    filter_backends = [
+        ScriptSearchFilter if backend is SearchFilter else backend
+        for backend in api_settings.DEFAULT_FILTER_BACKENDS
+    ]
+    search_fields = SEARCH_FIELDS
 
     filterset_fields = (
         'name', 'short_description', 'long_description', 'licence', 'version',
@@ -65,47 +175,521 @@ class ScriptViewSet(viewsets.ModelViewSet):
     )
 
     def retrieve(self, request, *args, **kwargs):
+        # Answer the conditional requests before loading the script. The
+        # inlined related objects (?expand=) change without the script, so
+        # expanded scripts have no validators
+        expanded = self.get_expanded_fields()
+        version = self.get_version() \
+            if is_conditional(request) and not expanded else None
+        if version is not None:
+            script_id, modified = version
+            response = get_not_modified_response(
+                request, self.get_etag(modified), modified
+            )
+            if response is not None:
+                self.count_view(script_id)
+                return response
+
         instance = self.get_object()
-        if request.query_params.get('skip_view', '') != "1":
-            Script.objects.filter(pk=instance.id).update(
-                views=instance.views + 1)
-        return super(ScriptViewSet, self).retrieve(request, *args, **kwargs)
+
+        # Count the view (it is saved later, with the other views), and show
+        # the views that aren't saved yet
+        instance.views += self.count_view(instance.id)
+
+        serializer = self.get_serializer(instance)
+        response = Response(serializer.data)
+        if not expanded:
+            set_validators(response, self.get_etag(instance.modified),
+                           instance.modified)
+        return response
+
+    def check_data_permissions(self, request, script, data: dict) -> None:
+        """Check that the user can write data to a script.
+
+        The data of the JSON Patches is only known once they are converted,
+        after the object permissions have been checked.
+        """
+        for permission in self.get_permissions():
+            if hasattr(permission, 'has_data_permission') and \
+                    not permission.has_data_permission(request, self, script,
+                                                       data):
+                self.permission_denied(
+                    request, message=getattr(permission, 'message', None),
+                    code=getattr(permission, 'code', None)
+                )
+
+    def update(self, request, *args, **kwargs):
+        # Only update the script if it is the version the client expects
+        # (If-Match header)
+        version = self.get_version() if is_conditional(request) else None
+        if version is not None:
+            response = get_not_modified_response(
+                request, self.get_etag(version[1]), version[1]
+            )
+            if response is not None:
+                return response
+
+        partial = kwargs.pop('partial', False)
+        instance = self.get_object()
+
+        data = request.data
+        if request.content_type.startswith(JSONPatchParser.media_type):
+            if not partial:
+                raise UnsupportedMediaType(request.content_type)
+            try:
+                data = json_patch_to_data(
+                    request.data, [file['name'] for file in instance.files]
+                )
+            except ValidationError as error:
+                raise serializers.ValidationError(error.messages)
+            self.check_data_permissions(request, instance, data)
+
+        serializer = self.get_serializer(instance, data=data, partial=partial)
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+
+        # Editors saving often can skip the script in the response
+        # (Prefer: return=minimal)
+        if 'return=minimal' in request.headers.get('Prefer', ''):
+            response = Response(status=204)
+        else:
+            instance._prefetched_objects_cache = {}
+            response = Response(serializer.data)
+        set_validators(response, self.get_etag(instance.modified),
+                       instance.modified)
+        return response
+
+    def count_view(self, script_id) -> int:
+        """Count a view of the script, unless the client asked not to.
+
+        Return the number of views of the script that aren't saved yet.
+        """
+        if self.request.query_params.get('skip_view', '') != "1":
+            return script_views.add(script_id, get_viewer(self.request))
+        return script_views.get_pending(script_id)
+
+    def get_version(self):
+        """Return the id and modification date of the requested script.
+
+        Return None if the script doesn't exist or isn't visible.
+        """
+        try:
+            return self.get_visible_queryset().filter(
+                pk=self.kwargs['pk']
+            ).values_list('id', 'modified').first()
+        except (TypeError, ValueError, ValidationError):
+            return None
+
+    def get_list_etag(self, queryset):
+        # Expanded lists have no validators, like expanded scripts
+        if self.get_expanded_fields():
+            return None
+        return super().get_list_etag(queryset)
+
+    def get_list_version(self, queryset) -> tuple:
+        """Return values that change when a list of scripts changes.
+
+        The scripts aren't counted for the ETag: the last modification date
+        of the listed scripts, the last change of the catalog (which records
+        the deletions of the public scripts), the last deletion of the other
+        scripts and, when the page shows it, the count of the paginator
+        (cached or estimated, and then reused by the page) are used instead.
+        """
+        modified = queryset.aggregate(modified=Max('modified'))['modified']
+        version = (
+            modified.isoformat() if modified is not None else '',
+            ScriptChange.objects.aggregate(last_id=Max('id'))['last_id'],
+            ScriptDeletion.objects.aggregate(last_id=Max('id'))['last_id'],
+        )
+        if self.paginator is not None and \
+                self.paginator.is_counted(self.request, self):
+            version += (self.paginator.count_objects(queryset),)
+        return version
+
+    def get_etag(self, modified) -> str:
+        """Return the ETag of the requested script.
+
+        The ETag identifies the content of the script (its id and its
+        modification date) and how it is represented (the format and the URL
+        of the hyperlinks). The view counters and the ratings are not part of
+        it, as they don't modify the script.
+        """
+        return make_etag(self.kwargs['pk'], modified.isoformat(),
+                         self.request.accepted_renderer.format,
+                         self.request.build_absolute_uri('/'))
+
+    @extend_schema(responses={
+        (200, 'text/plain'): OpenApiTypes.STR,
+        (206, 'text/plain'): OpenApiTypes.STR,
+    })
+    @action(detail=True, url_path=r'files/(?P<file_name>[^/]+)',
+            url_name='file', renderer_classes=[PlainTextRenderer],
+            pagination_class=None, filter_backends=[])
+    def file(self, request, pk=None, file_name=None,
+             format=None) -> Response:
+        """
+        Return the content of a file of the script, as plain text.
+
+        Single byte ranges are supported (Range and If-Range headers), and
+        the file has its own ETag.
+        """
+        script = self.get_visible_queryset().filter(pk=pk).only(
+            'id', 'files'
+        ).first()
+        if script is None:
+            raise Http404
+
+        # Only the blob of the requested file is loaded
+        for script_file in script.files:
+            if script_file['name'] == file_name:
+                break
+        else:
+            raise Http404
+
+        # The ETag is known from the manifest, so conditional requests are
+        # answered without reading the blob
+        etag = make_etag(script_file['hash'])
+        headers = {'Accept-Ranges': 'bytes'}
+
+        response = get_not_modified_response(request, etag)
+        if response is not None:
+            response['Accept-Ranges'] = 'bytes'
+            return response
+
+        # The blob can be missing from a partial import or manifest
+        blob = Blob.objects.filter(hash=script_file['hash']).first()
+        if blob is None:
+            raise Http404
+        content = blob.get_content().encode('utf-8')
+
+        try:
+            byte_range = get_byte_range(request, len(content), etag)
+        except RangeNotSatisfiable:
+            headers['Content-Range'] = f"bytes */{len(content)}"
+            return Response(b'', status=416, headers=headers)
+
+        if byte_range is None:
+            response = Response(content, headers=headers)
+        else:
+            headers['Content-Range'] = (
+                f"bytes {byte_range.start}-{byte_range.stop - 1}"
+                f"/{len(content)}"
+            )
+            response = Response(content[byte_range], status=206,
+                                headers=headers)
+        set_validators(response, etag)
+        return response
+
+    @extend_schema(responses={
+        (200, 'application/zip'): OpenApiTypes.BINARY,
+        (200, 'application/x-tar'): OpenApiTypes.BINARY,
+    })
+    @action(detail=True, url_path='bundle', url_name='bundle',
+            renderer_classes=[ZipRenderer, TarRenderer],
+            pagination_class=None, filter_backends=[])
+    def bundle(self, request, pk=None, format=None):
+        """
+        Return the files of the script as an archive.
+
+        The format is given by the extension (bundle.zip or bundle.tar) or
+        the Accept header. The archives are cached on disk (see bundles.py),
+        and have an ETag.
+        """
+        script = self.get_visible_queryset().filter(pk=pk).only(
+            'id', 'name', 'files'
+        ).first()
+        if script is None:
+            raise Http404
+
+        archive_format = request.accepted_renderer.format
+        etag = make_etag(get_bundle_key(script.files, archive_format))
+        response = get_not_modified_response(request, etag)
+        if response is not None:
+            return response
+
+        path = get_bundle(script.files, archive_format, Blob.objects.contents)
+        response = FileResponse(
+            open(path, 'rb'), as_attachment=True,
+            filename=f"{slugify(script.name) or 'script'}.{archive_format}",
+            content_type=request.accepted_renderer.media_type
+        )
+        set_validators(response, etag)
+        return response
+
+    @extend_schema(request=ScriptSerializer(many=True),
+                   responses=ScriptSummarySerializer(many=True))
+    @action(detail=False, methods=['post', 'patch'], url_path='bulk',
+            url_name='bulk', pagination_class=None, filter_backends=[])
+    def bulk(self, request, format=None) -> Response:
+        """
+        Create (POST) or update (PATCH) several scripts at once.
+
+        All the scripts are validated first, and saved in one transaction
+        (either all of them are saved, or none). The errors are returned for
+        each script, by index. To update scripts, each script has its id, and
+        only the given fields are changed. At most BULK_WRITE_MAX_SCRIPTS
+        scripts can be sent at once.
+        """
+        # Only the scripts the user can edit can be updated
+        instance = None
+        if request.method == 'PATCH' and isinstance(request.data, list):
+            ids = set()
+            for item in request.data:
+                try:
+                    ids.add(uuid.UUID(str(item.get('id'))))
+                except (AttributeError, ValueError):
+                    pass
+            instance = {
+                script.pk: script for script in
+                Script.objects.editable_by(request.user).filter(pk__in=ids)
+            }
+
+        serializer = ScriptSerializer(
+            instance, data=request.data, many=True,
+            partial=request.method == 'PATCH',
+            max_length=settings.BULK_WRITE_MAX_SCRIPTS,
+            context=self.get_serializer_context()
+        )
+        serializer.is_valid(raise_exception=True)
+        with transaction.atomic():
+            scripts = serializer.save()
+
+        # Return the summaries of the scripts, in the order they were sent
+        ids = [script.pk for script in scripts]
+        saved = Script.objects.filter(pk__in=ids).defer(
+            'viewers_sketch', *ScriptSummarySerializer.Meta.deferred_fields
+        ).prefetch_related(*self.get_prefetches()).in_bulk()
+        data = ScriptSummarySerializer(
+            [saved[pk] for pk in ids], many=True,
+            context=self.get_serializer_context()
+        ).data
+        return Response(data, status=201 if instance is None else 200)
+
+    @extend_schema(parameters=[
+        OpenApiParameter('since', int, description="The token of the last "
+                         "change received (0 to get all the changes)."),
+        OpenApiParameter('limit', int, description="The maximum number of "
+                         "changes to return."),
+    ], responses=OpenApiTypes.OBJECT)
+    @action(detail=False, url_path='changes', url_name='changes',
+            pagination_class=None, filter_backends=[])
+    def changes(self, request, format=None) -> Response:
+        """
+        Return the changes of the catalog since a token, oldest first.
+
+        The catalog is made of the public, listed scripts. Each change gives
+        the id of a script, and whether it was created, updated or deleted
+        (scripts made private or unlisted are deleted from the catalog). The
+        `next` token is the `since` parameter of the following request, and
+        `more` tells if more changes are already available.
+        """
+        params = {}
+        for name, default in (
+            ('since', 0), ('limit', settings.SCRIPT_CHANGES_PAGE_SIZE)
+        ):
+            try:
+                params[name] = int(request.query_params.get(name, default))
+            except ValueError:
+                params[name] = -1
+            if params[name] < 0:
+                raise serializers.ValidationError(
+                    {name: "A positive integer is required."}
+                )
+        since = params['since']
+        limit = min(max(params['limit'], 1), settings.SCRIPT_CHANGES_PAGE_SIZE)
+
+        # The changes committed since the last request are numbered first
+        ScriptChange.objects.number()
+        changes = list(ScriptChange.objects.filter(
+            position__gt=since
+        ).order_by('position')[:limit + 1])
+        more = len(changes) > limit
+        changes = changes[:limit]
+
+        return Response({
+            'changes': ScriptChangeSerializer(changes, many=True).data,
+            'next': str(changes[-1].position if changes else since),
+            'more': more,
+        })
+
+    @extend_schema(responses={
+        (200, 'application/x-ndjson'): OpenApiTypes.BINARY,
+    })
+    @action(detail=False, url_path='export', url_name='export',
+            renderer_classes=[NDJSONRenderer], pagination_class=None,
+            filter_backends=[])
+    def export(self, request, format=None):
+        """
+        Return all the scripts of the catalog as NDJSON (one per line).
+
+        The catalog is made of the public, listed scripts, with their files.
+        The response is streamed, and compressed with gzip when the client
+        accepts it. The X-Changes-Token header is the token to follow the
+        changes made since the export with /scripts/changes/.
+        """
+        token = get_changes_token()
+        lines = export_lines(get_catalog())
+        encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        compressed = ACCEPTS_GZIP_RE.search(encoding) is not None
+        if compressed:
+            lines = compress_sequence(lines)
+
+        response = StreamingHttpResponse(
+            lines, content_type=NDJSONRenderer.media_type
+        )
+        if compressed:
+            response['Content-Encoding'] = 'gzip'
+        patch_vary_headers(response, ['Accept-Encoding'])
+        response['X-Changes-Token'] = token
+        return response
+
+    @extend_schema(responses=ScriptRevisionSerializer(many=True))
+    @action(detail=True, url_path='revisions', url_name='revisions',
+            filter_backends=[])
+    def revisions(self, request, pk=None, format=None) -> Response:
+        """
+        Return the revisions of the files of the script, latest first.
+        """
+        queryset = self.get_revisions().defer('deltas').order_by('-number')
+        page = self.paginate_queryset(queryset)
+        serializer = ScriptRevisionSerializer(
+            page, many=True, context=self.get_serializer_context()
+        )
+        return self.get_paginated_response(serializer.data)
+
+    @extend_schema(responses=ScriptRevisionDetailSerializer)
+    @action(detail=True, url_path=r'revisions/(?P<number>[0-9]+)',
+            url_name='revision', pagination_class=None, filter_backends=[])
+    def revision(self, request, pk=None, number=None,
+                 format=None) -> Response:
+        """
+        Return a revision of the files of the script.
+        """
+        revision = self.get_revision(number)
+        serializer = ScriptRevisionDetailSerializer(
+            revision, context=self.get_serializer_context()
+        )
+        return Response(serializer.data)
+
+    @extend_schema(responses=OpenApiTypes.OBJECT)
+    @action(detail=True, url_path=r'revisions/(?P<number>[0-9]+)/diff',
+            url_name='revision-diff', pagination_class=None,
+            filter_backends=[])
+    def revision_diff(self, request, pk=None, number=None,
+                      format=None) -> Response:
+        """
+        Return the unified diffs of the files changed by a revision.
+
+        The revision is compared with the previous one, or with the revision
+        given by the `from` parameter.
+        """
+        revision = self.get_revision(number)
+        from_number = request.query_params.get('from', revision.number - 1)
+        try:
+            from_number = int(from_number)
+        except ValueError:
+            raise serializers.ValidationError(
+                {'from': "A revision number is required."}
+            )
+
+        # The first revision is compared with an empty script
+        old_files = []
+        if from_number != 0:
+            old_files = self.get_revision(from_number).get_files()
+
+        return Response({
+            'from': from_number or None,
+            'to': revision.number,
+            'files': diff_files(old_files, revision.get_files()),
+        })
+
+    def get_revisions(self):
+        """Return the revisions of the requested script."""
+        if not self.get_visible_queryset().filter(pk=self.kwargs['pk'])\
+                .exists():
+            raise Http404
+        return ScriptRevision.objects.filter(script=self.kwargs['pk'])
+
+    def get_revision(self, number) -> ScriptRevision:
+        """Return a revision of the requested script."""
+        revision = self.get_revisions().filter(number=number).first()
+        if revision is None:
+            raise Http404
+        return revision
+
+    def get_serializer_class(self):
+        # Lists only show a summary of the scripts, without their content
+        if self.action == 'list':
+            return ScriptSummarySerializer
+        return super(ScriptViewSet, self).get_serializer_class()
 
     def get_queryset(self):
+        # The sketch of the viewers is never shown. The fields that the
+        # response doesn't show (like the files and the long description in
+        # the lists) aren't loaded, and the related objects of all the scripts
+        # are loaded at once, instead of once per script
+        queryset = self.get_visible_queryset().defer('viewers_sketch')
+        return self.prune_queryset(queryset)
+
+    def get_prefetches(self) -> list:
+        """Return the related objects to prefetch with the scripts."""
+        # Only the primary keys are needed to build the hyperlinks (the author
+        # is a foreign key, so its primary key is already on the script), and
+        # the fields of the compact representations of the inlined objects
+        # (?expand=)
+        expanded = self.get_expanded_fields()
+        prefetches = [
+            Prefetch('ratings', queryset=Rating.objects.only(
+                'id', 'script',
+                *(['rating', 'comment', 'user', 'created']
+                  if 'ratings' in expanded else [])
+            )),
+            Prefetch('collaborators',
+                     queryset=User.objects.only('username')),
+            Prefetch('compatibility', queryset=OS.objects.only(
+                'name', *(['homepage'] if 'compatibility' in expanded else [])
+            )),
+            Prefetch('tags', queryset=Tag.objects.only(
+                'name', *(['description'] if 'tags' in expanded else [])
+            )),
+        ]
+        if 'author' in expanded:
+            prefetches.append(
+                Prefetch('author', queryset=User.objects.only('username'))
+            )
+
+        # Load the contents of the files with the script
+        if self.action == 'retrieve':
+            prefetches.append(Prefetch('blobs'))
+        return prefetches
+
+    def get_visible_queryset(self):
         # If the user is the admin, get all scripts
         if self.request.user.is_superuser:
             return super(ScriptViewSet, self).get_queryset()
-        # Get public scripts
-        queryset = Script.objects.filter(is_public=True)
 
         # If the user selected a specific project, return only this one (
         # prevent bugs in Django REST Framework from letting users see others
         # scripts in case someone is able to inject pk without it being
         # interpreted by DRF)
         if "pk" in self.kwargs:
+            # Unlisted projects can still be accessed directly
+            queryset = Script.objects.visible_to(self.request.user,
+                                                 listing=False)
             queryset = queryset.filter(id=self.kwargs['pk'])
         else:
             # Hide unlisted projects otherwise, as we are on the project list
-            queryset = queryset.filter(is_unlisted=False)
-
-        # If the user is authenticated, get their private scripts too
-        if self.request.user.is_authenticated:
-            queryset = queryset | Script.objects.filter(
-                author=self.request.user
-            )
-
-            # Add the scripts the user is one of the collaborators of
-            queryset = queryset | Script.objects.filter(
-                collaborators=self.request.user
+            # (unless they are requested by id)
+            queryset = Script.objects.visible_to(
+                self.request.user,
+                listing=not BulkRetrieveFilter.is_requested(self.request,
+                                                            self)
             )
 
-        # Remove duplicates
-        queryset = queryset.distinct()
-
         return queryset.order_by('-created')
 
 
-class RatingViewSet(viewsets.ModelViewSet):
+class RatingViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     """
     API endpoint that allows ratings to be viewed or edited.
     """
@@ -116,12 +700,42 @@ class RatingViewSet(viewsets.ModelViewSet):
         IsRatingOwnerOrReadOnly
     ]
 
+    # Ordering of the cursor pagination
+    cursor_ordering = ('-created', 'id')
+
+    # Ratings can be retrieved by id (?ids=)
+    bulk_lookups = {'ids': 'pk'}
+
     search_fields = ('script__name', 'script__author__username', 'rating')
 
     filterset_fields = ('script__name', 'script__author__username', 'rating')
 
-
-class OSViewSet(viewsets.ModelViewSet):
+    def get_queryset(self):
+        return self.prune_queryset(super().get_queryset())
+
+    def get_prefetches(self) -> list:
+        """Return the related objects to prefetch with the ratings."""
+        # Only the inlined objects (?expand=) are prefetched, the hyperlinks
+        # only need the foreign keys. The scripts the user can't see are
+        # inlined as null
+        expanded = self.get_expanded_fields()
+        prefetches = []
+        if 'user' in expanded:
+            prefetches.append(
+                Prefetch('user', queryset=User.objects.only('username'))
+            )
+        if 'script' in expanded:
+            prefetches.append(Prefetch(
+                'script',
+                queryset=Script.objects.visible_to(
+                    self.request.user, listing=False
+                ).only('id', 'name', 'short_description', 'author')
+            ))
+        return prefetches
+
+
+class OSViewSet(SparseFieldsetViewMixin, ConditionalListMixin,
+                viewsets.ModelViewSet):
     """
     API endpoint that allows OS to be viewed or edited.
     """
@@ -133,8 +747,16 @@ class OSViewSet(viewsets.ModelViewSet):
 
     filterset_fields = ('name', 'homepage', 'description')
 
+    def get_queryset(self):
+        return self.prune_queryset(super().get_queryset())
+
+    def get_prefetches(self) -> list:
+        """Return the related objects to prefetch with the OS."""
+        return [Prefetch('script_set', queryset=Script.objects.only('id'))]
+
 
-class TagViewSet(viewsets.ModelViewSet):
+class TagViewSet(SparseFieldsetViewMixin, ConditionalListMixin,
+                 viewsets.ModelViewSet):
     """
     API endpoint that allows tags to be viewed or edited.
     """
@@ -146,6 +768,13 @@ class TagViewSet(viewsets.ModelViewSet):
 
     filterset_fields = ('name', 'description')
 
+    def get_queryset(self):
+        return self.prune_queryset(super().get_queryset())
+
+    def get_prefetches(self) -> list:
+        """Return the related objects to prefetch with the tags."""
+        return [Prefetch('script_set', queryset=Script.objects.only('id'))]
+
 
 # Special views
 
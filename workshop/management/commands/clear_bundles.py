@@ -0,0 +1,29 @@
+"""Delete the cached archives of the scripts that were built long ago."""
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = ("Delete the cached archives of the scripts (bundle.zip and "
+            "bundle.tar) older than a number of days.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=float, default=30,
+            help="Age (in days) from which the archives are deleted."
+        )
+
+    def handle(self, *args, **options):
+        directory = Path(settings.SCRIPT_BUNDLES_DIR)
+        limit = time.time() - options['days'] * 24 * 3600
+
+        # Archives are rebuilt when they are downloaded again
+        count = 0
+        for path in directory.glob('*') if directory.exists() else []:
+            if path.is_file() and path.stat().st_mtime < limit:
+                path.unlink(missing_ok=True)
+                count += 1
+        self.stdout.write(f"{count} archive(s) deleted.")
@@ -0,0 +1,26 @@
+"""Delete the blobs that are not used by any script or revision anymore."""
+from django.core.management.base import BaseCommand
+
+from workshop.api.models import Blob
+
+
+class Command(BaseCommand):
+    help = ("Delete the file contents (blobs) that no script or revision "
+            "uses anymore.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Only show how many blobs would be deleted."
+        )
+
+    def handle(self, *args, **options):
+        # The blobs of the revision checkpoints are still used
+        unused = Blob.objects.filter(scripts__isnull=True,
+                                     revisions__isnull=True)
+        if options['dry_run']:
+            count = unused.count()
+        else:
+            count, _ = unused.delete()
+        self.stdout.write(f"{count} unused blob(s)"
+                          f"{'' if options['dry_run'] else ' deleted'}.")
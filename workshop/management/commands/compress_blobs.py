@@ -0,0 +1,35 @@
+"""Compress the contents of the files that are stored uncompressed."""
+from django.core.management.base import BaseCommand
+
+from workshop.api.models import Blob
+
+
+class Command(BaseCommand):
+    help = "Compress the file contents (blobs) that are stored uncompressed."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help="Number of blobs compressed at once."
+        )
+
+    def handle(self, *args, **options):
+        compressed = saved = 0
+        batch = []
+        blobs = Blob.objects.filter(codec='').only(
+            'hash', 'codec', 'content', 'size'
+        )
+        for blob in blobs.iterator(chunk_size=options['batch_size']):
+            blob.compress()
+            if blob.codec:
+                compressed += 1
+                saved += blob.size - len(blob.data)
+                batch.append(blob)
+
+            if len(batch) == options['batch_size']:
+                Blob.objects.bulk_update(batch, ['codec', 'content', 'data'])
+                batch = []
+        Blob.objects.bulk_update(batch, ['codec', 'content', 'data'])
+
+        self.stdout.write(f"{compressed} blob(s) compressed, "
+                          f"{saved} bytes saved.")
@@ -0,0 +1,60 @@
+"""Export the scripts as NDJSON (one script per line), with their files."""
+import gzip
+import sys
+
+from django.core.management.base import BaseCommand
+
+# Import the models from the models.py file
+from workshop.api.models import Script
+
+# Import the exports of the scripts from the exports.py file
+from workshop.api.exports import EXPORT_CHUNK_SIZE, export_lines, get_catalog, get_changes_token
+
+
+class Command(BaseCommand):
+    help = ("Export the scripts of the catalog (the public, listed scripts) "
+            "as NDJSON, one script per line.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'output', nargs='?', default='-',
+            help="File to write the scripts to (the standard output by "
+                 "default). Compressed with gzip if it ends with .gz."
+        )
+        parser.add_argument(
+            '--all', action='store_true',
+            help="Export all the scripts, including the private and unlisted "
+                 "ones."
+        )
+        parser.add_argument(
+            '--gzip', action='store_true',
+            help="Compress the output with gzip."
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=EXPORT_CHUNK_SIZE,
+            help="Number of scripts read from the database at once."
+        )
+
+    def handle(self, *args, **options):
+        output = options['output']
+        compressed = options['gzip'] or output.endswith('.gz')
+        if output == '-':
+            stream = sys.stdout.buffer
+            if compressed:
+                stream = gzip.GzipFile(fileobj=stream, mode='wb')
+        else:
+            stream = (gzip.open if compressed else open)(output, 'wb')
+
+        token = get_changes_token()
+        queryset = Script.objects.all() if options['all'] else get_catalog()
+        count = 0
+        try:
+            for line in export_lines(queryset, options['chunk_size']):
+                stream.write(line)
+                count += 1
+        finally:
+            if stream is not sys.stdout.buffer:
+                stream.close()
+
+        self.stderr.write(f"{count} script(s) exported. Follow the changes "
+                          f"since with /scripts/changes/?since={token}")
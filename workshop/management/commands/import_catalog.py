@@ -0,0 +1,128 @@
+"""Import scripts and users from NDJSON (one object per line)."""
+import gzip
+import itertools
+import os
+import sys
+from concurrent.futures import Future, ProcessPoolExecutor
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+
+# Import the imports of the scripts from the imports.py file
+from workshop.api.imports import import_rows, prepare_rows
+
+
+class Command(BaseCommand):
+    help = ("Import scripts (as exported by export_catalog) and users (lines "
+            "with a username) from NDJSON. The lines are validated by worker "
+            "processes, and saved by batches, each in one transaction. The "
+            "number of lines saved is written to a checkpoint file after "
+            "each batch, so that a failed import resumes after them.")
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'input',
+            help="File to read the lines from (- for the standard input). "
+                 "Decompressed with gzip if it ends with .gz."
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help="Number of lines saved in each transaction."
+        )
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help="Number of processes validating the lines (0 to validate "
+                 "them in this process)."
+        )
+        parser.add_argument(
+            '--checkpoint',
+            help="File keeping the number of lines saved (the input file "
+                 "followed by .checkpoint by default). It is deleted once "
+                 "the import is complete."
+        )
+
+    def handle(self, *args, **options):
+        path = options['input']
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError("The batch size must be positive.")
+        checkpoint = options['checkpoint'] or (
+            None if path == '-' else f"{path}.checkpoint"
+        )
+
+        # Resume after the lines saved by a previous import
+        done = 0
+        if checkpoint is not None and os.path.exists(checkpoint):
+            with open(checkpoint) as file:
+                done = int(file.read().strip() or 0)
+            self.stderr.write(f"Resuming after line {done}.")
+
+        if path == '-':
+            stream = sys.stdin.buffer
+        else:
+            stream = (gzip.open if path.endswith('.gz') else open)(path, 'rb')
+        executor = None
+        if options['workers'] > 0:
+            executor = ProcessPoolExecutor(options['workers'],
+                                           initializer=django.setup)
+        self.executor = executor
+        self.chunk_size = max(batch_size // max(options['workers'], 1), 1)
+
+        totals = {'users': 0, 'scripts': 0, 'errors': 0}
+        try:
+            lines = itertools.islice(stream, done, None)
+            # The next batch is validated while the previous one is saved
+            pending = None
+            while True:
+                batch = list(itertools.islice(lines, batch_size))
+                submitted = (batch, self.validate(batch)) if batch else None
+                if pending is not None:
+                    done = self.save(*pending, done, totals, checkpoint)
+                if submitted is None:
+                    break
+                pending = submitted
+        finally:
+            if executor is not None:
+                executor.shutdown(cancel_futures=True)
+            if stream is not sys.stdin.buffer:
+                stream.close()
+
+        if checkpoint is not None and os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        self.stdout.write(f"{totals['scripts']} script(s) and "
+                          f"{totals['users']} user(s) imported, "
+                          f"{totals['errors']} invalid line(s).")
+
+    def validate(self, lines: list) -> list:
+        """Start validating lines, and return the futures of their rows."""
+        futures = []
+        for start in range(0, len(lines), self.chunk_size):
+            chunk = lines[start:start + self.chunk_size]
+            if self.executor is None:
+                future = Future()
+                future.set_result(prepare_rows(chunk))
+            else:
+                future = self.executor.submit(prepare_rows, chunk)
+            futures.append(future)
+        return futures
+
+    def save(self, lines: list, futures: list, done: int, totals: dict,
+             checkpoint) -> int:
+        """Save a validated batch, and return the number of lines saved."""
+        rows = [row for future in futures for row in future.result()]
+        for number, (kind, _, errors) in enumerate(rows, done + 1):
+            if kind is None:
+                totals['errors'] += 1
+                self.stderr.write(f"Line {number}: {' '.join(errors)}")
+
+        counts = import_rows(rows)
+        totals['users'] += counts['users']
+        totals['scripts'] += counts['scripts']
+        done += len(lines)
+
+        if checkpoint is not None:
+            temporary = f"{checkpoint}.tmp"
+            with open(temporary, 'w') as file:
+                file.write(str(done))
+            os.replace(temporary, checkpoint)
+        return done
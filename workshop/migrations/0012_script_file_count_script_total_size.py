@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-17 01:43
+
+from django.db import migrations, models
+
+from workshop.api.validators import script_files_size
+
+
+def compute_file_statistics(apps, schema_editor):
+    """Fill the file statistics of the existing scripts."""
+    Script = apps.get_model('workshop', 'Script')
+    for script in Script.objects.only('files').iterator():
+        script.file_count = len(script.files)
+        script.total_size = script_files_size(script.files)
+        script.save(update_fields=['file_count', 'total_size'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workshop', '0011_script_is_unlisted'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='script',
+            name='file_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='script',
+            name='total_size',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(compute_file_statistics,
+                             migrations.RunPython.noop),
+    ]
@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('workshop', '0012_script_file_count_script_total_size'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(fields=['-created', 'id'], name='rating_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='rating',
+            index=models.Index(fields=['script', 'created'], name='rating_script_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='script',
+            index=models.Index(fields=['is_public', 'is_unlisted', '-created'], name='script_listing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='script',
+            index=models.Index(fields=['-created', 'id'], name='script_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='script',
+            index=models.Index(fields=['author', 'created'], name='script_author_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='script',
+            index=models.Index(fields=['name'], name='script_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='user',
+            index=models.Index(fields=['-date_joined', 'username'], name='user_joined_idx'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:14
+
+import workshop.api.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workshop', '0013_listing_indexes'),
+    ]
+
+    # The default is only used by Django, so the database doesn't have to be
+    # altered (altering a primary key rebuilds the table and its foreign keys).
+    # Existing rows keep their random UUIDs: their ids are part of the URLs
+    # known by the clients, and both kinds of UUIDs can be mixed.
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AlterField(
+                    model_name='rating',
+                    name='id',
+                    field=models.UUIDField(default=workshop.api.models.uuid7, editable=False, primary_key=True, serialize=False, unique=True, verbose_name='UUID'),
+                ),
+                migrations.AlterField(
+                    model_name='script',
+                    name='id',
+                    field=models.UUIDField(default=workshop.api.models.uuid7, editable=False, primary_key=True, serialize=False, unique=True, verbose_name='UUID'),
+                ),
+            ],
+            database_operations=[],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workshop', '0014_time_ordered_uuids'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='script',
+            name='unique_views',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='script',
+            name='viewers_sketch',
+            field=models.BinaryField(default=b''),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workshop', '0015_script_unique_views'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='os',
+            name='modified',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='modified',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name='script',
+            index=models.Index(fields=['is_public', 'is_unlisted', 'modified'], name='script_modified_idx'),
+        ),
+    ]
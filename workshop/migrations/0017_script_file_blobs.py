@@ -0,0 +1,93 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:40
+
+import hashlib
+
+from django.db import migrations, models
+
+# Number of scripts converted at once
+BATCH_SIZE = 500
+
+
+def move_files_to_blobs(apps, schema_editor):
+    """Store the contents of the files as blobs, deduplicated by hash."""
+    Script = apps.get_model('workshop', 'Script')
+    Blob = apps.get_model('workshop', 'Blob')
+    ScriptBlob = Script.blobs.through
+
+    def flush(scripts, blobs, links):
+        Blob.objects.bulk_create(blobs.values(), ignore_conflicts=True)
+        Script.objects.bulk_update(scripts, ['files'])
+        ScriptBlob.objects.bulk_create(links, ignore_conflicts=True)
+
+    scripts, blobs, links = [], {}, []
+    for script in Script.objects.only('id', 'files').iterator(
+            chunk_size=BATCH_SIZE):
+        manifest = []
+        for file in script.files:
+            data = file['content'].encode('utf-8')
+            digest = hashlib.sha256(data).hexdigest()
+            blobs.setdefault(digest, Blob(hash=digest, content=file['content'],
+                                          size=len(data)))
+            manifest.append({'name': file['name'], 'hash': digest,
+                             'size': len(data)})
+        script.files = manifest
+        scripts.append(script)
+        links.extend(ScriptBlob(script_id=script.id, blob_id=digest)
+                     for digest in {file['hash'] for file in manifest})
+
+        if len(scripts) == BATCH_SIZE:
+            flush(scripts, blobs, links)
+            scripts, blobs, links = [], {}, []
+    flush(scripts, blobs, links)
+
+
+def move_blobs_to_files(apps, schema_editor):
+    """Store the contents of the files back in the scripts."""
+    Script = apps.get_model('workshop', 'Script')
+    Blob = apps.get_model('workshop', 'Blob')
+
+    scripts = []
+    for script in Script.objects.only('id', 'files').iterator(
+            chunk_size=BATCH_SIZE):
+        contents = dict(Blob.objects.filter(
+            hash__in=[file['hash'] for file in script.files]
+        ).values_list('hash', 'content'))
+        script.files = [
+            {'name': file['name'], 'content': contents[file['hash']]}
+            for file in script.files
+        ]
+        scripts.append(script)
+
+        if len(scripts) == BATCH_SIZE:
+            Script.objects.bulk_update(scripts, ['files'])
+            scripts = []
+    Script.objects.bulk_update(scripts, ['files'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workshop', '0016_collection_validators'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Blob',
+            fields=[
+                ('hash', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('content', models.TextField()),
+                ('size', models.PositiveIntegerField()),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='script',
+            name='files',
+            field=models.JSONField(),
+        ),
+        migrations.AddField(
+            model_name='script',
+            name='blobs',
+            field=models.ManyToManyField(blank=True, editable=False, related_name='scripts', to='workshop.blob'),
+        ),
+        migrations.RunPython(move_files_to_blobs, move_blobs_to_files),
+    ]
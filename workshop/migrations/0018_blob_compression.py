@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-17 02:48
+
+from django.db import migrations, models
+
+from workshop.api.compression import decompress
+
+
+def decompress_blobs(apps, schema_editor):
+    """Store the compressed contents uncompressed again."""
+    Blob = apps.get_model('workshop', 'Blob')
+    for blob in Blob.objects.exclude(codec='').iterator():
+        blob.content = decompress(blob.data, blob.codec)
+        blob.codec, blob.data = '', b''
+        blob.save(update_fields=['content', 'codec', 'data'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workshop', '0017_script_file_blobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='blob',
+            name='codec',
+            field=models.CharField(blank=True, default='', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='blob',
+            name='data',
+            field=models.BinaryField(blank=True, default=b''),
+        ),
+        migrations.AlterField(
+            model_name='blob',
+            name='content',
+            field=models.TextField(blank=True),
+        ),
+        migrations.RunPython(migrations.RunPython.noop, decompress_blobs),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+# Number of scripts recorded at once
+BATCH_SIZE = 500
+
+
+def record_first_revisions(apps, schema_editor):
+    """Record the current files of the scripts as their first revision."""
+    Script = apps.get_model('workshop', 'Script')
+    ScriptRevision = apps.get_model('workshop', 'ScriptRevision')
+    RevisionBlob = ScriptRevision.blobs.through
+
+    def flush(revisions):
+        ScriptRevision.objects.bulk_create(revisions)
+        # The ids of the revisions aren't returned by every database
+        ids = dict(ScriptRevision.objects.filter(
+            script__in=[revision.script_id for revision in revisions]
+        ).values_list('script', 'id'))
+        RevisionBlob.objects.bulk_create([
+            RevisionBlob(scriptrevision_id=ids[revision.script_id],
+                         blob_id=digest)
+            for revision in revisions
+            for digest in {file['hash'] for file in revision.files}
+        ], ignore_conflicts=True)
+
+    revisions = []
+    for script in Script.objects.only('id', 'author', 'files').iterator(
+            chunk_size=BATCH_SIZE):
+        revisions.append(ScriptRevision(
+            script_id=script.id, number=1, checkpoint=1,
+            author_id=script.author_id, files=script.files
+        ))
+        if len(revisions) == BATCH_SIZE:
+            flush(revisions)
+            revisions = []
+    if revisions:
+        flush(revisions)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workshop', '0018_blob_compression'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScriptRevision',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveIntegerField()),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('files', models.JSONField()),
+                ('checkpoint', models.PositiveIntegerField()),
+                ('deltas', models.JSONField(default=list)),
+                ('chain_size', models.PositiveIntegerField(default=0)),
+                ('author', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='revisions', to=settings.AUTH_USER_MODEL)),
+                ('blobs', models.ManyToManyField(blank=True, editable=False, related_name='revisions', to='workshop.blob')),
+                ('script', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='revisions', to='workshop.script')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('script', 'number'), name='script_revision_number_unique')],
+            },
+        ),
+        migrations.RunPython(record_first_revisions,
+                             migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:29
+
+from django.db import migrations, models
+
+BATCH_SIZE = 500
+
+
+def record_listed_scripts(apps, schema_editor):
+    """Record the scripts of the catalog as created, oldest first."""
+    Script = apps.get_model('workshop', 'Script')
+    ScriptChange = apps.get_model('workshop', 'ScriptChange')
+
+    changes = []
+    for script_id in Script.objects.filter(
+        is_public=True, is_unlisted=False
+    ).order_by('created', 'id').values_list('id', flat=True).iterator(
+            chunk_size=BATCH_SIZE):
+        changes.append(ScriptChange(script=script_id, action='created'))
+        if len(changes) == BATCH_SIZE:
+            ScriptChange.objects.bulk_create(changes)
+            changes = []
+    ScriptChange.objects.bulk_create(changes)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workshop', '0019_script_revisions'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScriptChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('script', models.UUIDField()),
+                ('action', models.CharField(choices=[('created', 'Created'), ('updated', 'Updated'), ('deleted', 'Deleted')], max_length=7)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['script', '-id'], name='script_change_script_idx')],
+            },
+        ),
+        migrations.RunPython(record_listed_scripts,
+                             migrations.RunPython.noop),
+    ]
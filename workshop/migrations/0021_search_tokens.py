@@ -0,0 +1,109 @@
+# Generated by Django 5.2.18 on 2026-10-17 03:52
+
+from collections import defaultdict
+
+import django.db.models.deletion
+import workshop.api.models
+from django.db import migrations, models
+
+from workshop.api.compression import decompress
+from workshop.api.search import TEXT_FIELDS, tokenize
+
+BATCH_SIZE = 200
+
+
+def iter_batches(queryset, key):
+    """Iterate over the objects of a queryset, by batches ordered by key."""
+    queryset = queryset.order_by(key)
+    last = None
+    while True:
+        batch = list((queryset if last is None
+                      else queryset.filter(**{f"{key}__gt": last}))
+                     [:BATCH_SIZE])
+        if not batch:
+            return
+        yield batch
+        last = getattr(batch[-1], key)
+
+
+def index_blobs(apps, schema_editor):
+    """Add the contents of the existing blobs to the search index."""
+    Blob = apps.get_model('workshop', 'Blob')
+    BlobToken = apps.get_model('workshop', 'BlobToken')
+    for batch in iter_batches(Blob.objects.all(), 'hash'):
+        BlobToken.objects.bulk_create([
+            BlobToken(blob_id=blob.hash, token=token) for blob in batch
+            for token in tokenize(decompress(blob.data, blob.codec)
+                                  if blob.codec else blob.content)
+        ], ignore_conflicts=True)
+
+
+def index_scripts(apps, schema_editor):
+    """Add the texts, files, tags and OS of the existing scripts to the
+    index."""
+    Script = apps.get_model('workshop', 'Script')
+    ScriptToken = apps.get_model('workshop', 'ScriptToken')
+    scripts = Script.objects.only('files', *(
+        Script._meta.get_field(name).attname for name in TEXT_FIELDS
+    ))
+    for batch in iter_batches(scripts, 'id'):
+        names = {}
+        for source, related in (('tags', 'tag_id'),
+                                ('compatibility', 'os_id')):
+            names[source] = defaultdict(list)
+            through = getattr(Script, source).through
+            for script_id, name in through.objects.filter(
+                script__in=batch
+            ).values_list('script_id', related):
+                names[source][script_id].append(name)
+
+        ScriptToken.objects.bulk_create([
+            ScriptToken(script_id=script.id, source=source, token=token)
+            for script in batch for source, words in (
+                ('text', tokenize(*(
+                    getattr(script, Script._meta.get_field(name).attname)
+                    for name in TEXT_FIELDS
+                ))),
+                ('files', tokenize(*(file['name'] for file in script.files))),
+                ('tags', tokenize(*names['tags'][script.id])),
+                ('compatibility',
+                 tokenize(*names['compatibility'][script.id])),
+            ) for token in words
+        ], ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workshop', '0020_script_changes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BlobToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', workshop.api.models.TokenField(max_length=64)),
+                ('blob', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='tokens', to='workshop.blob')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['blob', 'token'], name='blob_token_blob_idx')],
+                'constraints': [models.UniqueConstraint(fields=('token', 'blob'), name='blob_token_unique')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ScriptToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('source', models.CharField(choices=[('text', 'Text'), ('files', 'Files'), ('tags', 'Tags'), ('compatibility', 'Compatibility')], max_length=13)),
+                ('token', workshop.api.models.TokenField(max_length=64)),
+                ('script', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='tokens', to='workshop.script')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['script', 'token'], name='script_token_script_idx')],
+                'constraints': [models.UniqueConstraint(fields=('token', 'script', 'source'), name='script_token_unique')],
+            },
+        ),
+        migrations.RunPython(index_blobs, migrations.RunPython.noop),
+        migrations.RunPython(index_scripts, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:23
+
+import workshop.api.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workshop', '0022_script_deletions'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='script',
+            name='files',
+            field=models.JSONField(validators=[workshop.api.validators.validate_script_manifest]),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-17 07:48
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def number_changes(apps, schema_editor):
+    """Number the existing changes with their ids (the tokens sent so far)."""
+    ScriptChange = apps.get_model('workshop', 'ScriptChange')
+    ScriptChange.objects.update(position=F('id'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workshop', '0023_script_files_manifest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scriptchange',
+            name='position',
+            field=models.PositiveBigIntegerField(editable=False, null=True, unique=True),
+        ),
+        migrations.RunPython(number_changes, migrations.RunPython.noop),
+    ]
@@ -186,13 +186,16 @@ AUTH_USER_MODEL = "workshop.User"
 
 # Django REST Framework settings
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'workshop.api.pagination.WorkshopPagination',
     'PAGE_SIZE': 50,
+    # Report the errors of the items of lists by index
+    'LIST_SERIALIZER_ERRORS_AS_DICT': True,
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
         'rest_framework.filters.OrderingFilter',
+        'workshop.api.filters.BulkRetrieveFilter',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'knox.auth.TokenAuthentication',
@@ -201,6 +204,47 @@ REST_FRAMEWORK = {
     ]
 }
 
+# Number of seconds the number of results of the lists are cached (0 to
+# disable the cache)
+PAGINATION_COUNT_CACHE_TIMEOUT = 30
+
+# Number of rows (according to the MySQL table statistics) from which the
+# number of results of unfiltered lists is estimated instead of counted
+PAGINATION_COUNT_ESTIMATE_THRESHOLD = 100000
+
+# Number of objects that can be retrieved at once by id (?ids=), at most the
+# size of a page
+BULK_RETRIEVE_MAX_IDS = 50
+
+# Number of scripts that can be created or updated at once (/scripts/bulk/)
+BULK_WRITE_MAX_SCRIPTS = 1000
+
+# Number of seconds between two saves of the views of the scripts (they are
+# counted in memory in the meantime)
+SCRIPT_VIEWS_FLUSH_INTERVAL = 10
+
+# Whether the contents of the new script files are stored compressed (the
+# existing ones can be compressed with the compress_blobs command)
+SCRIPT_FILES_COMPRESSION = False
+
+# Directory where the archives of the scripts (/scripts/<id>/bundle.zip) are
+# cached. Old archives can be deleted with the clear_bundles command
+SCRIPT_BUNDLES_DIR = BASE_DIR / "bundles"
+
+# Maximum number of revisions of a script between two checkpoints (revisions
+# storing all their files instead of deltas). Rebuilding a revision applies
+# at most this number of deltas
+SCRIPT_REVISIONS_MAX_CHAIN = 50
+
+# Maximum number of changes of the catalog returned at once
+# (/scripts/changes/)
+SCRIPT_CHANGES_PAGE_SIZE = 1000
+
+# Number of tokens of the search index from which a search term is common:
+# instead of listing the scripts having it, each listed script is checked
+# for it (so that the pages stop once full)
+SEARCH_COMMON_TERM_TOKENS = 5000
+
 # Knox settings (set the user serializer to use)
 REST_KNOX = {
     'USER_SERIALIZER': 'knox.serializers.UserSerializer'
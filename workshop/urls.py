@@ -18,8 +18,8 @@ from django.urls import path
 
 from django.urls import include
 from django.contrib.staticfiles.urls import staticfiles_urlpatterns
-from rest_framework import routers
 from workshop.api import views
+from workshop.api.routers import WorkshopRouter
 
 from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, \
     SpectacularSwaggerView
@@ -31,7 +31,7 @@ urlpatterns = [
     path("scripts_stats/", views.ScriptStatsView.as_view()),
 ]
 
-router = routers.DefaultRouter()
+router = WorkshopRouter()
 # We don't want conflict with UserViewSet and RegisterViewSet
 router.register(r'users', views.UserViewSet, basename='user')
 router.register(r'groups', views.GroupViewSet, basename='group')